@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+
+from app import config
+from app.db import create_db_and_tables, create_session, engine, rebuild_search_index
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_revision_service import NoteRevisionService
+
+
+async def _rebuild_search_index(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    await rebuild_search_index()
+    print("Search index rebuilt")
+
+
+async def _backfill_note_derivatives(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    async with create_session() as session:
+        derivatives = NoteDerivativeService(session, queue_grammar_checks=config.NOTE_GRAMMAR_ON_SAVE and not args.no_grammar)
+        computed = await derivatives.backfill(batch_size=args.batch_size)
+    print(f"Derivatives computed for {computed} notes")
+
+
+def _backfill_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--batch-size", type=int, default=500, help="Notes per transaction (default: 500)")
+    parser.add_argument("--no-grammar", action="store_true", help="Don't queue grammar checks of the notes")
+
+
+async def _compact_note_revisions(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    async with create_session() as session:
+        revisions = NoteRevisionService(session, snapshot_interval=config.NOTE_REVISION_SNAPSHOT_INTERVAL)
+        stats = await revisions.compact_all(keep=args.keep, compression_level=args.level)
+    print(
+        f"Compacted revisions of {stats['notes']} notes: {stats['dropped']} dropped, "
+        f"{stats['before']} -> {stats['after']} bytes"
+    )
+
+
+def _compact_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--keep", type=int, default=config.NOTE_REVISION_KEEP,
+        help=f"Newest revisions to keep per note, 0 keeps all (default: {config.NOTE_REVISION_KEEP})",
+    )
+    parser.add_argument("--level", type=int, default=19, help="zstd compression level (default: 19)")
+
+
+COMMANDS = {
+    "rebuild-search-index": (_rebuild_search_index, "Rebuild the full-text search index from the note table", None),
+    "backfill-note-derivatives": (
+        _backfill_note_derivatives,
+        "Store HTML, plain text, counts and grammar checks of notes saved before they were precomputed",
+        _backfill_arguments,
+    ),
+    "compact-note-revisions": (
+        _compact_note_revisions,
+        "Drop old note revisions and store the others again with the tightest chains and compression",
+        _compact_arguments,
+    ),
+}
+
+
+async def _run(args: argparse.Namespace) -> None:
+    try:
+        await COMMANDS[args.command][0](args)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Maintenance commands, e.g. ``python -m app.cli rebuild-search-index``"""
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Notes API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, add_arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if add_arguments is not None:
+            add_arguments(subparser)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
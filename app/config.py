@@ -0,0 +1,137 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.lower() in ("1", "true", "yes", "on") if value else default
+
+
+def _env_list(name: str, default: str) -> list[str]:
+    value = os.getenv(name, default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# LanguageTool instance pool
+GRAMMAR_POOL_MIN_SIZE = _env_int("GRAMMAR_POOL_MIN_SIZE", 1)
+GRAMMAR_POOL_MAX_SIZE = _env_int("GRAMMAR_POOL_MAX_SIZE", 2)
+# Per-language overrides, e.g. "en-US=2:4,fr-FR=0:1"
+GRAMMAR_POOL_SIZES = _env_list("GRAMMAR_POOL_SIZES", "")
+# Languages to start at application startup
+GRAMMAR_POOL_WARM_LANGUAGES = _env_list("GRAMMAR_POOL_WARM_LANGUAGES", "en-US")
+GRAMMAR_POOL_ACQUIRE_TIMEOUT = _env_float("GRAMMAR_POOL_ACQUIRE_TIMEOUT", 30.0)
+# Idle instances are health checked before reuse once this many seconds have passed
+GRAMMAR_POOL_HEALTH_CHECK_INTERVAL = _env_float("GRAMMAR_POOL_HEALTH_CHECK_INTERVAL", 60.0)
+
+# Detect the language of "auto" grammar checks locally and check with that language.
+# Each detected language is checked with its variant listed here.
+LANGUAGE_DETECTION_ENABLED = _env_bool("LANGUAGE_DETECTION_ENABLED", True)
+LANGUAGE_DETECTION_VARIANTS = _env_list("LANGUAGE_DETECTION_VARIANTS", "en-US,fr-FR,es-ES,de-DE")
+# Prose characters from the start of a document the language is detected from
+LANGUAGE_DETECTION_SAMPLE_CHARS = _env_int("LANGUAGE_DETECTION_SAMPLE_CHARS", 1000)
+
+# Grammar backend: "local" runs LanguageTool instances in each worker process,
+# "server" sends checks to one LanguageTool HTTP server shared by all workers
+GRAMMAR_BACKEND = os.getenv("GRAMMAR_BACKEND", "local")
+LANGUAGE_TOOL_SERVER_URL = os.getenv("LANGUAGE_TOOL_SERVER_URL", "http://127.0.0.1:8081/v2")
+# Start and supervise the server from the app; disable when it runs elsewhere
+LANGUAGE_TOOL_SERVER_MANAGED = _env_bool("LANGUAGE_TOOL_SERVER_MANAGED", True)
+LANGUAGE_TOOL_SERVER_PORT = _env_int("LANGUAGE_TOOL_SERVER_PORT", 8081)
+LANGUAGE_TOOL_SERVER_LOCK = os.getenv("LANGUAGE_TOOL_SERVER_LOCK", "/tmp/notes-languagetool.lock")
+LANGUAGE_TOOL_SERVER_TIMEOUT = _env_float("LANGUAGE_TOOL_SERVER_TIMEOUT", 30.0)
+LANGUAGE_TOOL_SERVER_CONNECT_TIMEOUT = _env_float("LANGUAGE_TOOL_SERVER_CONNECT_TIMEOUT", 2.0)
+LANGUAGE_TOOL_SERVER_RETRIES = _env_int("LANGUAGE_TOOL_SERVER_RETRIES", 2)
+LANGUAGE_TOOL_SERVER_MAX_CONNECTIONS = _env_int("LANGUAGE_TOOL_SERVER_MAX_CONNECTIONS", 8)
+LANGUAGE_TOOL_SERVER_HEALTH_CHECK_INTERVAL = _env_float("LANGUAGE_TOOL_SERVER_HEALTH_CHECK_INTERVAL", 5.0)
+LANGUAGE_TOOL_SERVER_STARTUP_TIMEOUT = _env_float("LANGUAGE_TOOL_SERVER_STARTUP_TIMEOUT", 60.0)
+
+# Worker threads running blocking grammar checks
+GRAMMAR_EXECUTOR_WORKERS = _env_int("GRAMMAR_EXECUTOR_WORKERS", 4)
+# Checks allowed to wait for a worker before requests are rejected with 503
+GRAMMAR_EXECUTOR_QUEUE_SIZE = _env_int("GRAMMAR_EXECUTOR_QUEUE_SIZE", 16)
+# Documents accepted by one batch grammar check request
+GRAMMAR_BATCH_MAX_DOCUMENTS = _env_int("GRAMMAR_BATCH_MAX_DOCUMENTS", 100)
+
+# Background grammar check jobs, queued in the database
+GRAMMAR_JOB_WORKERS = _env_int("GRAMMAR_JOB_WORKERS", 2)
+GRAMMAR_JOB_POLL_INTERVAL = _env_float("GRAMMAR_JOB_POLL_INTERVAL", 1.0)
+# Seconds before a job held by a crashed worker is picked up again
+GRAMMAR_JOB_LEASE_TIMEOUT = _env_float("GRAMMAR_JOB_LEASE_TIMEOUT", 60.0)
+GRAMMAR_JOB_MAX_ATTEMPTS = _env_int("GRAMMAR_JOB_MAX_ATTEMPTS", 3)
+GRAMMAR_JOB_CALLBACK_TIMEOUT = _env_float("GRAMMAR_JOB_CALLBACK_TIMEOUT", 10.0)
+# Hosts job callbacks may be sent to, e.g. "hooks.example.com". When empty, any
+# host resolving only to public addresses; loopback, private and link-local are refused
+GRAMMAR_JOB_CALLBACK_HOSTS = _env_list("GRAMMAR_JOB_CALLBACK_HOSTS", "")
+
+# Cache: in-process LRU (L1) in front of Redis (L2)
+CACHE_L1_MAX_ENTRIES = _env_int("CACHE_L1_MAX_ENTRIES", 10_000)
+CACHE_L1_MAX_BYTES = _env_int("CACHE_L1_MAX_BYTES", 64 * 1024 * 1024)
+CACHE_L1_TTL = _env_int("CACHE_L1_TTL", 300)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = _env_int("REDIS_PORT", 6379)
+CACHE_REDIS_TTL = _env_int("CACHE_REDIS_TTL", 300)
+CACHE_REDIS_TIMEOUT = _env_float("CACHE_REDIS_TIMEOUT", 1.0)
+CACHE_REDIS_MAX_CONNECTIONS = _env_int("CACHE_REDIS_MAX_CONNECTIONS", 50)
+CACHE_REDIS_MAX_BACKOFF = _env_float("CACHE_REDIS_MAX_BACKOFF", 60.0)
+# Redis values of at least this many bytes are stored zstd-compressed
+CACHE_COMPRESS_THRESHOLD = _env_int("CACHE_COMPRESS_THRESHOLD", 1024)
+CACHE_COMPRESS_LEVEL = _env_int("CACHE_COMPRESS_LEVEL", 3)
+
+# Coalescing of identical in-flight grammar checks across workers
+SINGLE_FLIGHT_LEASE_TIMEOUT = _env_float("SINGLE_FLIGHT_LEASE_TIMEOUT", 60.0)
+SINGLE_FLIGHT_POLL_INTERVAL = _env_float("SINGLE_FLIGHT_POLL_INTERVAL", 0.1)
+
+# Database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///notes.db")
+DATABASE_POOL_SIZE = _env_int("DATABASE_POOL_SIZE", 5)
+DATABASE_MAX_OVERFLOW = _env_int("DATABASE_MAX_OVERFLOW", 10)
+DATABASE_POOL_TIMEOUT = _env_float("DATABASE_POOL_TIMEOUT", 30.0)
+SQLITE_CACHE_SIZE_KB = _env_int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# Uploaded files, stored once per content hash
+FILE_STORAGE_DIR = os.getenv("FILE_STORAGE_DIR", "storage")
+FILE_UPLOAD_MAX_SIZE = _env_int("FILE_UPLOAD_MAX_SIZE", 100 * 1024 * 1024)
+# Files accepted by one archive download
+FILE_ARCHIVE_MAX_FILES = _env_int("FILE_ARCHIVE_MAX_FILES", 100)
+
+# Queue a background grammar check of notes when they are saved, to store its summary
+NOTE_GRAMMAR_ON_SAVE = _env_bool("NOTE_GRAMMAR_ON_SAVE", True)
+
+# Edit history of notes: a full snapshot at least every N revisions, deltas in between
+NOTE_REVISION_SNAPSHOT_INTERVAL = _env_int("NOTE_REVISION_SNAPSHOT_INTERVAL", 20)
+# Newest revisions per note kept by `python -m app.cli compact-note-revisions`, 0 keeps all
+NOTE_REVISION_KEEP = _env_int("NOTE_REVISION_KEEP", 0)
+
+# Notes inserted per transaction by the bulk import endpoint
+IMPORT_BATCH_SIZE = _env_int("IMPORT_BATCH_SIZE", 1000)
+# Largest single record of a bulk import; larger ones are skipped and reported as errors
+IMPORT_MAX_RECORD_BYTES = _env_int("IMPORT_MAX_RECORD_BYTES", 6 * 1024 * 1024)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Load lazily initialized dependencies, open connections and start LanguageTool
+# before serving, instead of on the first requests that need them
+STARTUP_PREWARM = _env_bool("STARTUP_PREWARM", True)
+
+# gzip/brotli compression of responses of at least this many bytes
+RESPONSE_COMPRESS_MIN_SIZE = _env_int("RESPONSE_COMPRESS_MIN_SIZE", 1024)
+RESPONSE_GZIP_LEVEL = _env_int("RESPONSE_GZIP_LEVEL", 6)
+RESPONSE_BROTLI_QUALITY = _env_int("RESPONSE_BROTLI_QUALITY", 4)
+
+# Sampling profiler for requests sent with an X-Profile header
+PROFILER_ENABLED = _env_bool("PROFILER_ENABLED", False)
+PROFILER_INTERVAL = _env_float("PROFILER_INTERVAL", 0.005)
+# Profiles of requests faster than this are discarded
+PROFILER_SLOW_REQUEST_MS = _env_int("PROFILER_SLOW_REQUEST_MS", 1000)
+PROFILER_OUTPUT_DIR = os.getenv("PROFILER_OUTPUT_DIR", "profiles")
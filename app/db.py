@@ -1,14 +1,119 @@
-from sqlmodel import create_engine, Session, SQLModel
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-sqlite_file_name = "notes.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+from app import config
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+database_url = make_url(config.DATABASE_URL)
+is_sqlite = database_url.get_backend_name() == "sqlite"
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+engine_options = {"pool_pre_ping": not is_sqlite}
+if not is_sqlite or database_url.database not in (None, "", ":memory:"):
+    engine_options.update(
+        pool_size=config.DATABASE_POOL_SIZE,
+        max_overflow=config.DATABASE_MAX_OVERFLOW,
+        pool_timeout=config.DATABASE_POOL_TIMEOUT,
+    )
 
-def get_session():
-    with Session(engine) as session:
+engine = create_async_engine(database_url, **engine_options)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a write is in progress
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+if is_sqlite:
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+# Full-text index over note title and content, kept in sync by triggers
+SEARCH_INDEX_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(
+        title, content, content='note', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS note_fts_insert AFTER INSERT ON note BEGIN
+        INSERT INTO note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS note_fts_delete AFTER DELETE ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS note_fts_update AFTER UPDATE OF title, content ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+
+def _add_missing_columns(connection):
+    # create_all skips columns added to tables that already exist; only nullable
+    # ones, or ones with a server default for the existing rows, can be added
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not (column.nullable or column.server_default is not None):
+                continue
+            definition = f"{column.name} {column.type.compile(dialect=connection.dialect)}"
+            if column.server_default is not None:
+                definition += f" {'' if column.nullable else 'NOT NULL '}DEFAULT {column.server_default.arg}"
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+
+
+def _create_all(connection):
+    SQLModel.metadata.create_all(connection)
+    _add_missing_columns(connection)
+    # create_all skips indexes added to tables that already exist
+    for table in SQLModel.metadata.tables.values():
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    if is_sqlite:
+        search_index_exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'note_fts'")
+        ).first()
+        for statement in SEARCH_INDEX_SCHEMA:
+            connection.execute(text(statement))
+        if not search_index_exists:
+            # Index notes saved before the search index existed
+            connection.execute(text("INSERT INTO note_fts(note_fts) VALUES ('rebuild')"))
+
+
+async def create_db_and_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(_create_all)
+
+
+async def rebuild_search_index():
+    """Rebuild the full-text index from the note table"""
+    if not is_sqlite:
+        raise RuntimeError("Full-text search requires SQLite")
+    async with engine.begin() as connection:
+        await connection.execute(text("INSERT INTO note_fts(note_fts) VALUES ('rebuild')"))
+
+
+def create_session() -> AsyncSession:
+    return AsyncSession(engine, expire_on_commit=False)
+
+
+async def get_session():
+    async with create_session() as session:
         yield session
\ No newline at end of file
@@ -1,5 +1,188 @@
+from typing import Annotated
+
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config
+from app.db import get_session
+from app.interfaces.file_storage import FileStorage
 from app.interfaces.grammar_checker import GrammarChecker
+from app.interfaces.markdown_renderer import MarkdownRenderer
+from app.repositories.file_storage_repository import FileStorageRepository
+from app.services.file_upload_service import FileUploadService
+from app.services.grammar_batch_service import GrammarBatchService
+from app.services.grammar_job_service import GrammarJobWorker
 from app.services.grammar_service import NoteGrammarService
+from app.services.language_tool_pool import LanguageToolPool
+from app.services.markdown_service import MarkdownService
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_revision_service import NoteRevisionService
+from app.services.render_etag_service import RenderETagService
+from app.services.incremental_grammar_service import IncrementalGrammarService
+from app.utils.bounded_executor import BoundedExecutor
+from app.utils.cache_redis import CacheHandler as RedisCacheHandler
+from app.utils.caching_in_memory import CacheHandler as MemoryCacheHandler
+from app.utils.local_file_storage import LocalFileStorage
+from app.utils.single_flight import SingleFlight
+from app.utils.tiered_cache import TieredCache
+from app.utils.language_code import LanguageCode
+from app.utils.language_detector import LanguageDetector
+
+
+def _parse_pool_sizes(entries: list[str]) -> dict[LanguageCode, tuple[int, int]]:
+    sizes = {}
+    for entry in entries:
+        lang, _, bounds = entry.partition("=")
+        min_size, _, max_size = bounds.partition(":")
+        sizes[LanguageCode(lang)] = (int(min_size), int(max_size or min_size))
+    return sizes
+
+
+grammar_pool = LanguageToolPool(
+    min_size=config.GRAMMAR_POOL_MIN_SIZE,
+    max_size=config.GRAMMAR_POOL_MAX_SIZE,
+    sizes=_parse_pool_sizes(config.GRAMMAR_POOL_SIZES),
+    acquire_timeout=config.GRAMMAR_POOL_ACQUIRE_TIMEOUT,
+    health_check_interval=config.GRAMMAR_POOL_HEALTH_CHECK_INTERVAL,
+)
+
+language_tool_client = None
+language_tool_supervisor = None
+if config.GRAMMAR_BACKEND == "server":
+    # Imported only for this backend, it pulls in the HTTP client
+    from app.services.language_tool_server import (
+        LanguageToolClient,
+        LanguageToolServerChecker,
+        LanguageToolServerSupervisor,
+    )
+
+    language_tool_client = LanguageToolClient(
+        url=config.LANGUAGE_TOOL_SERVER_URL,
+        timeout=config.LANGUAGE_TOOL_SERVER_TIMEOUT,
+        connect_timeout=config.LANGUAGE_TOOL_SERVER_CONNECT_TIMEOUT,
+        retries=config.LANGUAGE_TOOL_SERVER_RETRIES,
+        max_connections=config.LANGUAGE_TOOL_SERVER_MAX_CONNECTIONS,
+    )
+    if config.LANGUAGE_TOOL_SERVER_MANAGED:
+        language_tool_supervisor = LanguageToolServerSupervisor(
+            language_tool_client,
+            port=config.LANGUAGE_TOOL_SERVER_PORT,
+            lock_path=config.LANGUAGE_TOOL_SERVER_LOCK,
+            health_check_interval=config.LANGUAGE_TOOL_SERVER_HEALTH_CHECK_INTERVAL,
+            startup_timeout=config.LANGUAGE_TOOL_SERVER_STARTUP_TIMEOUT,
+        )
+    grammar_checker: GrammarChecker = LanguageToolServerChecker(language_tool_client)
+else:
+    grammar_checker = NoteGrammarService(grammar_pool)
+
+language_detector = (
+    LanguageDetector(
+        [LanguageCode(variant) for variant in config.LANGUAGE_DETECTION_VARIANTS],
+        sample_chars=config.LANGUAGE_DETECTION_SAMPLE_CHARS,
+    )
+    if config.LANGUAGE_DETECTION_ENABLED
+    else None
+)
+
+grammar_executor = BoundedExecutor(
+    max_workers=config.GRAMMAR_EXECUTOR_WORKERS,
+    max_queue=config.GRAMMAR_EXECUTOR_QUEUE_SIZE,
+    name="grammar-check",
+)
+
+cache = TieredCache(
+    l1=MemoryCacheHandler(
+        max_entries=config.CACHE_L1_MAX_ENTRIES,
+        max_bytes=config.CACHE_L1_MAX_BYTES,
+        expiry_time=config.CACHE_L1_TTL,
+    ),
+    l2=RedisCacheHandler(
+        redis_host=config.REDIS_HOST,
+        redis_port=config.REDIS_PORT,
+        expiry_time=config.CACHE_REDIS_TTL,
+        socket_timeout=config.CACHE_REDIS_TIMEOUT,
+        max_connections=config.CACHE_REDIS_MAX_CONNECTIONS,
+        max_reconnect_backoff=config.CACHE_REDIS_MAX_BACKOFF,
+        compress_threshold=config.CACHE_COMPRESS_THRESHOLD,
+        compress_level=config.CACHE_COMPRESS_LEVEL,
+    ),
+)
+
+grammar_single_flight = SingleFlight(
+    cache.l2,
+    lease_timeout=config.SINGLE_FLIGHT_LEASE_TIMEOUT,
+    poll_interval=config.SINGLE_FLIGHT_POLL_INTERVAL,
+)
+
+render_etags = RenderETagService(cache.l2)
+
 
 def get_grammar_checker() -> GrammarChecker:
-    return NoteGrammarService
\ No newline at end of file
+    return grammar_checker
+
+
+def get_grammar_executor() -> BoundedExecutor:
+    return grammar_executor
+
+
+def get_cache() -> TieredCache:
+    return cache
+
+
+def get_incremental_grammar_service(
+    grammar_checker: Annotated[GrammarChecker, Depends(get_grammar_checker)],
+    executor: Annotated[BoundedExecutor, Depends(get_grammar_executor)],
+    cache: Annotated[TieredCache, Depends(get_cache)],
+) -> IncrementalGrammarService:
+    return IncrementalGrammarService(grammar_checker, cache, executor, language_detector)
+
+
+def get_grammar_batch_service(
+    grammar_service: Annotated[IncrementalGrammarService, Depends(get_incremental_grammar_service)],
+    cache: Annotated[TieredCache, Depends(get_cache)],
+) -> GrammarBatchService:
+    return GrammarBatchService(grammar_service, cache, grammar_single_flight, concurrency=grammar_executor.max_workers)
+
+
+# Background grammar checks share the pool, executor and cache with the endpoints
+grammar_job_worker = GrammarJobWorker(
+    IncrementalGrammarService(get_grammar_checker(), cache, grammar_executor, language_detector),
+    cache,
+    grammar_single_flight,
+    workers=config.GRAMMAR_JOB_WORKERS,
+    poll_interval=config.GRAMMAR_JOB_POLL_INTERVAL,
+    lease_timeout=config.GRAMMAR_JOB_LEASE_TIMEOUT,
+    max_attempts=config.GRAMMAR_JOB_MAX_ATTEMPTS,
+    callback_timeout=config.GRAMMAR_JOB_CALLBACK_TIMEOUT,
+    callback_hosts=config.GRAMMAR_JOB_CALLBACK_HOSTS,
+    on_finished=NoteDerivativeService.record_grammar_result,
+)
+
+
+def get_markdown_renderer() -> MarkdownRenderer:
+    return MarkdownService()
+
+
+def get_note_derivative_service(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    renderer: Annotated[MarkdownRenderer, Depends(get_markdown_renderer)],
+) -> NoteDerivativeService:
+    return NoteDerivativeService(session, renderer, queue_grammar_checks=config.NOTE_GRAMMAR_ON_SAVE)
+
+
+def get_note_revision_service(session: Annotated[AsyncSession, Depends(get_session)]) -> NoteRevisionService:
+    return NoteRevisionService(session, snapshot_interval=config.NOTE_REVISION_SNAPSHOT_INTERVAL)
+
+
+file_storage = LocalFileStorage(config.FILE_STORAGE_DIR)
+
+
+def get_file_storage() -> FileStorage:
+    return file_storage
+
+
+def get_file_upload_service(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    storage: Annotated[FileStorage, Depends(get_file_storage)],
+) -> FileUploadService:
+    return FileUploadService(FileStorageRepository(session, storage), max_file_size=config.FILE_UPLOAD_MAX_SIZE)
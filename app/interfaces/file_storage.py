@@ -0,0 +1,49 @@
+from typing import AsyncContextManager, AsyncIterator, NamedTuple, Optional, Protocol
+
+
+class FileTooLargeError(ValueError):
+    """The uploaded content exceeds the allowed size"""
+
+
+class StagedBlob(NamedTuple):
+    # Hex SHA-256 of the content, its storage address
+    digest: str
+    size: int
+    # Temporary location of the content until it is stored or discarded
+    temp_path: str
+
+
+class StoredBlob(NamedTuple):
+    digest: str
+    size: int
+    # False when identical content was already stored
+    created: bool
+
+
+class FileStorage(Protocol):
+    async def stage(self, chunks: AsyncIterator[bytes], max_size: Optional[int] = None) -> StagedBlob:
+        """Write content read chunk by chunk to a temporary location"""
+        ...
+
+    async def store(self, staged: StagedBlob) -> StoredBlob:
+        """Store staged content at its address, call while holding ``lock(digest)``"""
+        ...
+
+    async def discard(self, staged: StagedBlob) -> None:
+        """Remove the temporary copy of staged content"""
+        ...
+
+    def lock(self, digest: str) -> AsyncContextManager[None]:
+        """Serialize storing and deleting the blob, across processes"""
+        ...
+
+    def path(self, digest: str) -> str:
+        """Local path of the stored content"""
+        ...
+
+    async def exists(self, digest: str) -> bool:
+        ...
+
+    async def delete(self, digest: str) -> None:
+        """Delete the blob, call while holding ``lock(digest)``"""
+        ...
@@ -2,7 +2,14 @@ from typing import Protocol
 from app.utils.language_code import LanguageCode
 from app.schemas.grammar_schema import GrammarCheckResponse
 
+
+class GrammarCheckerUnavailableError(RuntimeError):
+    """The grammar checker can't take the request right now, it may be retried later"""
+
+
 class GrammarChecker(Protocol):
-    @staticmethod
-    def check_grammar(md_file: str, lang: LanguageCode = LanguageCode.AUTO) -> GrammarCheckResponse:
+    def check_grammar(self, md_file: str, lang: LanguageCode = LanguageCode.AUTO) -> GrammarCheckResponse:
+        ...
+
+    def check_blocks(self, blocks: list[str], lang: LanguageCode = LanguageCode.AUTO) -> list[list[dict]]:
         ...
\ No newline at end of file
@@ -1,7 +0,0 @@
-from typing import Protocol
-
-
-class StorageHandler(Protocol):
-    def save(self, filename: str, content: str) -> None:
-        """Save the markdown file"""
-        pass
\ No newline at end of file
@@ -1,19 +1,90 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
-from .routers import notes
-from .db import create_db_and_tables
+from .routers import files, metrics, notes
+from .db import create_db_and_tables, engine
+from app import config
+from app.dependencies import (
+    cache,
+    grammar_executor,
+    grammar_job_worker,
+    grammar_pool,
+    language_detector,
+    language_tool_client,
+    language_tool_supervisor,
+)
+from app.utils.language_code import LanguageCode
 from app.schemas.errors_schema import ValidationErrorDetail, ValidationErrorResponse
+from app.services.markdown_service import MarkdownService
+from app.utils.markdown_prose import extract_prose_blocks
+from app.utils.compression import CompressionMiddleware
+from app.utils.server_timing import ServerTimingMiddleware
+
+logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+def _load_lazy_dependencies() -> None:
+    import magic  # noqa: F401
+
+    MarkdownService.render_markdown_to_html("# Warm-up")
+    extract_prose_blocks("# Warm-up")
+    if language_detector is not None:
+        language_detector.model
+
+async def prewarm() -> None:
+    """Initialize what is otherwise set up on first use, so the first requests don't wait for it"""
+    started = time.perf_counter()
+    await cache.l2.connect()
+    await asyncio.to_thread(_load_lazy_dependencies)
+    if language_tool_client is None:
+        # Start the Java backends before the first request needs them
+        warm_languages = [LanguageCode(lang) for lang in config.GRAMMAR_POOL_WARM_LANGUAGES]
+        try:
+            await asyncio.to_thread(grammar_pool.warm_up, warm_languages)
+        except Exception as e:
+            # Checkers are still created on demand
+            logger.warning("LanguageTool warm-up failed: %s", e)
+    logger.info("Pre-warm finished in %.0f ms", (time.perf_counter() - started) * 1000)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    await create_db_and_tables()
+    if language_tool_supervisor is not None:
+        language_tool_supervisor.start()
+    if config.STARTUP_PREWARM:
+        await prewarm()
+    grammar_job_worker.start()
     yield
-    # Clean up code here
+    await grammar_job_worker.stop()
+    await asyncio.to_thread(grammar_executor.shutdown)
+    await asyncio.to_thread(grammar_pool.close)
+    if language_tool_supervisor is not None:
+        await language_tool_supervisor.stop()
+    if language_tool_client is not None:
+        language_tool_client.close()
+    await cache.close()
+    await engine.dispose()
 
 app = FastAPI(lifespan=lifespan, title="Notes Taking API", version="0.1.0")
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.RESPONSE_COMPRESS_MIN_SIZE,
+    gzip_level=config.RESPONSE_GZIP_LEVEL,
+    brotli_quality=config.RESPONSE_BROTLI_QUALITY,
+)
+app.add_middleware(
+    ServerTimingMiddleware,
+    profiler_enabled=config.PROFILER_ENABLED,
+    profiler_interval=config.PROFILER_INTERVAL,
+    slow_request_seconds=config.PROFILER_SLOW_REQUEST_MS / 1000,
+    profile_dir=config.PROFILER_OUTPUT_DIR,
+)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -32,3 +103,5 @@ async def read_root():
     return {"status": "Running"}
 
 app.include_router(notes.router, tags=["notes"])
+app.include_router(files.router, tags=["files"])
+app.include_router(metrics.router, tags=["metrics"])
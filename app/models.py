@@ -1,7 +1,119 @@
 from datetime import datetime, timezone
-from sqlmodel import Field
+from typing import Optional
+from sqlalchemy import JSON, Column, Index, LargeBinary, text
+from sqlmodel import Field, SQLModel
+from app.schemas.grammar_schema import GrammarJobStatus
 from app.schemas.note_schema import NoteBase
+from app.utils.language_code import LanguageCode
 
 class Note(NoteBase, table=True):
+    # Covering indexes for keyset pagination of the note list
+    __table_args__ = (
+        Index("ix_note_created_at_id_title", "created_at", "id", "title"),
+        Index("ix_note_title_id_created_at", "title", "id", "created_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Incremented by every update, which only applies to the version it read
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+
+
+class GrammarJob(SQLModel, table=True):
+    """Background grammar check. The table is the job queue."""
+
+    __tablename__ = "grammar_job"
+    __table_args__ = (
+        Index("ix_grammar_job_status_created_at", "status", "created_at"),
+    )
+
+    id: str = Field(primary_key=True)
+    status: GrammarJobStatus = Field(default=GrammarJobStatus.QUEUED)
+    lang: LanguageCode
+    cache_key: str
+    # Cleared once the job is finished. Empty for note checks, which read the note when they run
+    content: str = ""
+    # Note checked and the hash of the content it was queued for
+    note_id: Optional[int] = None
+    content_hash: Optional[str] = None
+    callback_url: Optional[str] = None
+    progress: float = 0.0
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    attempts: int = 0
+    # Worker holding the job and when its hold expires
+    claimed_by: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+class StoredFile(SQLModel, table=True):
+    """Uploaded file. Files with identical content share one stored blob."""
+
+    __tablename__ = "stored_file"
+    __table_args__ = (
+        Index("ix_stored_file_created_at_id", "created_at", "id"),
+    )
+
+    id: str = Field(primary_key=True)
+    filename: str
+    content_type: str
+    size: int
+    # Address of the content in the file storage
+    sha256: str = Field(index=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class NoteDerivative(SQLModel, table=True):
+    """Data derived from a note's content, computed when the note is written"""
+
+    __tablename__ = "note_derivative"
+    __table_args__ = (
+        Index("ix_note_derivative_grammar_job_id", "grammar_job_id"),
+        Index("ix_note_derivative_content_hash", "content_hash"),
+    )
+
+    note_id: int = Field(foreign_key="note.id", primary_key=True)
+    # SHA-256 of the content the fields below were derived from
+    content_hash: str
+    renderer_version: str
+    html: str
+    plain_text: str
+    word_count: int
+    line_count: int
+    # Background grammar check of the current content, None when not queued
+    grammar_job_id: Optional[str] = None
+    grammar_status: Optional[GrammarJobStatus] = None
+    grammar_has_errors: Optional[bool] = None
+    grammar_total_issues: Optional[int] = None
+    grammar_checked_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class NoteRevision(SQLModel, table=True):
+    """
+    Version of a note. Snapshots hold the whole content, other revisions a
+    delta from the previous revision.
+    """
+
+    __tablename__ = "note_revision"
+    __table_args__ = (
+        Index("ix_note_revision_note_id_revision", "note_id", "revision", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default=datetime.now(timezone.utc))
\ No newline at end of file
+    note_id: int = Field(foreign_key="note.id")
+    # Numbered from 1 per note; compaction leaves gaps
+    revision: int
+    title: str
+    is_snapshot: bool
+    # zstd-compressed content, or delta for a non-snapshot
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    stored_size: int
+    content_hash: str
+    content_size: int
+    # Deltas since the last snapshot, this one included, and their stored size
+    chain_length: int
+    chain_size: int
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -1,8 +1,106 @@
+import uuid
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from app.interfaces.file_storage import FileStorage
+from app.models import StoredFile
+
 
 class FileStorageRepository:
-    def __init__(self, file_storage: FileStorage):
+    """
+    Uploaded files: metadata in the database, content in a content-addressed
+    FileStorage. A blob is deleted with the last file referencing it.
+
+    Linking an upload to its blob and inserting its row, and deleting a row
+    and counting the remaining references before unlinking the blob, both
+    happen under the storage lock of the digest, so an identical upload
+    cannot reuse a blob that is being deleted.
+    """
+
+    def __init__(self, session: AsyncSession, file_storage: FileStorage):
+        self.session = session
         self.file_storage = file_storage
 
-    def upload(self, file: bytes) -> str:
-        return self.file_storage.upload(file)
\ No newline at end of file
+    async def upload(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        content_type: str,
+        max_size: Optional[int] = None,
+    ) -> tuple[StoredFile, bool]:
+        """
+        Store a file
+
+        Args:
+            chunks (AsyncIterator[bytes]): File content
+            filename (str): Name of the file
+            content_type (str): MIME type of the content
+            max_size (Optional[int]): Size limit in bytes
+
+        Returns:
+            tuple[StoredFile, bool]: The file and whether its content was already stored
+
+        Raises:
+            FileTooLargeError: If the content exceeds ``max_size``
+        """
+        staged = await self.file_storage.stage(chunks, max_size)
+        try:
+            async with self.file_storage.lock(staged.digest):
+                blob = await self.file_storage.store(staged)
+                stored_file = StoredFile(
+                    id=uuid.uuid4().hex,
+                    filename=filename,
+                    content_type=content_type,
+                    size=blob.size,
+                    sha256=blob.digest,
+                )
+                self.session.add(stored_file)
+                await self.session.commit()
+        finally:
+            await self.file_storage.discard(staged)
+        return stored_file, not blob.created
+
+    async def get(self, file_id: str) -> Optional[StoredFile]:
+        return await self.session.get(StoredFile, file_id)
+
+    async def get_many(self, file_ids: list[str]) -> list[Optional[StoredFile]]:
+        """Files by id, in the order of ``file_ids``, None for unknown ids"""
+        result = await self.session.exec(select(StoredFile).where(StoredFile.id.in_(file_ids)))
+        files = {stored_file.id: stored_file for stored_file in result}
+        return [files.get(file_id) for file_id in file_ids]
+
+    async def list_files(self, limit: int, offset: int = 0) -> list[StoredFile]:
+        result = await self.session.exec(
+            select(StoredFile)
+            .order_by(StoredFile.created_at.desc(), StoredFile.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result)
+
+    def path(self, stored_file: StoredFile) -> str:
+        return self.file_storage.path(stored_file.sha256)
+
+    async def delete(self, file_id: str) -> bool:
+        """
+        Delete a file, and its blob unless another file has the same content
+
+        Returns:
+            bool: False if the file doesn't exist
+        """
+        stored_file = await self.session.get(StoredFile, file_id)
+        if stored_file is None:
+            return False
+        digest = stored_file.sha256
+        async with self.file_storage.lock(digest):
+            await self.session.delete(stored_file)
+            await self.session.commit()
+            references = await self.session.scalar(
+                select(func.count()).select_from(StoredFile).where(StoredFile.sha256 == digest)
+            )
+            if not references:
+                await self.file_storage.delete(digest)
+        return True
@@ -0,0 +1,134 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from app import config
+from app.dependencies import get_file_upload_service
+from app.interfaces.file_storage import FileTooLargeError
+from app.schemas.file_schema import FileInfo, FileListResponse, FileUploadResponse
+from app.services.file_upload_service import FileUploadService
+from app.utils.blob_response import BlobResponse
+from app.utils.server_timing import TimedRoute
+
+FileServiceDep = Annotated[FileUploadService, Depends(get_file_upload_service)]
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post(
+    "/files",
+    response_model=FileUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Upload a file",
+)
+async def upload_file(file_service: FileServiceDep, file: UploadFile = File(...)):
+    """
+    #### Upload a file
+
+    Content is stored once per SHA-256 hash; uploading the same content again
+    only adds a new file entry pointing to it.
+
+    #### Returns:
+    - The stored file and whether its content was already stored
+    """
+    try:
+        stored_file, deduplicated = await file_service.upload_file(file)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return FileUploadResponse(file=FileInfo.model_validate(stored_file), deduplicated=deduplicated)
+
+
+@router.get("/files", response_model=FileListResponse, summary="List files")
+async def list_files(
+    file_service: FileServiceDep,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    #### List uploaded files, newest first
+
+    #### Args:
+    - limit (int): Page size, 1-100. Default is 20
+    - offset (int): Files to skip. Default is 0
+
+    #### Returns:
+    - The page of files and the offset of the next page, null on the last page
+    """
+    files = await file_service.get_files_info(limit + 1, offset)
+    return FileListResponse(
+        files=[FileInfo.model_validate(stored_file) for stored_file in files[:limit]],
+        next_offset=offset + limit if len(files) > limit else None,
+    )
+
+
+@router.get("/files/archive", summary="Download files as a zip archive")
+async def download_archive(file_service: FileServiceDep, ids: str = Query(..., min_length=1)):
+    """
+    #### Download many files as one zip archive
+
+    The archive is streamed while it is written, so it is never held in memory or on disk.
+
+    #### Args:
+    - ids (str): Comma separated file ids
+
+    #### Returns:
+    - The zip archive
+    """
+    file_ids = list(dict.fromkeys(file_id.strip() for file_id in ids.split(",") if file_id.strip()))
+    if not file_ids or len(file_ids) > config.FILE_ARCHIVE_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must list 1 to {config.FILE_ARCHIVE_MAX_FILES} files",
+        )
+    files, missing = await file_service.get_files(file_ids)
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Files not found: {', '.join(missing)}")
+    return StreamingResponse(
+        file_service.download_files(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="files.zip"'},
+    )
+
+
+@router.get("/files/{file_id}", response_model=FileInfo, summary="File details")
+async def get_file_info(file_id: str, file_service: FileServiceDep):
+    """
+    #### Name, type, size and content hash of a file
+    """
+    stored_file = await file_service.get_file_info(file_id)
+    if stored_file is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return stored_file
+
+
+@router.get("/files/{file_id}/download", summary="Download a file")
+async def download_file(file_id: str, file_service: FileServiceDep):
+    """
+    #### Download a file
+
+    #### Supports:
+
+    - `Range` requests for partial and resumed downloads, validated with `If-Range`
+    - Caching by the content hash `ETag`
+
+    #### Returns:
+    - The file content
+    """
+    found = await file_service.get_file(file_id)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    stored_file, path = found
+    return BlobResponse(path, stored_file.sha256, filename=stored_file.filename, media_type=stored_file.content_type)
+
+
+@router.delete("/files/{file_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a file")
+async def delete_file(file_id: str, file_service: FileServiceDep):
+    """
+    #### Delete a file
+
+    Its content is removed once no other file shares it.
+    """
+    if not await file_service.delete_file(file_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Query, Response
+
+from app.dependencies import (
+    cache,
+    grammar_executor,
+    grammar_job_worker,
+    grammar_pool,
+    grammar_single_flight,
+    language_tool_client,
+    language_tool_supervisor,
+)
+from app.utils.prometheus import CONTENT_TYPE, registry
+from app.utils.server_timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/metrics", summary="Prometheus metrics")
+async def prometheus_metrics():
+    """Request and per-stage latency histograms in the Prometheus text format"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/metrics/grammar", summary="Grammar checker metrics")
+async def grammar_metrics():
+    """
+    Executor queue depth, wait/execution times, LanguageTool pool sizes or
+    shared server requests, coalesced checks and background jobs
+    """
+    metrics = {
+        "executor": grammar_executor.stats(),
+        "pool": grammar_pool.stats(),
+        "single_flight": grammar_single_flight.stats(),
+        "jobs": grammar_job_worker.stats(),
+    }
+    if language_tool_client is not None:
+        metrics["server"] = language_tool_client.stats()
+        if language_tool_supervisor is not None:
+            metrics["server"]["supervisor"] = language_tool_supervisor.stats()
+    return metrics
+
+
+@router.get("/metrics/cache", summary="Cache metrics")
+async def cache_metrics():
+    """Hit, miss, eviction and latency counters per cache tier"""
+    return cache.stats()
+
+
+@router.get("/metrics/cache/memory", summary="Redis memory per cache entry")
+async def cache_memory(
+    pattern: str = "grammar_check:*",
+    samples: int = Query(100, ge=1, le=1000),
+):
+    """Redis memory and stored size of a sample of entries, to tune the compression threshold"""
+    entries = await cache.l2.memory_usage(pattern, samples)
+    return {
+        "entries": entries,
+        "memory_bytes": sum(entry["memory_bytes"] for entry in entries),
+        "compressed": sum(1 for entry in entries if entry["compressed"]),
+    }
@@ -1,23 +1,66 @@
+import asyncio
+import tempfile
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, HTTPException, status, Form, UploadFile, File, Depends
-from sqlmodel import Session
+import orjson
 
-from app.utils.cache_redis import CacheHandler
-from app.db import get_session
-from app.models import Note
-from app.schemas.note_schema import NoteCreate, NoteSaveResponse
-from app.schemas.grammar_schema import GrammarCheckResponse
+from fastapi import APIRouter, HTTPException, status, Form, UploadFile, File, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config
+from app.db import get_session, is_sqlite
+from app.schemas.note_schema import (
+    NoteCreate,
+    NoteImportResponse,
+    NoteListResponse,
+    NoteRevisionListResponse,
+    NoteRevisionResponse,
+    NoteSaveResponse,
+    NoteSearchResponse,
+    NoteGrammarSummary,
+    NoteSortField,
+    NoteSummaryResponse,
+    SortOrder,
+)
+from app.schemas.grammar_schema import (
+    GrammarBatchRequest,
+    GrammarBatchResponse,
+    GrammarCheckResponse,
+    GrammarJobResponse,
+)
 from app.utils.generate_cache_key import generate_cache_key
 from app.utils.language_code import LanguageCode
 from app.utils.note_util import NoteUtilities
-from app.interfaces.grammar_checker import GrammarChecker
-from app.dependencies import get_grammar_checker
+from app.utils.record_stream import iter_json_array, iter_ndjson
+from app.dependencies import (
+    cache,
+    get_grammar_batch_service,
+    get_incremental_grammar_service,
+    get_note_derivative_service,
+    get_note_revision_service,
+    grammar_job_worker,
+    grammar_single_flight,
+    render_etags,
+)
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.services.grammar_batch_service import GrammarBatchService
+from app.services.grammar_job_service import GrammarJobService, job_response
+from app.services.incremental_grammar_service import IncrementalGrammarService
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_revision_service import NoteRevisionService
+from app.services.note_service import LIST_FIELDS, ConcurrentUpdateError, InvalidCursorError, NoteService
+from app.services.render_service import NoteRenderService
+from app.utils.bounded_executor import ExecutorSaturatedError
+from app.utils.callback_url import UnsafeCallbackURLError, check_callback_url
+from app.utils.server_timing import TimedRoute
+from app.utils.tracing import span
 
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+DerivativesDep = Annotated[NoteDerivativeService, Depends(get_note_derivative_service)]
+RevisionsDep = Annotated[NoteRevisionService, Depends(get_note_revision_service)]
 
-router = APIRouter()
-cache = CacheHandler(redis_host="localhost", redis_port=6379, expiry_time=300)
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/notes/check-grammar", response_model=GrammarCheckResponse, summary="Grammar check endpoint")
@@ -26,7 +69,7 @@ async def grammar_check(
     md_file: Optional[UploadFile] = File(None),
     md_text: Optional[str] = Form(default=None),
     lang: LanguageCode = Form(LanguageCode.AUTO),
-    grammar_checker: Annotated[GrammarChecker, Depends(get_grammar_checker)]
+    grammar_service: Annotated[IncrementalGrammarService, Depends(get_incremental_grammar_service)]
 ):
     """
     #### Grammar check endpoint for markdown content
@@ -51,17 +94,31 @@ async def grammar_check(
 
     try:
 
-        cache_key = generate_cache_key(content, "file" if md_file else "text")
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-
-        # Perform grammar check
-        grammar_result = grammar_checker.check_grammar(content, lang)
-
-        cache.set(cache_key, grammar_result.model_dump())
-
-        return grammar_result
+        cache_key = generate_cache_key(content, "file" if md_file else "text", lang.value)
+        # The cache holds the encoded response body, served without decoding
+        with span("cache"):
+            body = await cache.get(cache_key, decode=False)
+        if body is None:
+            # Concurrent requests for the same document share a single check.
+            # Only blocks missing from the block cache are sent to the grammar checker.
+            body = await grammar_single_flight.run(
+                cache_key,
+                lambda: grammar_service.check_grammar_encoded(content, lang, cache_key),
+                lambda: cache.get(cache_key, decode=False),
+            )
+        return Response(body, media_type="application/json")
+    except ExecutorSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Grammar checker is busy, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except GrammarCheckerUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Grammar checker is busy, please retry later",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -69,26 +126,449 @@ async def grammar_check(
         )
 
 
+@router.post(
+    "/notes/check-grammar/batch",
+    response_model=GrammarBatchResponse,
+    summary="Batch grammar check endpoint",
+)
+async def grammar_check_batch(
+    batch: GrammarBatchRequest,
+    request: Request,
+    batch_service: Annotated[GrammarBatchService, Depends(get_grammar_batch_service)],
+):
+    """
+    #### Grammar check many markdown documents in one request
+
+    Identical documents are checked once and documents are checked concurrently.
+
+    #### Supports:
+
+    - JSON response with every result in request order
+    - NDJSON response (`Accept: application/x-ndjson`), one result per line as soon as it is ready
+
+    #### Args:
+    - documents (list): Documents to check, each with `content` and an optional `lang` (default "auto")
+
+    #### Returns:
+    - The grammar check result or the error of every document, tagged with its index
+    """
+    documents = []
+    invalid = {}
+    for index, document in enumerate(batch.documents):
+        if NoteUtilities.is_valid_markdown(document.content):
+            documents.append((document.content, document.lang))
+        else:
+            invalid[index] = "Invalid markdown content"
+    # Index of every valid document in the request
+    positions = [index for index in range(len(batch.documents)) if index not in invalid]
+
+    # Results are encoded once; cached response bodies are spliced in without decoding
+    async def results():
+        for index, error in invalid.items():
+            yield index, orjson.dumps({"index": index, "error": error}), False
+        async for position, result in batch_service.check_documents(documents):
+            index = positions[position]
+            if isinstance(result, str):
+                yield index, orjson.dumps({"index": index, "error": result}), False
+            else:
+                yield index, b'{"index":%d,"result":%b}' % (index, result), True
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        async def lines():
+            async for _, line, _ in results():
+                yield line + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    collected = sorted([result async for result in results()])
+    checked = sum(1 for _, _, succeeded in collected if succeeded)
+    body = b'{"checked":%d,"failed":%d,"results":[%b]}' % (
+        checked, len(collected) - checked, b",".join(item for _, item, _ in collected)
+    )
+    return Response(body, media_type="application/json")
+
+
+@router.post(
+    "/notes/check-grammar/jobs",
+    response_model=GrammarJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a background grammar check",
+)
+async def submit_grammar_job(
+    *,
+    response: Response,
+    session: SessionDep,
+    md_file: Optional[UploadFile] = File(None),
+    md_text: Optional[str] = Form(default=None),
+    lang: LanguageCode = Form(LanguageCode.AUTO),
+    callback_url: Optional[str] = Form(default=None),
+):
+    """
+    #### Grammar check large markdown content in the background
+
+    Takes the same input as `/notes/check-grammar` but returns a job at once.
+    Poll `/notes/check-grammar/jobs/{job_id}` for progress and the result, or
+    pass a `callback_url` that receives the finished job as a JSON POST.
+
+    #### Args:
+    - md_file (UploadFile): Markdown file uploaded (optional). Default is None
+    - md_text (str): Markdown text input (optional). Default is None
+    - lang (LanguageCode): Language code to use for grammar checking. Default is "auto".
+    - callback_url (str): http(s) URL notified when the job finishes (optional). Its host must
+      be public, or listed in `GRAMMAR_JOB_CALLBACK_HOSTS` when that is set
+
+    #### Returns:
+    - The queued job
+    """
+    if callback_url:
+        try:
+            await check_callback_url(callback_url, config.GRAMMAR_JOB_CALLBACK_HOSTS)
+        except UnsafeCallbackURLError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    content = await NoteUtilities.process_markdown_content(md_file, md_text)
+
+    # Results land in the same cache entry the synchronous endpoint uses
+    cache_key = generate_cache_key(content, "file" if md_file else "text", lang.value)
+    cached_result = await cache.get(cache_key, decode=False)
+    job = await GrammarJobService(session).submit(
+        content, lang, cache_key, callback_url=callback_url, cached_result=cached_result
+    )
+    grammar_job_worker.notify()
+    response.headers["Location"] = f"/notes/check-grammar/jobs/{job.id}"
+    return job_response(job)
+
+
+@router.get("/notes/check-grammar/jobs/{job_id}", response_model=GrammarJobResponse, summary="Background grammar check status")
+async def get_grammar_job(job_id: str, session: SessionDep):
+    """
+    #### Status, progress and result of a background grammar check
+
+    #### Returns:
+    - The job; `result` is set once its status is `succeeded`
+    """
+    job = await GrammarJobService(session).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job_response(job)
+
+
+@router.delete("/notes/check-grammar/jobs/{job_id}", response_model=GrammarJobResponse, summary="Cancel a background grammar check")
+async def cancel_grammar_job(job_id: str, session: SessionDep):
+    """
+    #### Cancel a queued or running background grammar check
+
+    #### Returns:
+    - The job. Finished jobs are returned unchanged
+    """
+    job = await GrammarJobService(session).cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    grammar_job_worker.cancel_local(job_id)
+    return job_response(job)
+
+
 @router.post("/notes/save", response_model=NoteSaveResponse, summary="Save note")
-async def save_note(note: NoteCreate, session: SessionDep):
+async def save_note(note: NoteCreate, session: SessionDep, derivatives: DerivativesDep, revisions: RevisionsDep):
     """Save note text"""
-    db_note = Note.model_validate(note)
-    session.add(db_note)
-    session.commit()
-    session.refresh(db_note)
+    db_note = await NoteService(session, derivatives, revisions).save_note(note)
+    grammar_job_worker.notify()
     return {
         "note_id": db_note.id,
         "message": "Note saved successfully"
     }
 
 
-@router.get("/notes/list")
-async def get_notes():
-    """Get all notes"""
-    return "notes"
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+# Bytes of encoded import results kept in memory before they are spooled to disk
+IMPORT_RESULTS_SPOOL_SIZE = 1024 * 1024
+
+
+@router.post("/notes/import", response_model=NoteImportResponse, response_model_exclude_none=True, summary="Bulk import notes")
+async def import_notes(
+    request: Request,
+    session: SessionDep,
+    derivatives: DerivativesDep,
+    revisions: RevisionsDep,
+    batch_size: int = Query(config.IMPORT_BATCH_SIZE, ge=1, le=10_000),
+    grammar: bool = Query(False),
+):
+    """
+    #### Import many notes in one request
+
+    The body is streamed and parsed record by record, and the results are
+    spooled to disk as batches are inserted, so neither is held in memory as a whole.
+
+    #### Supports:
+
+    - NDJSON body (`application/x-ndjson`), one note per line
+    - JSON array body (`application/json`)
+
+    #### Args:
+    - batch_size (int): Notes inserted per transaction. Default is 1000
+    - grammar (bool): Queue a background grammar check of the imported notes. Default is False
+
+    #### Returns:
+    - The new note id or the error of every record, in input order. Records larger
+      than `IMPORT_MAX_RECORD_BYTES` are reported as errors without being decoded.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        records = iter_ndjson(request.stream(), config.IMPORT_MAX_RECORD_BYTES)
+    elif content_type == "application/json":
+        records = iter_json_array(request.stream(), config.IMPORT_MAX_RECORD_BYTES)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Body must be NDJSON (application/x-ndjson) or a JSON array (application/json)",
+        )
+
+    # Bulk imports only queue grammar checks on request
+    derivatives.queue_grammar_checks = derivatives.queue_grammar_checks and grammar
+    # Encoded results roll over to disk instead of growing with the number of records
+    results = tempfile.SpooledTemporaryFile(max_size=IMPORT_RESULTS_SPOOL_SIZE)
+    imported = failed = 0
+    async for result in NoteService(session, derivatives, revisions).import_notes(records, batch_size=batch_size):
+        if "error" in result:
+            failed += 1
+        else:
+            imported += 1
+        results.write((b"," if imported + failed > 1 else b"") + orjson.dumps(result))
+    if derivatives.queue_grammar_checks:
+        grammar_job_worker.notify()
+    results.seek(0)
+
+    async def body():
+        try:
+            yield b'{"imported":%d,"failed":%d,"results":[' % (imported, failed)
+            while chunk := await asyncio.to_thread(results.read, IMPORT_RESULTS_SPOOL_SIZE):
+                yield chunk
+            yield b"]}"
+        finally:
+            results.close()
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@router.get(
+    "/notes/list",
+    response_model=NoteListResponse,
+    response_model_exclude_unset=True,
+    summary="List notes",
+)
+async def get_notes(
+    session: SessionDep,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: NoteSortField = NoteSortField.CREATED_AT,
+    order: SortOrder = SortOrder.DESC,
+    title: Optional[str] = None,
+    fields: str = "id,title,created_at",
+):
+    """
+    #### List notes page by page
+
+    #### Args:
+    - limit (int): Page size, 1-100. Default is 20
+    - cursor (str): `next_cursor` of the previous page (optional)
+    - sort (NoteSortField): `created_at` or `title`. Default is `created_at`
+    - order (SortOrder): `asc` or `desc`. Default is `desc`
+    - title (str): Only notes whose title starts with this prefix (optional)
+    - fields (str): Comma separated columns to return. Default is `id,title,created_at`
+
+    #### Returns:
+    - The page of notes and the cursor of the next page, null on the last page
+    """
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = set(selected) - set(LIST_FIELDS)
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be a subset of: {', '.join(LIST_FIELDS)}",
+        )
+
+    try:
+        notes, next_cursor = await NoteService(session).list_notes(
+            limit=limit, cursor=cursor, sort=sort, order=order, title=title, fields=selected
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return NoteListResponse(notes=notes, next_cursor=next_cursor)
+
+
+@router.get("/notes/search", response_model=NoteSearchResponse, summary="Search notes")
+async def search_notes(
+    session: SessionDep,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+):
+    """
+    #### Full-text search over note titles and content
+
+    #### Args:
+    - q (str): Search text. All terms must match; end a term with `*` for prefix matching
+    - limit (int): Page size, 1-100. Default is 20
+    - offset (int): Results to skip. Default is 0
+
+    #### Returns:
+    - Notes ranked by relevance, with HTML-escaped titles and content snippets where matches are wrapped in `<mark>`
+    """
+    if not is_sqlite:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Full-text search requires the SQLite backend",
+        )
+    results, next_offset = await NoteService(session).search_notes(q, limit=limit, offset=offset)
+    return NoteSearchResponse(results=results, next_offset=next_offset)
+
+
+@router.put("/notes/{note_id}", response_model=NoteSaveResponse)
+async def update_note(
+    note_id: int,
+    note: NoteCreate,
+    session: SessionDep,
+    derivatives: DerivativesDep,
+    revisions: RevisionsDep,
+):
+    """
+    #### Replace the title and content of a note
+
+    The previous version stays available in the note's revision history.
+
+    #### Returns:
+    - The id of the updated note
+    """
+    try:
+        db_note = await NoteService(session, derivatives, revisions, render_etags).update_note(note_id, note)
+    except ConcurrentUpdateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if db_note is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    grammar_job_worker.notify()
+    return {
+        "note_id": db_note.id,
+        "message": "Note updated successfully"
+    }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
 @router.get("/notes/{note_id}/render")
-async def render_markdown(note_id: int):
-    """HTML rendering of markdown"""
-    return {"html": "html_rendered_markdown"}
\ No newline at end of file
+async def render_markdown(
+    note_id: int,
+    request: Request,
+    session: SessionDep,
+    derivatives: DerivativesDep,
+):
+    """
+    #### HTML rendering of markdown
+
+    The HTML is rendered when the note is saved and served with a strong `ETag`.
+    A matching `If-None-Match` gets `304 Not Modified`, answered from the ETag
+    shared in Redis, or the stored content hash, without loading the note or its HTML.
+
+    #### Returns:
+    - The rendered HTML
+    """
+    render_service = NoteRenderService(NoteService(session), derivatives, render_etags)
+    if_none_match = request.headers.get("if-none-match")
+
+    etag = await render_service.current_etag(note_id)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    rendered = await render_service.render(note_id)
+    if rendered is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    html, etag = rendered
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return JSONResponse({"html": html}, headers={"ETag": etag})
+
+
+@router.get("/notes/{note_id}/summary", response_model=NoteSummaryResponse, summary="Note statistics and grammar status")
+async def note_summary(
+    note_id: int,
+    session: SessionDep,
+    derivatives: DerivativesDep,
+    text: bool = False,
+):
+    """
+    #### Counts, content hash and grammar status of a note
+
+    Computed when the note was saved; the grammar summary is filled in once
+    the background check queued on save finishes.
+
+    #### Args:
+    - text (bool): Include the plain text of the note. Default is false
+
+    #### Returns:
+    - Word and line counts, content hash, optionally the plain text, and the last grammar check summary
+    """
+    derivative = await derivatives.get(note_id)
+    if derivative is None:
+        # Saved before derivatives were stored
+        note = await NoteService(session).get_note_by_id(note_id)
+        if note is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+        derivative = await derivatives.refresh(note)
+        grammar_job_worker.notify()
+    return NoteSummaryResponse(
+        note_id=derivative.note_id,
+        content_hash=derivative.content_hash,
+        word_count=derivative.word_count,
+        line_count=derivative.line_count,
+        plain_text=derivative.plain_text if text else None,
+        grammar=NoteGrammarSummary(
+            status=derivative.grammar_status,
+            job_id=derivative.grammar_job_id,
+            has_errors=derivative.grammar_has_errors,
+            total_issues=derivative.grammar_total_issues,
+            checked_at=derivative.grammar_checked_at,
+        ),
+        updated_at=derivative.updated_at,
+    )
+
+
+@router.get("/notes/{note_id}/revisions", response_model=NoteRevisionListResponse, summary="List note revisions")
+async def list_note_revisions(
+    note_id: int,
+    session: SessionDep,
+    revisions: RevisionsDep,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[int] = Query(None, ge=1),
+):
+    """
+    #### Edit history of a note, newest first
+
+    #### Args:
+    - limit (int): Page size, 1-100. Default is 20
+    - before (int): `next_before` of the previous page (optional)
+
+    #### Returns:
+    - Number, title, sizes and content hash of each revision, without its content
+    """
+    items, next_before = await revisions.list_revisions(note_id, limit=limit, before=before)
+    if not items and before is None and await NoteService(session).get_note_by_id(note_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    return NoteRevisionListResponse(revisions=items, next_before=next_before)
+
+
+@router.get("/notes/{note_id}/revisions/{revision}", response_model=NoteRevisionResponse, summary="Get a note revision")
+async def get_note_revision(note_id: int, revision: int, revisions: RevisionsDep):
+    """
+    #### Title and content of a note as of a revision
+
+    #### Returns:
+    - The revision, rebuilt from the nearest full snapshot
+    """
+    found = await revisions.get_revision(note_id, revision)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Revision not found")
+    return NoteRevisionResponse(note_id=note_id, **found)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel
+
+
+class FileInfo(SQLModel):
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: datetime
+
+
+class FileUploadResponse(SQLModel):
+    file: FileInfo
+    # True when identical content was already stored
+    deduplicated: bool
+
+
+class FileListResponse(SQLModel):
+    files: list[FileInfo]
+    next_offset: Optional[int] = None
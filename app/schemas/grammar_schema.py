@@ -1,9 +1,54 @@
+from datetime import datetime
+from enum import Enum
 from typing import Optional
-from sqlmodel import SQLModel
+from sqlmodel import Field, SQLModel
+
+from app import config
+from app.utils.language_code import LanguageCode
 
 
 class GrammarCheckResponse(SQLModel):
     has_errors: bool
     total_issues: int
     errors: Optional[list] = []
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+    # Language the content was checked with, detected for "auto" when possible
+    language: Optional[LanguageCode] = None
+
+class GrammarBatchDocument(SQLModel):
+    content: str = Field(min_length=1)
+    lang: LanguageCode = LanguageCode.AUTO
+
+
+class GrammarBatchRequest(SQLModel):
+    documents: list[GrammarBatchDocument] = Field(min_length=1, max_length=config.GRAMMAR_BATCH_MAX_DOCUMENTS)
+
+
+class GrammarBatchResult(SQLModel):
+    index: int
+    result: Optional[GrammarCheckResponse] = None
+    error: Optional[str] = None
+
+
+class GrammarBatchResponse(SQLModel):
+    checked: int
+    failed: int
+    results: list[GrammarBatchResult]
+
+
+class GrammarJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class GrammarJobResponse(SQLModel):
+    job_id: str
+    status: GrammarJobStatus
+    progress: float
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[GrammarCheckResponse] = None
+    error: Optional[str] = None
@@ -1,5 +1,11 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
 from sqlmodel import SQLModel, Field
 
+from app.schemas.grammar_schema import GrammarJobStatus
+
 class NoteBase(SQLModel):
     title: str = Field(nullable=False, index=True)
     content: str = Field(nullable=False)
@@ -12,6 +18,93 @@ class NoteSaveResponse(SQLModel):
     note_id: int
     message: str
 
+class NoteImportResult(SQLModel):
+    index: int
+    note_id: Optional[int] = None
+    error: Optional[str] = None
+
+class NoteImportResponse(SQLModel):
+    imported: int
+    failed: int
+    results: list[NoteImportResult]
+
 class NotePublic(NoteBase):
     note_id: int
-    created_at: str
\ No newline at end of file
+    created_at: str
+
+class NoteSortField(str, Enum):
+    CREATED_AT = "created_at"
+    TITLE = "title"
+
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class NoteListItem(SQLModel):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class NoteListResponse(SQLModel):
+    notes: list[NoteListItem]
+    next_cursor: Optional[str] = None
+
+
+
+class NoteSearchResult(SQLModel):
+    id: int
+    title: str
+    snippet: str
+    rank: float
+    created_at: datetime
+
+
+class NoteSearchResponse(SQLModel):
+    results: list[NoteSearchResult]
+    next_offset: Optional[int] = None
+
+
+class NoteGrammarSummary(SQLModel):
+    status: Optional[GrammarJobStatus] = None
+    job_id: Optional[str] = None
+    has_errors: Optional[bool] = None
+    total_issues: Optional[int] = None
+    checked_at: Optional[datetime] = None
+
+
+class NoteSummaryResponse(SQLModel):
+    note_id: int
+    content_hash: str
+    word_count: int
+    line_count: int
+    plain_text: Optional[str] = None
+    grammar: NoteGrammarSummary
+    updated_at: datetime
+
+
+class NoteRevisionItem(SQLModel):
+    revision: int
+    title: str
+    is_snapshot: bool
+    stored_size: int
+    content_hash: str
+    content_size: int
+    created_at: datetime
+
+
+class NoteRevisionListResponse(SQLModel):
+    revisions: list[NoteRevisionItem]
+    next_before: Optional[int] = None
+
+
+class NoteRevisionResponse(SQLModel):
+    note_id: int
+    revision: int
+    title: str
+    content: str
+    content_hash: str
+    created_at: datetime
@@ -1,40 +1,119 @@
+import os
+from typing import AsyncIterator, Optional
+
 from fastapi import UploadFile
 
+from app.models import StoredFile
+from app.repositories.file_storage_repository import FileStorageRepository
+from app.utils.compression import COMPRESSIBLE_TYPES
+from app.utils.zip_stream import ZipEntry, stream_zip
+
 
 class FileUploadService:
+    """
+    Upload, listing, download and deletion of files stored by content hash
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, repository: FileStorageRepository, max_file_size: Optional[int] = None) -> None:
+        self.repository = repository
+        self.max_file_size = max_file_size
+
+    async def upload_file(self, file: UploadFile) -> tuple[StoredFile, bool]:
+        """
+        Store an upload, streaming it to storage chunk by chunk
+
+        Args:
+            file (UploadFile): Uploaded file
+
+        Returns:
+            tuple[StoredFile, bool]: The file and whether its content was already stored
+
+        Raises:
+            FileTooLargeError: If the file exceeds the size limit
+        """
+        await file.seek(0)
+        first_chunk = await file.read(self.CHUNK_SIZE)
+        # The MIME type is sniffed from the content, the declared one can't be trusted
+        import magic
+
+        content_type = magic.from_buffer(first_chunk[:2048], mime=True) if first_chunk else "application/octet-stream"
+
+        async def chunks() -> AsyncIterator[bytes]:
+            chunk = first_chunk
+            while chunk:
+                yield chunk
+                chunk = await file.read(self.CHUNK_SIZE)
+
+        filename = os.path.basename(file.filename or "") or "upload"
+        return await self.repository.upload(chunks(), filename, content_type, self.max_file_size)
+
+    async def get_file_info(self, file_id: str) -> Optional[StoredFile]:
+        return await self.repository.get(file_id)
+
+    async def get_files_info(self, limit: int, offset: int = 0) -> list[StoredFile]:
+        return await self.repository.list_files(limit, offset)
 
-    @staticmethod
-    def upload_file(file: UploadFile) -> dict:
-        pass
+    async def get_file(self, file_id: str) -> Optional[tuple[StoredFile, str]]:
+        """
+        Find a file to download
 
-    @staticmethod
-    def delete_file(file_name: str) -> dict:
-        pass
+        Returns:
+            Optional[tuple[StoredFile, str]]: The file and the local path of its content, None if not found
+        """
+        stored_file = await self.repository.get(file_id)
+        if stored_file is None:
+            return None
+        return stored_file, self.repository.path(stored_file)
 
-    @staticmethod
-    def get_file(file_name: str) -> dict:
-        pass
+    async def get_files(self, file_ids: list[str]) -> tuple[list[StoredFile], list[str]]:
+        """
+        Find files to download together
 
-    @staticmethod
-    def get_files() -> dict:
-        pass
+        Returns:
+            tuple[list[StoredFile], list[str]]: The files found, in request order, and the unknown ids
+        """
+        found = await self.repository.get_many(file_ids)
+        files = [stored_file for stored_file in found if stored_file is not None]
+        missing = [file_id for file_id, stored_file in zip(file_ids, found) if stored_file is None]
+        return files, missing
 
-    @staticmethod
-    def download_file(file_name: str) -> dict:
-        pass
+    def download_files(self, files: list[StoredFile]) -> AsyncIterator[bytes]:
+        """
+        Stream files as a zip archive without buffering it. Duplicate names get
+        a numbered suffix, already compressed content is stored as is.
 
-    @staticmethod
-    def download_files() -> dict:
-        pass
+        Args:
+            files (list[StoredFile]): Files to archive
 
-    @staticmethod
-    def get_file_info(file_name: str) -> dict:
-        pass
+        Returns:
+            AsyncIterator[bytes]: The archive, part by part
+        """
+        names: set[str] = set()
+        entries = []
+        for stored_file in files:
+            name = stored_file.filename
+            stem, extension = os.path.splitext(name)
+            copy = 0
+            while name in names:
+                copy += 1
+                name = f"{stem} ({copy}){extension}"
+            names.add(name)
+            entries.append(ZipEntry(
+                name=name,
+                path=self.repository.path(stored_file),
+                size=stored_file.size,
+                modified=stored_file.created_at,
+                compress=stored_file.content_type.startswith(COMPRESSIBLE_TYPES),
+            ))
+        return stream_zip(entries, self.CHUNK_SIZE)
 
-    @staticmethod
-    def get_files_info() -> dict:
-        pass
+    async def delete_file(self, file_id: str) -> bool:
+        """
+        Delete a file
 
-    @staticmethod
-    def process_file(file: UploadFile) -> str:
-        pass
\ No newline at end of file
+        Returns:
+            bool: False if the file doesn't exist
+        """
+        return await self.repository.delete(file_id)
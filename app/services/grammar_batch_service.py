@@ -0,0 +1,89 @@
+import asyncio
+from typing import AsyncIterator, Union
+
+from app.services.incremental_grammar_service import IncrementalGrammarService
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.utils.bounded_executor import ExecutorSaturatedError
+from app.utils.generate_cache_key import generate_cache_key
+from app.utils.language_code import LanguageCode
+from app.utils.single_flight import SingleFlight
+from app.utils.tiered_cache import TieredCache
+
+
+# Encoded grammar check response, or an error message
+BatchResult = Union[bytes, str]
+
+
+class GrammarBatchService:
+    """
+    Grammar checking of many documents at once.
+
+    Identical documents are checked once, cached results are read with a
+    single multi-get, and the remaining documents are checked concurrently,
+    at most ``concurrency`` at a time so one batch cannot fill the executor
+    queue by itself.
+    """
+
+    def __init__(
+        self,
+        grammar_service: IncrementalGrammarService,
+        cache: TieredCache,
+        single_flight: SingleFlight,
+        concurrency: int = 4,
+    ) -> None:
+        self.grammar_service = grammar_service
+        self.cache = cache
+        self.single_flight = single_flight
+        self.concurrency = concurrency
+
+    async def _check(self, key: str, content: str, lang: LanguageCode, semaphore: asyncio.Semaphore) -> BatchResult:
+        try:
+            async with semaphore:
+                return await self.single_flight.run(
+                    key,
+                    lambda: self.grammar_service.check_grammar_encoded(content, lang, key),
+                    lambda: self.cache.get(key, decode=False),
+                )
+        except (ExecutorSaturatedError, GrammarCheckerUnavailableError):
+            return "Grammar checker is busy, please retry later"
+        except Exception as e:
+            return f"An unexpected error occurred: {e}"
+
+    async def check_documents(self, documents: list[tuple[str, LanguageCode]]) -> AsyncIterator[tuple[int, BatchResult]]:
+        """
+        Check documents, yielding each result as soon as it is available
+
+        Args:
+            documents (list[tuple[str, LanguageCode]]): Content and language of each document
+
+        Yields:
+            tuple[int, BatchResult]: Document index and its encoded grammar check result, or an error message.
+            Cached results come first, the others in completion order.
+        """
+        indices: dict[str, list[int]] = {}
+        for index, (content, lang) in enumerate(documents):
+            indices.setdefault(generate_cache_key(content, "text", lang.value), []).append(index)
+
+        keys = list(indices)
+        cached = await self.cache.get_many(keys, decode=False)
+        for key, result in zip(keys, cached):
+            if result is not None:
+                for index in indices[key]:
+                    yield index, result
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(key: str) -> tuple[str, BatchResult]:
+            content, lang = documents[indices[key][0]]
+            return key, await self._check(key, content, lang, semaphore)
+
+        tasks = [asyncio.create_task(check(key)) for key, result in zip(keys, cached) if result is None]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                key, result = await completed
+                for index in indices[key]:
+                    yield index, result
+        finally:
+            # The client went away before the batch finished
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,399 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+import orjson
+from sqlalchemy import and_, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import create_session
+from app.models import GrammarJob, Note, NoteDerivative
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.schemas.grammar_schema import GrammarJobResponse, GrammarJobStatus
+from app.services.incremental_grammar_service import IncrementalGrammarService
+from app.utils.bounded_executor import ExecutorSaturatedError
+from app.utils.callback_url import UnsafeCallbackURLError, check_callback_url
+from app.utils.language_code import LanguageCode
+from app.utils.single_flight import SingleFlight
+from app.utils.tiered_cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (GrammarJobStatus.SUCCEEDED, GrammarJobStatus.FAILED, GrammarJobStatus.CANCELLED)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_response(job: GrammarJob) -> GrammarJobResponse:
+    return GrammarJobResponse(
+        job_id=job.id,
+        status=job.status,
+        progress=job.progress,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error,
+    )
+
+
+class GrammarJobService:
+    """Submission, status and cancellation of background grammar checks"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def submit(
+        self,
+        content: str,
+        lang: LanguageCode,
+        cache_key: str,
+        callback_url: Optional[str] = None,
+        cached_result: Optional[bytes] = None,
+    ) -> GrammarJob:
+        """
+        Queue a grammar check
+
+        Args:
+            content (str): Markdown content
+            lang (LanguageCode): Language for grammar check
+            cache_key (str): Key the result is cached under
+            callback_url (Optional[str]): URL notified with the job once it finishes
+            cached_result (Optional[bytes]): Encoded result already in the cache; the job is created finished
+
+        Returns:
+            GrammarJob: The new job
+        """
+        job = GrammarJob(
+            id=uuid.uuid4().hex,
+            lang=lang,
+            cache_key=cache_key,
+            content=content,
+            callback_url=callback_url,
+        )
+        if cached_result is not None:
+            job.status = GrammarJobStatus.SUCCEEDED
+            job.result = orjson.loads(cached_result)
+            job.content = ""
+            job.progress = 1.0
+            job.finished_at = _now()
+        self.session.add(job)
+        await self.session.commit()
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[GrammarJob]:
+        return await self.session.get(GrammarJob, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[GrammarJob]:
+        """
+        Cancel a queued or running job. A running job stops at the worker's next heartbeat.
+
+        Returns:
+            Optional[GrammarJob]: The job, None if it doesn't exist
+        """
+        connection = await self.session.connection()
+        await connection.execute(
+            update(GrammarJob)
+            .where(GrammarJob.id == job_id, GrammarJob.status.not_in(FINISHED_STATUSES))
+            .values(status=GrammarJobStatus.CANCELLED, content="", claimed_by=None, finished_at=_now())
+        )
+        await self.session.commit()
+        job = await self.session.get(GrammarJob, job_id)
+        if job is not None:
+            await self.session.refresh(job)
+        return job
+
+
+class GrammarJobWorker:
+    """
+    Runs queued grammar checks on a fixed number of asyncio workers.
+
+    Workers claim jobs from the database with a lease they renew while the
+    job runs, so several processes can share the queue and a job held by a
+    crashed process is picked up again once its lease expires. The lease
+    renewal also notices cancellation requested from any process.
+    """
+
+    def __init__(
+        self,
+        grammar_service: IncrementalGrammarService,
+        cache: TieredCache,
+        single_flight: SingleFlight,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        lease_timeout: float = 60.0,
+        max_attempts: int = 3,
+        callback_timeout: float = 10.0,
+        callback_hosts: Optional[list[str]] = None,
+        on_finished: Optional[Callable[[GrammarJob], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Initialize the worker pool
+
+        Args:
+            grammar_service (IncrementalGrammarService): Runs the checks.
+            cache (TieredCache): Cache shared with the grammar check endpoint.
+            single_flight (SingleFlight): Coalesces a job with identical in-flight checks.
+            workers (int): Jobs run concurrently.
+            poll_interval (float): Seconds between queue polls while idle.
+            lease_timeout (float): Seconds a claimed job stays reserved without a heartbeat.
+            max_attempts (int): Claims after which a job that keeps dying is failed.
+                Jobs handed back because the checker was busy or the worker stopped don't count.
+            callback_timeout (float): Timeout of completion callbacks in seconds.
+            callback_hosts (Optional[list[str]]): Hosts callbacks may be sent to, None for any public host.
+            on_finished (Optional[Callable]): Awaited with each job that succeeded or failed.
+        """
+        self.grammar_service = grammar_service
+        self.cache = cache
+        self.single_flight = single_flight
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.callback_timeout = callback_timeout
+        self.callback_hosts = callback_hosts or []
+        self.on_finished = on_finished
+        self.token = uuid.uuid4().hex
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.requeued = 0
+
+    def start(self) -> None:
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers, handing running jobs back to the queue"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake an idle worker after a job was queued"""
+        self._wakeup.set()
+
+    def cancel_local(self, job_id: str) -> None:
+        """Stop a cancelled job right away if it runs in this process"""
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Grammar job claim failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> Optional[GrammarJob]:
+        now = _now()
+        claimable = or_(
+            GrammarJob.status == GrammarJobStatus.QUEUED,
+            and_(GrammarJob.status == GrammarJobStatus.RUNNING, GrammarJob.lease_expires_at < now),
+        )
+        candidate = (
+            select(GrammarJob.id).where(claimable).order_by(GrammarJob.created_at).limit(1).scalar_subquery()
+        )
+        async with create_session() as session:
+            connection = await session.connection()
+            # The claim condition is repeated so concurrent claims of the same row can't both succeed
+            job_id = (await connection.execute(
+                update(GrammarJob)
+                .where(GrammarJob.id == candidate, claimable)
+                .values(
+                    status=GrammarJobStatus.RUNNING,
+                    claimed_by=self.token,
+                    lease_expires_at=now + timedelta(seconds=self.lease_timeout),
+                    attempts=GrammarJob.attempts + 1,
+                )
+                .returning(GrammarJob.id)
+            )).scalar()
+            await session.commit()
+            if job_id is None:
+                return None
+            return await session.get(GrammarJob, job_id)
+
+    async def _update(self, job: GrammarJob, **values) -> bool:
+        # Only applies while this worker still holds the job
+        async with create_session() as session:
+            connection = await session.connection()
+            result = await connection.execute(
+                update(GrammarJob)
+                .where(
+                    GrammarJob.id == job.id,
+                    GrammarJob.claimed_by == self.token,
+                    GrammarJob.status == GrammarJobStatus.RUNNING,
+                )
+                .values(**values)
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    async def _heartbeat(self, job: GrammarJob, task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            try:
+                held = await self._update(job, lease_expires_at=_now() + timedelta(seconds=self.lease_timeout))
+            except Exception as e:
+                logger.warning("Grammar job heartbeat failed: %s", e)
+                continue
+            if not held:
+                # Cancelled, or the lease was lost to another worker
+                task.cancel()
+                return
+
+    async def _content(self, job: GrammarJob) -> Optional[str]:
+        # Note checks read any note still holding the content the job was queued for,
+        # None once all of them changed or were deleted
+        if job.note_id is None:
+            return job.content
+        async with create_session() as session:
+            return (await session.exec(
+                select(Note.content)
+                .join(NoteDerivative, NoteDerivative.note_id == Note.id)
+                .where(NoteDerivative.grammar_job_id == job.id, NoteDerivative.content_hash == job.content_hash)
+                .limit(1)
+            )).first()
+
+    async def _check(self, job: GrammarJob, content: str) -> dict:
+        async def report(checked: int, total: int):
+            await self._update(job, progress=round(checked / total, 3) if total else 1.0)
+
+        body = await self.single_flight.run(
+            job.cache_key,
+            lambda: self.grammar_service.check_grammar_encoded(content, job.lang, job.cache_key, progress=report),
+            lambda: self.cache.get(job.cache_key, decode=False),
+        )
+        return orjson.loads(body)
+
+    async def _run(self, job: GrammarJob) -> None:
+        if job.attempts > self.max_attempts:
+            await self._finish(job, GrammarJobStatus.FAILED, error="Job failed repeatedly")
+            return
+        content = await self._content(job)
+        if content is None:
+            # A later edit queued a check of its own content
+            await self._finish(job, GrammarJobStatus.CANCELLED, error="The note changed before the check ran")
+            return
+
+        task = asyncio.create_task(self._check(job, content))
+        self._running[job.id] = task
+        heartbeat = asyncio.create_task(self._heartbeat(job, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if self._stopping:
+                await asyncio.shield(self._requeue(job))
+                raise
+            # Cancelled through the API; the job row is already final
+            self.cancelled += 1
+        except (ExecutorSaturatedError, GrammarCheckerUnavailableError) as e:
+            await self._requeue(job)
+            await asyncio.sleep(getattr(e, "retry_after", 1))
+        except Exception as e:
+            logger.exception("Grammar job %s failed", job.id)
+            await self._finish(job, GrammarJobStatus.FAILED, error=f"An unexpected error occurred: {e}")
+        else:
+            await self._finish(job, GrammarJobStatus.SUCCEEDED, result=result)
+        finally:
+            task.cancel()
+            heartbeat.cancel()
+            self._running.pop(job.id, None)
+
+    async def _requeue(self, job: GrammarJob) -> None:
+        # The job didn't fail: give back the attempt its claim counted
+        if await self._update(
+            job,
+            status=GrammarJobStatus.QUEUED,
+            claimed_by=None,
+            lease_expires_at=None,
+            attempts=GrammarJob.attempts - 1,
+        ):
+            self.requeued += 1
+
+    async def _finish(
+        self,
+        job: GrammarJob,
+        status: GrammarJobStatus,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        finished_at = _now()
+        finished = await self._update(
+            job,
+            status=status,
+            result=result,
+            error=error,
+            progress=1.0 if status == GrammarJobStatus.SUCCEEDED else job.progress,
+            content="",
+            finished_at=finished_at,
+        )
+        if not finished:
+            # Cancelled while the last step ran
+            self.cancelled += 1
+            return
+        if status == GrammarJobStatus.SUCCEEDED:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+        job.status, job.result, job.error, job.finished_at = status, result, error, finished_at
+        job.progress = 1.0 if status == GrammarJobStatus.SUCCEEDED else job.progress
+        if self.on_finished is not None:
+            try:
+                await self.on_finished(job)
+            except Exception:
+                logger.exception("Grammar job %s completion hook failed", job.id)
+        if job.callback_url:
+            await self._send_callback(job)
+
+    async def _send_callback(self, job: GrammarJob) -> None:
+        # Only needed once a job with a callback finishes
+        import httpx
+
+        try:
+            # Checked again at send time: the host may resolve elsewhere than at submission
+            await check_callback_url(job.callback_url, self.callback_hosts)
+        except UnsafeCallbackURLError as e:
+            logger.warning("Grammar job callback to %s skipped: %s", job.callback_url, e)
+            return
+        try:
+            # A redirect could lead to a host the check above would reject
+            async with httpx.AsyncClient(timeout=self.callback_timeout, follow_redirects=False) as client:
+                response = await client.post(job.callback_url, content=job_response(job).model_dump_json(),
+                                             headers={"Content-Type": "application/json"})
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Grammar job callback to %s failed: %s", job.callback_url, e)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "requeued": self.requeued,
+        }
@@ -1,51 +1,164 @@
-import language_tool_python
+from bisect import bisect_right
+from typing import Callable, Optional
+
+import orjson
 
 from app.utils.language_code import LanguageCode
+from app.utils.line_index import LineIndex
+from app.utils.markdown_prose import ProseBlock, extract_prose_blocks
 from app.schemas.grammar_schema import GrammarCheckResponse
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.services.language_tool_pool import LanguageToolPool
+
+
+# Blocks are sent to LanguageTool in batches of roughly this many characters
+MAX_BATCH_CHARS = 20_000
+BLOCK_SEPARATOR = "\n\n"
+
+
+def get_surrounding_context(
+    text: str,
+    line: int,
+    lines_before: int = 2,
+    lines_after: int = 2,
+    line_index: Optional[LineIndex] = None,
+) -> str:
+    """Get surrounding lines for context. Pass a shared ``line_index`` when called per match."""
+    line_index = line_index or LineIndex(text)
+    return line_index.lines(line - lines_before, line + lines_after)
+
+
+def build_grammar_response(
+    md_file: str,
+    blocks: list[ProseBlock],
+    block_matches: list[list[dict]],
+    lang: Optional[LanguageCode] = None,
+) -> GrammarCheckResponse:
+    """
+    Merge per-block matches into a single response with document line/column positions
+
+    Args:
+        md_file (str): Full markdown content
+        blocks (list[ProseBlock]): Prose blocks of ``md_file``
+        block_matches (list[list[dict]]): Matches for each block, offsets relative to the block prose
+        lang (Optional[LanguageCode]): Language the blocks were checked with
+
+    Returns:
+        GrammarCheckResponse: Grammar check results
+    """
+    errors = []
+    line_index = LineIndex(md_file)
+    for block, matches in zip(blocks, block_matches):
+        for match in matches:
+            line_number, column_number = line_index.position(block.to_source(match["offset"]))
+            errors.append({
+                "line": line_number,
+                "column": column_number,
+                "message": match["message"],
+                "suggestion": match["suggestion"],
+                "context": match["context"],
+            })
+
+    return GrammarCheckResponse(
+        has_errors=bool(errors),
+        total_issues=len(errors),
+        errors=errors,
+        message="Grammar check completed" if not errors else None,
+        language=lang,
+    )
+
+
+def encode_grammar_response(response: GrammarCheckResponse) -> bytes:
+    """
+    Encode a grammar check response as the JSON body served to clients
+
+    Returns:
+        bytes: Response body, stored in the cache as is
+    """
+    return orjson.dumps(response.model_dump())
+
+
+def check_blocks_batched(blocks: list[str], check: Callable[[str], list[dict]]) -> list[list[dict]]:
+    """
+    Check independent blocks with as few checker calls as possible, joining
+    them into batches of about ``MAX_BATCH_CHARS`` characters
+
+    Args:
+        blocks (list[str]): Block texts
+        check (Callable): Checks one text, returning matches with offsets into that text
+
+    Returns:
+        list[list[dict]]: Matches for each block, offsets relative to the block
+    """
+    results: list[list[dict]] = [[] for _ in blocks]
+    batch: list[int] = []
+    batch_chars = 0
+    for index, block in enumerate(blocks):
+        batch.append(index)
+        batch_chars += len(block) + len(BLOCK_SEPARATOR)
+        if batch_chars >= MAX_BATCH_CHARS:
+            _check_batch(check, blocks, batch, results)
+            batch, batch_chars = [], 0
+    if batch:
+        _check_batch(check, blocks, batch, results)
+    return results
+
 
+def _check_batch(check: Callable[[str], list[dict]], blocks: list[str], batch: list[int], results: list[list[dict]]) -> None:
+    starts = []
+    position = 0
+    for index in batch:
+        starts.append(position)
+        position += len(blocks[index]) + len(BLOCK_SEPARATOR)
 
-def get_surrounding_context(text: str, line: int, lines_before: int = 2, lines_after: int = 2) -> str:
-    """Get surrounding lines for context."""
-    lines = text.split("\n")
-    start = max(0, line - lines_before - 1)
-    end = min(len(lines), line + lines_after)
-    return "\n".join(lines[start:end])
+    for match in check(BLOCK_SEPARATOR.join(blocks[index] for index in batch)):
+        slot = bisect_right(starts, match["offset"]) - 1
+        results[batch[slot]].append({**match, "offset": match["offset"] - starts[slot]})
 
 
 class NoteGrammarService:
-    @staticmethod
-    def check_grammar(md_file: str, lang: LanguageCode = LanguageCode.AUTO) -> GrammarCheckResponse:
+    def __init__(self, pool: LanguageToolPool) -> None:
+        self.pool = pool
+
+    def check_blocks(self, blocks: list[str], lang: LanguageCode = LanguageCode.AUTO) -> list[list[dict]]:
         """
-        Perform grammar checking on content
-        
+        Check independent markdown blocks, batching them into as few
+        LanguageTool calls as possible
+
         Args:
-            content (str): Text to check
+            blocks (list[str]): Block texts
             lang (LanguageCode): Language for grammar check
-        
+
         Returns:
-            GrammarCheckResponse: Grammar check results
+            list[list[dict]]: Matches for each block, offsets relative to the block
         """
         try:
-            with language_tool_python.LanguageTool(lang, config={"cacheSize": 1000, "pipelineCaching": True}) as tool:
-                matches = tool.check(md_file)
-                errors = []
-                for match in matches:
-                    line_number = md_file[:match.offset].count("\n") + 1
-                    column_number = match.offset - md_file.rfind("\n", 0, match.offset)
-                    # context_snippet = get_surrounding_context(md_file, line_number)
-                    errors.append({
-                        "line": line_number,
-                        "column": column_number,
+            with self.pool.acquire(lang) as tool:
+                return check_blocks_batched(blocks, lambda text: [
+                    {
+                        "offset": match.offset,
                         "message": match.message,
                         "suggestion": match.replacements[0] if match.replacements else None,
                         "context": match.context,
-                    })
+                    }
+                    for match in tool.check(text)
+                ])
+        except GrammarCheckerUnavailableError:
+            raise
         except Exception as e:
-            raise RuntimeError(f"LanguageTool initialization failed: {str(e)}")
-        
-        return GrammarCheckResponse(
-            has_errors=bool(errors),
-            total_issues=len(errors),
-            errors=errors,
-            message="Grammar check completed" if not errors else None
-        )
\ No newline at end of file
+            raise RuntimeError(f"LanguageTool check failed: {str(e)}")
+
+    def check_grammar(self, md_file: str, lang: LanguageCode = LanguageCode.AUTO) -> GrammarCheckResponse:
+        """
+        Perform grammar checking on content
+
+        Args:
+            content (str): Text to check
+            lang (LanguageCode): Language for grammar check
+
+        Returns:
+            GrammarCheckResponse: Grammar check results
+        """
+        blocks = extract_prose_blocks(md_file)
+        block_matches = self.check_blocks([block.text for block in blocks], lang)
+        return build_grammar_response(md_file, blocks, block_matches, lang)
@@ -0,0 +1,163 @@
+from typing import Awaitable, Callable, Optional
+
+from app.interfaces.grammar_checker import GrammarChecker
+from app.schemas.grammar_schema import GrammarCheckResponse
+from app.services.grammar_service import MAX_BATCH_CHARS, build_grammar_response, encode_grammar_response
+from app.utils.bounded_executor import BoundedExecutor
+from app.utils.generate_cache_key import generate_block_cache_key, generate_language_cache_key
+from app.utils.language_code import LanguageCode
+from app.utils.language_detector import LanguageDetector
+from app.utils.markdown_prose import ProseBlock, extract_prose_blocks
+from app.utils.tiered_cache import TieredCache
+from app.utils.tracing import span
+
+
+class IncrementalGrammarService:
+    """
+    Grammar checking at markdown block granularity.
+
+    Matches are cached per block, so re-checking an edited note only sends
+    the changed blocks to the grammar checker. With a language detector,
+    ``auto`` checks go to the checkers of the detected language, sharing
+    their warm instances and block cache entries with explicit requests.
+    """
+
+    def __init__(
+        self,
+        grammar_checker: GrammarChecker,
+        cache: TieredCache,
+        executor: BoundedExecutor,
+        language_detector: Optional[LanguageDetector] = None,
+    ) -> None:
+        self.grammar_checker = grammar_checker
+        self.cache = cache
+        self.executor = executor
+        self.language_detector = language_detector
+
+    async def resolve_language(self, md_file: str, blocks: list[ProseBlock], lang: LanguageCode) -> LanguageCode:
+        """
+        Language to check content with: ``lang``, or for ``auto`` the detected
+        language of the first prose blocks, cached by content hash
+
+        Args:
+            md_file (str): Markdown content
+            blocks (list[ProseBlock]): Prose blocks of ``md_file``
+            lang (LanguageCode): Requested language
+
+        Returns:
+            LanguageCode: A concrete language, or AUTO if it couldn't be detected
+        """
+        if lang != LanguageCode.AUTO or self.language_detector is None or not blocks:
+            return lang
+        key = generate_language_cache_key(md_file)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return LanguageCode(cached)
+
+        sample, size = [], 0
+        for block in blocks:
+            sample.append(block.text)
+            size += len(block.text) + 1
+            if size >= self.language_detector.sample_chars:
+                break
+        detected = self.language_detector.detect(" ".join(sample))
+        await self.cache.set(key, detected.value)
+        return detected
+
+    async def check_grammar(
+        self,
+        md_file: str,
+        lang: LanguageCode = LanguageCode.AUTO,
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> GrammarCheckResponse:
+        """
+        Check content, reusing cached results for unchanged blocks
+
+        Args:
+            md_file (str): Markdown content
+            lang (LanguageCode): Language for grammar check, detected when AUTO
+            progress (Optional[Callable]): Called with ``(checked, total)`` block counts.
+                When given, blocks are checked and cached in chunks so progress can be reported.
+
+        Returns:
+            GrammarCheckResponse: Grammar check results
+        """
+        # Code, URLs, HTML and front matter never reach the grammar checker
+        with span("prose_extraction"):
+            blocks = extract_prose_blocks(md_file)
+        with span("language_detection"):
+            lang = await self.resolve_language(md_file, blocks, lang)
+        keys = [generate_block_cache_key(block.text, lang.value) for block in blocks]
+        with span("block_cache"):
+            block_matches = await self.cache.get_many(keys)
+
+        # Identical blocks share a key, check each distinct one once
+        missing: dict[str, str] = {}
+        for block, key, matches in zip(blocks, keys, block_matches):
+            if matches is None:
+                missing.setdefault(key, block.text)
+
+        if missing:
+            chunks = self._chunk(list(missing.items())) if progress else [list(missing.items())]
+            fresh = {}
+            if progress:
+                await progress(0, len(missing))
+            for chunk in chunks:
+                with span("languagetool"):
+                    checked = await self.executor.run(
+                        self.grammar_checker.check_blocks, [text for _, text in chunk], lang
+                    )
+                checked = dict(zip((key for key, _ in chunk), checked))
+                with span("block_cache"):
+                    await self.cache.set_many(checked)
+                fresh.update(checked)
+                if progress:
+                    await progress(len(fresh), len(missing))
+            block_matches = [
+                matches if matches is not None else fresh[key]
+                for key, matches in zip(keys, block_matches)
+            ]
+
+        with span("build_response"):
+            return build_grammar_response(md_file, blocks, block_matches, lang)
+
+    async def check_grammar_encoded(
+        self,
+        md_file: str,
+        lang: LanguageCode,
+        cache_key: str,
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> bytes:
+        """
+        Check content and cache the encoded response under ``cache_key``,
+        so cache hits can be served without decoding
+
+        Args:
+            md_file (str): Markdown content
+            lang (LanguageCode): Language for grammar check
+            cache_key (str): Cache key of the whole document result
+            progress (Optional[Callable]): See ``check_grammar``
+
+        Returns:
+            bytes: JSON response body
+        """
+        grammar_result = await self.check_grammar(md_file, lang, progress)
+        with span("serialize_result"):
+            body = encode_grammar_response(grammar_result)
+        with span("cache"):
+            await self.cache.set(cache_key, body)
+        return body
+
+    @staticmethod
+    def _chunk(blocks: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+        # Chunks the size of one checker request
+        chunks, chunk, size = [], [], 0
+        for key, text in blocks:
+            if chunk and size + len(text) > MAX_BATCH_CHARS:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append((key, text))
+            size += len(text)
+        if chunk:
+            chunks.append(chunk)
+        return chunks
@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.utils.language_code import LanguageCode
+
+if TYPE_CHECKING:
+    import language_tool_python
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_TOOL_CONFIG = {"cacheSize": 1000, "pipelineCaching": True}
+
+
+class PoolExhaustedError(GrammarCheckerUnavailableError):
+    """Raised when no checker becomes available within the acquire timeout"""
+
+
+class _PooledTool:
+    def __init__(self, tool: "language_tool_python.LanguageTool") -> None:
+        self.tool = tool
+        self.last_used = time.monotonic()
+
+
+class _LanguagePool:
+    """
+    Idle/busy bookkeeping for the checkers of a single language
+    """
+
+    def __init__(self, lang: LanguageCode, min_size: int, max_size: int) -> None:
+        self.lang = lang
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle: list[_PooledTool] = []
+        self.size = 0
+        self.condition = threading.Condition()
+
+
+class LanguageToolPool:
+    """
+    Pool of long-lived LanguageTool instances keyed by language.
+
+    Starting a LanguageTool instance spawns a Java backend, which takes
+    seconds. The pool keeps instances alive between requests, creates new
+    ones on demand up to ``max_size`` per language and replaces instances
+    that fail a health check or crash while in use.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 2,
+        sizes: Optional[dict[LanguageCode, tuple[int, int]]] = None,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+    ) -> None:
+        """
+        Initialize the pool
+
+        Args:
+            min_size (int): Instances kept warm per language.
+            max_size (int): Maximum concurrent instances per language.
+            sizes (dict): Per-language ``(min_size, max_size)`` overrides.
+            acquire_timeout (float): Seconds to wait for a free instance.
+            health_check_interval (float): Idle seconds after which an instance is checked before reuse.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.sizes = sizes or {}
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self._pools: dict[LanguageCode, _LanguagePool] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _get_pool(self, lang: LanguageCode) -> _LanguagePool:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LanguageTool pool is closed")
+            pool = self._pools.get(lang)
+            if pool is None:
+                min_size, max_size = self.sizes.get(lang, (self.min_size, self.max_size))
+                max_size = max(max_size, 1)
+                # Warming up never starts more instances than the pool may hold
+                pool = _LanguagePool(lang, min(min_size, max_size), max_size)
+                self._pools[lang] = pool
+            return pool
+
+    @staticmethod
+    def _create_tool(lang: LanguageCode) -> _PooledTool:
+        # Imported on first use, it takes longer to import than the rest of the app
+        import language_tool_python
+
+        tool = language_tool_python.LanguageTool(lang.value, config=LANGUAGE_TOOL_CONFIG)
+        return _PooledTool(tool)
+
+    @staticmethod
+    def _close_tool(pooled: _PooledTool) -> None:
+        try:
+            pooled.tool.close()
+        except Exception as e:
+            logger.warning("LanguageTool shutdown error: %s", e)
+
+    @staticmethod
+    def _is_healthy(pooled: _PooledTool) -> bool:
+        try:
+            pooled.tool.check("Health check.")
+            return True
+        except Exception:
+            return False
+
+    def warm_up(self, languages: Optional[list[LanguageCode]] = None) -> None:
+        """
+        Start ``min_size`` instances for each language
+
+        Args:
+            languages (list[LanguageCode]): Languages to warm. Defaults to all configured overrides.
+        """
+        for lang in languages if languages is not None else list(self.sizes):
+            pool = self._get_pool(lang)
+            while True:
+                with pool.condition:
+                    if pool.size >= pool.min_size:
+                        break
+                    pool.size += 1
+                try:
+                    pooled = self._create_tool(lang)
+                except BaseException:
+                    with pool.condition:
+                        pool.size -= 1
+                        pool.condition.notify()
+                    raise
+                with pool.condition:
+                    pool.idle.append(pooled)
+                    pool.condition.notify()
+
+    def _checkout(self, pool: _LanguagePool) -> _PooledTool:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with pool.condition:
+                while not pool.idle and pool.size >= pool.max_size:
+                    if self._closed:
+                        raise RuntimeError("LanguageTool pool is closed")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"No LanguageTool instance available for '{pool.lang.value}'"
+                        )
+                    pool.condition.wait(remaining)
+                if pool.idle:
+                    pooled = pool.idle.pop()
+                else:
+                    pooled = None
+                    pool.size += 1
+
+            if pooled is None:
+                try:
+                    return self._create_tool(pool.lang)
+                except BaseException:
+                    self._discard(pool, None)
+                    raise
+
+            idle_for = time.monotonic() - pooled.last_used
+            if idle_for < self.health_check_interval or self._is_healthy(pooled):
+                return pooled
+            # Recycle the stale instance and try again
+            self._discard(pool, pooled)
+
+    def _checkin(self, pool: _LanguagePool, pooled: _PooledTool) -> None:
+        pooled.last_used = time.monotonic()
+        with pool.condition:
+            if self._closed:
+                pool.size -= 1
+                close = True
+            else:
+                pool.idle.append(pooled)
+                close = False
+            pool.condition.notify()
+        if close:
+            self._close_tool(pooled)
+
+    def _discard(self, pool: _LanguagePool, pooled: Optional[_PooledTool]) -> None:
+        with pool.condition:
+            pool.size -= 1
+            pool.condition.notify()
+        if pooled is not None:
+            self._close_tool(pooled)
+
+    @contextmanager
+    def acquire(self, lang: LanguageCode) -> Iterator["language_tool_python.LanguageTool"]:
+        """
+        Borrow a checker for ``lang``. Instances that raise while in use, or
+        whose user is interrupted, are considered crashed and are replaced
+        rather than returned to the pool, so their slot is never lost.
+
+        Args:
+            lang (LanguageCode): Language of the checker
+
+        Yields:
+            LanguageTool: A running LanguageTool instance
+
+        Raises:
+            PoolExhaustedError: If no instance is free within the acquire timeout
+        """
+        pool = self._get_pool(lang)
+        pooled = self._checkout(pool)
+        try:
+            yield pooled.tool
+        except BaseException:
+            self._discard(pool, pooled)
+            raise
+        else:
+            self._checkin(pool, pooled)
+
+    def stats(self) -> dict:
+        """
+        Current pool sizes per language
+
+        Returns:
+            dict: ``{lang: {"size": int, "idle": int, "max_size": int}}``
+        """
+        with self._lock:
+            pools = list(self._pools.values())
+        return {
+            pool.lang.value: {"size": pool.size, "idle": len(pool.idle), "max_size": pool.max_size}
+            for pool in pools
+        }
+
+    def close(self) -> None:
+        """
+        Shut down idle instances. Instances still in use are closed when returned.
+        """
+        with self._lock:
+            self._closed = True
+            pools = list(self._pools.values())
+        for pool in pools:
+            with pool.condition:
+                idle, pool.idle = pool.idle, []
+                pool.size -= len(idle)
+                pool.condition.notify_all()
+            for pooled in idle:
+                self._close_tool(pooled)
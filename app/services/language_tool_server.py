@@ -0,0 +1,334 @@
+import asyncio
+import fcntl
+import logging
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import IO, Optional
+
+import httpx
+
+from app.interfaces.grammar_checker import GrammarCheckerUnavailableError
+from app.schemas.grammar_schema import GrammarCheckResponse
+from app.services.grammar_service import build_grammar_response, check_blocks_batched
+from app.services.language_tool_pool import LANGUAGE_TOOL_CONFIG
+from app.utils.language_code import LanguageCode
+from app.utils.markdown_prose import extract_prose_blocks
+from app.utils.timing_stats import TimingStats
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class LanguageToolServerError(GrammarCheckerUnavailableError):
+    """The LanguageTool server could not be reached or kept failing"""
+
+
+class LanguageToolClient:
+    """
+    Thread-safe client of a LanguageTool HTTP server with a keep-alive
+    connection pool, timeouts and retries with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        url: str = "http://127.0.0.1:8081/v2",
+        timeout: float = 30.0,
+        connect_timeout: float = 2.0,
+        retries: int = 2,
+        retry_backoff: float = 0.2,
+        max_connections: int = 8,
+    ) -> None:
+        """
+        Initialize the client
+
+        Args:
+            url (str): Base URL of the server's v2 API.
+            timeout (float): Read timeout of a check in seconds.
+            connect_timeout (float): Connect and pool checkout timeout in seconds.
+            retries (int): Retries after a connection error, timeout or 429/5xx response.
+            retry_backoff (float): Delay before the first retry, doubled on each retry.
+            max_connections (int): Size of the keep-alive connection pool.
+        """
+        self.url = url.rstrip("/")
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout, pool=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.latency = TimingStats()
+
+    def check(self, text: str, lang: LanguageCode) -> list[dict]:
+        """
+        Check a text
+
+        Args:
+            text (str): Text to check
+            lang (LanguageCode): Language for grammar check
+
+        Returns:
+            list[dict]: ``{"offset", "message", "suggestion", "context"}`` per match
+
+        Raises:
+            LanguageToolServerError: If the server can't be reached or keeps failing
+        """
+        data = {"text": text, "language": lang.value}
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.client.post(f"{self.url}/check", data=data)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    break
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            except httpx.HTTPStatusError as e:
+                with self._lock:
+                    self.failures += 1
+                raise RuntimeError(f"LanguageTool server rejected the check: {e}")
+            if attempt < self.retries:
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.retry_backoff * 2 ** attempt)
+        else:
+            with self._lock:
+                self.failures += 1
+            raise LanguageToolServerError(f"LanguageTool server unavailable: {error}")
+
+        with self._lock:
+            self.requests += 1
+            self.latency.record(time.perf_counter() - started)
+        return [
+            {
+                "offset": match["offset"],
+                "message": match["message"],
+                "suggestion": match["replacements"][0]["value"] if match["replacements"] else None,
+                "context": match["context"]["text"],
+            }
+            for match in response.json()["matches"]
+        ]
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.client.get(f"{self.url}/languages").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def close(self) -> None:
+        self.client.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "url": self.url,
+                "requests": self.requests,
+                "retried": self.retried,
+                "failures": self.failures,
+                "latency": self.latency.to_dict(),
+            }
+
+
+class LanguageToolServerChecker:
+    """Grammar checker backed by a LanguageTool server shared by all workers"""
+
+    def __init__(self, client: LanguageToolClient) -> None:
+        self.client = client
+
+    def check_blocks(self, blocks: list[str], lang: LanguageCode = LanguageCode.AUTO) -> list[list[dict]]:
+        """
+        Check independent markdown blocks, batching them into as few
+        server requests as possible
+
+        Args:
+            blocks (list[str]): Block texts
+            lang (LanguageCode): Language for grammar check
+
+        Returns:
+            list[list[dict]]: Matches for each block, offsets relative to the block
+        """
+        return check_blocks_batched(blocks, lambda text: self.client.check(text, lang))
+
+    def check_grammar(self, md_file: str, lang: LanguageCode = LanguageCode.AUTO) -> GrammarCheckResponse:
+        """
+        Perform grammar checking on content
+
+        Args:
+            md_file (str): Markdown content
+            lang (LanguageCode): Language for grammar check
+
+        Returns:
+            GrammarCheckResponse: Grammar check results
+        """
+        blocks = extract_prose_blocks(md_file)
+        block_matches = self.check_blocks([block.text for block in blocks], lang)
+        return build_grammar_response(md_file, blocks, block_matches, lang)
+
+
+def _download_server() -> None:
+    from language_tool_python.download_lt import download_lt
+
+    download_lt()
+
+
+def _terminate_with_parent() -> None:
+    # Don't leave an unsupervised server behind if the worker is killed
+    if sys.platform.startswith("linux"):
+        import ctypes
+
+        PR_SET_PDEATHSIG = 1
+        ctypes.CDLL("libc.so.6", use_errno=True).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+
+
+class LanguageToolServerSupervisor:
+    """
+    Runs the shared LanguageTool server from within the app.
+
+    Every worker process runs a supervisor, but only the one holding an
+    exclusive lock on ``lock_path`` starts the server; the others just use
+    it. The owner restarts the server with exponential backoff when it exits
+    or fails ``max_unhealthy_checks`` health checks in a row. If the owning
+    worker dies, its lock is released, the server is terminated with it, and
+    another worker takes over.
+    """
+
+    def __init__(
+        self,
+        client: LanguageToolClient,
+        port: int = 8081,
+        lock_path: str = "/tmp/notes-languagetool.lock",
+        health_check_interval: float = 5.0,
+        startup_timeout: float = 60.0,
+        max_restart_backoff: float = 60.0,
+        max_unhealthy_checks: int = 3,
+    ) -> None:
+        self.client = client
+        self.port = port
+        self.lock_path = lock_path
+        self.health_check_interval = health_check_interval
+        self.startup_timeout = startup_timeout
+        self.max_restart_backoff = max_restart_backoff
+        self.max_unhealthy_checks = max_unhealthy_checks
+        self._unhealthy_checks = 0
+        self._lock_file: Optional[IO] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._task: Optional[asyncio.Task] = None
+        self.restarts = 0
+        self._failures = 0
+
+    @property
+    def owner(self) -> bool:
+        return self._lock_file is not None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self._stop_server)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _try_lock(self) -> bool:
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _start_server(self) -> None:
+        # Called from the event loop thread: the death signal is tied to the thread that forks
+        from language_tool_python.config_file import LanguageToolConfig
+        from language_tool_python.utils import get_server_cmd
+
+        self._process = subprocess.Popen(
+            get_server_cmd(self.port, LanguageToolConfig(LANGUAGE_TOOL_CONFIG)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            preexec_fn=_terminate_with_parent,
+        )
+        logger.info("Started LanguageTool server on port %d (pid %d)", self.port, self._process.pid)
+
+    def _stop_server(self) -> None:
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    async def _wait_healthy(self) -> bool:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process is not None and self._process.poll() is not None:
+                return False
+            if await asyncio.to_thread(self.client.is_healthy):
+                return True
+            await asyncio.sleep(0.5)
+        return False
+
+    async def _supervise(self) -> None:
+        while True:
+            try:
+                if not self.owner and not self._try_lock():
+                    # Another worker runs the server
+                    await asyncio.sleep(self.health_check_interval)
+                    continue
+
+                if self._process is not None and self._process.poll() is None:
+                    if await asyncio.to_thread(self.client.is_healthy):
+                        self._unhealthy_checks = 0
+                        self._failures = 0
+                        await asyncio.sleep(self.health_check_interval)
+                        continue
+                    self._unhealthy_checks += 1
+                    if self._unhealthy_checks < self.max_unhealthy_checks:
+                        await asyncio.sleep(self.health_check_interval)
+                        continue
+
+                if self._process is not None:
+                    logger.warning("LanguageTool server is down, restarting it")
+                    await asyncio.to_thread(self._stop_server)
+                    self.restarts += 1
+                # Fetches the server on first use
+                await asyncio.to_thread(_download_server)
+                self._start_server()
+                self._unhealthy_checks = 0
+                if await self._wait_healthy():
+                    self._failures = 0
+                    continue
+                logger.warning("LanguageTool server did not become healthy within %.0fs", self.startup_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LanguageTool server supervision failed")
+
+            self._failures += 1
+            await asyncio.sleep(min(2 ** (self._failures - 1), self.max_restart_backoff))
+
+    def stats(self) -> dict:
+        return {
+            "owner": self.owner,
+            "pid": self._process.pid if self._process is not None else None,
+            "port": self.port,
+            "restarts": self.restarts,
+            "consecutive_failures": self._failures,
+        }
@@ -1,9 +1,28 @@
+from functools import cache
+from typing import Callable
+
+
+@cache
+def _markdown() -> Callable[[str], str]:
+    # Parsers are reusable: per-call state lives in the parse state, not the instance.
+    # Built on first use to keep mistune off the startup path.
+    from mistune import create_markdown
+    from mistune.renderers.html import HTMLRenderer
+
+    return create_markdown(renderer=HTMLRenderer(escape=True), plugins=["table", "strikethrough", "url"])
+
+# Bump when renderer settings change so cached HTML and ETags are invalidated
+RENDERER_VERSION = "1"
 
 
 class MarkdownService:
+    def render(self, content: str) -> str:
+        """Render markdown content to HTML"""
+        return _markdown()(content)
+
     @staticmethod
     def render_markdown_to_html(markdown_content: str) -> str:
-        pass
+        return _markdown()(markdown_content)
 
     @staticmethod
     def validate_markdown(markdown_content: str) -> bool:
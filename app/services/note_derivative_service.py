@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import create_session
+from app.interfaces.markdown_renderer import MarkdownRenderer
+from app.models import GrammarJob, Note, NoteDerivative
+from app.schemas.grammar_schema import GrammarJobStatus
+from app.services.markdown_service import RENDERER_VERSION, MarkdownService
+from app.utils.generate_cache_key import generate_cache_key
+from app.utils.language_code import LanguageCode
+from app.utils.markdown_prose import extract_prose_blocks
+
+
+GRAMMAR_SUMMARY_FIELDS = (
+    "grammar_job_id",
+    "grammar_status",
+    "grammar_has_errors",
+    "grammar_total_issues",
+    "grammar_checked_at",
+)
+# Failed and cancelled checks are queued again for the next note with the same content
+REUSABLE_GRAMMAR_STATUSES = (GrammarJobStatus.QUEUED, GrammarJobStatus.RUNNING, GrammarJobStatus.SUCCEEDED)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compute_derivatives(content: str, renderer: MarkdownRenderer) -> dict:
+    """
+    Derive the stored read-side fields of a note
+
+    Args:
+        content (str): Markdown content
+        renderer (MarkdownRenderer): Renders the HTML
+
+    Returns:
+        dict: ``content_hash``, ``renderer_version``, ``html``, ``plain_text``, ``word_count`` and ``line_count``
+    """
+    # The prose the grammar check sees: no markup, code or HTML
+    plain_text = "\n\n".join(block.text for block in extract_prose_blocks(content))
+    return {
+        "content_hash": content_hash(content),
+        "renderer_version": RENDERER_VERSION,
+        "html": renderer.render(content),
+        "plain_text": plain_text,
+        "word_count": len(plain_text.split()),
+        "line_count": len(content.splitlines()),
+    }
+
+
+class NoteDerivativeService:
+    """
+    Write-through store of data derived from note content.
+
+    HTML, plain text, counts and content hash are computed when a note is
+    written, before its transaction, and stored in it. A grammar check of the new content is
+    queued as a background job, whose summary is recorded once it finishes.
+    Notes with the same content as one already checked, or being checked,
+    share its summary and job instead.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        renderer: Optional[MarkdownRenderer] = None,
+        queue_grammar_checks: bool = True,
+    ) -> None:
+        self.session = session
+        self.renderer = renderer or MarkdownService()
+        self.queue_grammar_checks = queue_grammar_checks
+        # Notes whose derivatives were computed by this service
+        self.computed = 0
+
+    async def get(self, note_id: int) -> Optional[NoteDerivative]:
+        """
+        Derivatives of a note, None if missing or rendered by an older renderer version
+        """
+        derivative = await self.session.get(NoteDerivative, note_id)
+        if derivative is None or derivative.renderer_version != RENDERER_VERSION:
+            return None
+        return derivative
+
+    async def get_content_version(self, note_id: int) -> Optional[tuple[str, int]]:
+        """
+        Content hash of a note's current derivatives and the note version it
+        belongs to, without loading the derivatives
+
+        Returns:
+            Optional[tuple[str, int]]: ``(content_hash, version)``, None if missing
+            or rendered by an older renderer version
+        """
+        row = (await self.session.exec(
+            select(NoteDerivative.content_hash, Note.version)
+            .join(Note, Note.id == NoteDerivative.note_id)
+            .where(
+                NoteDerivative.note_id == note_id,
+                NoteDerivative.renderer_version == RENDERER_VERSION,
+            )
+        )).first()
+        return tuple(row) if row is not None else None
+
+    def _compute_all(self, contents: list[str]) -> list[dict]:
+        return [compute_derivatives(content, self.renderer) for content in contents]
+
+    async def compute(self, contents: list[str]) -> list[dict]:
+        """
+        Compute the derivatives of note contents ahead of the transaction that
+        stores them, so that rendering doesn't hold the database write lock
+
+        Args:
+            contents (list[str]): Markdown content of each note
+
+        Returns:
+            list[dict]: Fields of each content, in input order, for ``store``
+        """
+        # Rendering and prose extraction are CPU bound
+        computed = await asyncio.to_thread(self._compute_all, contents)
+        self.computed += len(contents)
+        return computed
+
+    async def store(self, notes: list[tuple[int, str]], computed: Optional[list[dict]] = None) -> list[NoteDerivative]:
+        """
+        Stage the derivatives of written notes. Notes whose content and
+        renderer haven't changed are kept as they are. The caller commits.
+
+        Args:
+            notes (list[tuple[int, str]]): Id and content of each note
+            computed (Optional[list[dict]]): Derivatives from ``compute``, in input order.
+                Without them, stale derivatives are computed here.
+
+        Returns:
+            list[NoteDerivative]: Derivatives in input order
+        """
+        if not notes:
+            return []
+        if computed is not None:
+            hashes = [fields["content_hash"] for fields in computed]
+        else:
+            hashes = [content_hash(content) for _, content in notes]
+        result = await self.session.exec(
+            select(NoteDerivative).where(NoteDerivative.note_id.in_([note_id for note_id, _ in notes]))
+        )
+        existing = {derivative.note_id: derivative for derivative in result}
+
+        stale = [
+            index for index, ((note_id, _), digest) in enumerate(zip(notes, hashes))
+            if note_id not in existing
+            or existing[note_id].content_hash != digest
+            or existing[note_id].renderer_version != RENDERER_VERSION
+        ]
+        if computed is not None:
+            computed = [computed[index] for index in stale]
+        else:
+            computed = await self.compute([notes[index][1] for index in stale])
+
+        # A summary of the previous content doesn't apply; a renderer upgrade keeps it
+        changed = [
+            index for index in stale
+            if notes[index][0] not in existing or existing[notes[index][0]].content_hash != hashes[index]
+        ]
+        summaries = await self._grammar_summaries({hashes[index] for index in changed})
+
+        now = datetime.now(timezone.utc)
+        for index, fields in zip(stale, computed):
+            note_id, content = notes[index]
+            derivative = existing.get(note_id)
+            if derivative is None:
+                derivative = existing[note_id] = NoteDerivative(note_id=note_id, **fields)
+            else:
+                derivative.sqlmodel_update(fields)
+                derivative.updated_at = now
+            if index in changed:
+                digest = hashes[index]
+                if digest not in summaries:
+                    summaries[digest] = self._queue_grammar_check(note_id, content, digest)
+                derivative.sqlmodel_update(summaries[digest])
+            self.session.add(derivative)
+        return [existing[note_id] for note_id, _ in notes]
+
+    async def _grammar_summaries(self, hashes: set[str]) -> dict[str, dict]:
+        # Summaries of identical content that was checked, or is being checked, by content hash
+        if not hashes:
+            return {}
+        result = await self.session.exec(
+            select(NoteDerivative).where(
+                NoteDerivative.content_hash.in_(hashes),
+                NoteDerivative.grammar_status.in_(REUSABLE_GRAMMAR_STATUSES),
+            )
+        )
+        return {
+            derivative.content_hash: {field: getattr(derivative, field) for field in GRAMMAR_SUMMARY_FIELDS}
+            for derivative in result
+        }
+
+    async def refresh(self, note: Note) -> NoteDerivative:
+        """
+        Store and commit the derivatives of a note read before they existed or
+        after the renderer changed
+
+        Args:
+            note (Note): The note
+
+        Returns:
+            NoteDerivative: Its derivatives
+        """
+        [derivative] = await self.store([(note.id, note.content)])
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            # Stored by a concurrent request in the meantime
+            await self.session.rollback()
+            derivative = await self.session.get(NoteDerivative, note.id)
+        return derivative
+
+    async def backfill(self, batch_size: int = 500) -> int:
+        """
+        Store the derivatives of every note that has none, or stale ones, one
+        committed batch at a time
+
+        Args:
+            batch_size (int): Notes per transaction
+
+        Returns:
+            int: Notes whose derivatives were computed
+        """
+        computed = self.computed
+        last_id = 0
+        while True:
+            result = await self.session.exec(
+                select(Note.id, Note.content).where(Note.id > last_id).order_by(Note.id).limit(batch_size)
+            )
+            notes = [(note_id, content) for note_id, content in result]
+            if not notes:
+                break
+            await self.store(notes)
+            await self.session.commit()
+            # Keep memory flat over large tables
+            self.session.expunge_all()
+            last_id = notes[-1][0]
+        return self.computed - computed
+
+    def _queue_grammar_check(self, note_id: int, content: str, digest: str) -> dict:
+        summary = dict.fromkeys(GRAMMAR_SUMMARY_FIELDS)
+        if self.queue_grammar_checks:
+            job = GrammarJob(
+                id=uuid.uuid4().hex,
+                lang=LanguageCode.AUTO,
+                # Same cache entry as the grammar check endpoint for this text
+                cache_key=generate_cache_key(content, "text", LanguageCode.AUTO.value),
+                # The worker reads the note, the job doesn't keep a copy of it
+                note_id=note_id,
+                content_hash=digest,
+            )
+            self.session.add(job)
+            summary.update(grammar_job_id=job.id, grammar_status=GrammarJobStatus.QUEUED)
+        return summary
+
+    @staticmethod
+    async def record_grammar_result(job: GrammarJob) -> None:
+        """
+        Record the summary of a finished grammar job on the note it was queued for.
+        Results of jobs superseded by a later edit are ignored.
+
+        Args:
+            job (GrammarJob): The finished job
+        """
+        values = {"grammar_status": job.status, "grammar_checked_at": job.finished_at}
+        if job.status == GrammarJobStatus.SUCCEEDED and job.result is not None:
+            values["grammar_has_errors"] = job.result["has_errors"]
+            values["grammar_total_issues"] = job.result["total_issues"]
+        async with create_session() as session:
+            connection = await session.connection()
+            await connection.execute(
+                update(NoteDerivative).where(NoteDerivative.grammar_job_id == job.id).values(**values)
+            )
+            await session.commit()
@@ -0,0 +1,448 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+import zstandard
+from sqlalchemy import delete, func, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import NoteRevision
+from app.utils.text_delta import apply_delta, make_delta, split_lines
+
+LIST_COLUMNS = (
+    NoteRevision.revision,
+    NoteRevision.title,
+    NoteRevision.is_snapshot,
+    NoteRevision.stored_size,
+    NoteRevision.content_hash,
+    NoteRevision.content_size,
+    NoteRevision.created_at,
+)
+
+
+class RevisionIntegrityError(RuntimeError):
+    """Raised when a rebuilt revision doesn't match the hash of the content it was stored from"""
+
+
+def _hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _rebuild(rows: list) -> list[str]:
+    """Lines of the last revision of a chain starting with a snapshot"""
+    decompressor = zstandard.ZstdDecompressor()
+    lines = split_lines(decompressor.decompress(rows[0].data).decode("utf-8"))
+    for row in rows[1:]:
+        lines = apply_delta(lines, orjson.loads(decompressor.decompress(row.data)))
+    return lines
+
+
+class NoteRevisionService:
+    """
+    Edit history of notes.
+
+    Every write of a note whose title or content changed adds a revision.
+    A revision is stored as a zstd-compressed delta from the previous one,
+    or as a full snapshot once ``snapshot_interval`` revisions have passed
+    since the last snapshot or the deltas since then outgrow one. Reading a
+    revision replays at most ``snapshot_interval - 1`` deltas.
+    """
+
+    def __init__(self, session: AsyncSession, snapshot_interval: int = 20, compression_level: int = 3) -> None:
+        """
+        Args:
+            session (AsyncSession): Database session
+            snapshot_interval (int): Maximum revisions from one snapshot to the next
+            compression_level (int): zstd level of revisions added on write
+        """
+        self.session = session
+        self.snapshot_interval = snapshot_interval
+        self.compression_level = compression_level
+
+    def _encode(
+        self,
+        previous: Optional[list[str]],
+        content: str,
+        chain: Optional[dict],
+        compressor: zstandard.ZstdCompressor,
+    ) -> tuple[bool, bytes]:
+        """
+        Snapshot flag and stored data of a revision following ``previous``,
+        whose chain has the ``chain_length``, ``chain_size`` and
+        ``snapshot_size`` in ``chain``. None starts a new chain.
+        """
+        if previous is not None and chain["chain_length"] + 1 < self.snapshot_interval:
+            delta = compressor.compress(orjson.dumps(make_delta(previous, split_lines(content))))
+            # Past that point, reading the chain costs more than reading a new snapshot
+            if chain["chain_size"] + len(delta) < chain["snapshot_size"]:
+                return False, delta
+        return True, compressor.compress(content.encode("utf-8"))
+
+    @staticmethod
+    def _row(note_id: int, revision: int, title: str, content: str, encoded: tuple[bool, bytes], previous: Optional[dict]) -> dict:
+        """Columns of a revision, with ``snapshot_size`` of its chain for the next one"""
+        is_snapshot, data = encoded
+        return {
+            "note_id": note_id,
+            "revision": revision,
+            "title": title,
+            "is_snapshot": is_snapshot,
+            "data": data,
+            "stored_size": len(data),
+            "content_hash": _hash(content),
+            "content_size": len(content),
+            "chain_length": 0 if is_snapshot else previous["chain_length"] + 1,
+            "chain_size": 0 if is_snapshot else previous["chain_size"] + len(data),
+            "created_at": datetime.now(timezone.utc),
+            "snapshot_size": len(data) if is_snapshot else previous["snapshot_size"],
+        }
+
+    def _encode_created(self, notes: list[tuple[str, str]]) -> list[dict]:
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        return [
+            self._row(None, 1, title, content, (True, compressor.compress(content.encode("utf-8"))), None)
+            for title, content in notes
+        ]
+
+    async def encode_created(self, notes: list[tuple[str, str]]) -> list[dict]:
+        """
+        Encode the first revision of notes ahead of the transaction that
+        inserts them, so that compression doesn't hold the database write lock
+
+        Args:
+            notes (list[tuple[str, str]]): Title and content of each note
+
+        Returns:
+            list[dict]: Revision of each note, in input order, for ``record_created``
+        """
+        return await asyncio.to_thread(self._encode_created, notes)
+
+    async def record_created(self, note_ids: list[int], rows: list[dict]) -> None:
+        """
+        Stage the first revision of new notes. The caller commits.
+
+        Args:
+            note_ids (list[int]): Id of each note
+            rows (list[dict]): Their revisions from ``encode_created``
+        """
+        if not rows:
+            return
+        for note_id, row in zip(note_ids, rows):
+            row["note_id"] = note_id
+        await self._insert(rows)
+
+    async def _insert(self, rows: list[dict]) -> None:
+        for row in rows:
+            del row["snapshot_size"]
+        connection = await self.session.connection()
+        await connection.execute(insert(NoteRevision), rows)
+
+    def _encode_update(
+        self,
+        note_id: int,
+        latest: Optional[dict],
+        previous_title: str,
+        previous_content: str,
+        title: str,
+        content: str,
+    ) -> list[dict]:
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        revision = latest["revision"] if latest else 0
+        rows = []
+        if latest is None or latest["content_hash"] != _hash(previous_content):
+            if previous_content == content:
+                # The history misses the current content; no delta to store
+                return [self._row(note_id, revision + 1, title, content, (True, compressor.compress(content.encode("utf-8"))), None)]
+            # Written while revisions weren't recorded: keep the replaced version too
+            latest = self._row(
+                note_id, revision + 1, previous_title, previous_content,
+                (True, compressor.compress(previous_content.encode("utf-8"))), None,
+            )
+            rows.append(latest)
+            revision += 1
+        encoded = self._encode(split_lines(previous_content), content, latest, compressor)
+        rows.append(self._row(note_id, revision + 1, title, content, encoded, latest))
+        return rows
+
+    async def _latest(self, note_id: int) -> Optional[dict]:
+        snapshot_size = (
+            select(NoteRevision.stored_size)
+            .where(NoteRevision.note_id == note_id, NoteRevision.is_snapshot)
+            .order_by(NoteRevision.revision.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await self.session.exec(
+            select(
+                NoteRevision.revision,
+                NoteRevision.title,
+                NoteRevision.content_hash,
+                NoteRevision.chain_length,
+                NoteRevision.chain_size,
+                snapshot_size.label("snapshot_size"),
+            )
+            .where(NoteRevision.note_id == note_id)
+            .order_by(NoteRevision.revision.desc())
+            .limit(1)
+        )
+        latest = result.first()
+        return dict(latest._mapping) if latest is not None else None
+
+    async def prepare(
+        self, note_id: int, title: str, content: str, previous_title: str, previous_content: str
+    ) -> Optional[dict]:
+        """
+        Encode the revision of an updated note against its latest revision,
+        ahead of the transaction that records it, so that diffing and
+        compression don't hold the database write lock
+
+        Args:
+            note_id (int): Id of the note
+            title (str): New title
+            content (str): New content
+            previous_title (str): Title before the update
+            previous_content (str): Content before the update
+
+        Returns:
+            Optional[dict]: The ``latest`` revision and the encoded ``rows`` for ``record``,
+            None if the title and content are unchanged
+        """
+        latest = await self._latest(note_id)
+        if latest is not None and latest["title"] == title and latest["content_hash"] == _hash(content):
+            return None
+        rows = await asyncio.to_thread(
+            self._encode_update, note_id, latest, previous_title, previous_content, title, content
+        )
+        return {"latest": latest, "rows": rows}
+
+    async def record(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        previous_title: str,
+        previous_content: str,
+        prepared: Optional[dict] = None,
+    ) -> int:
+        """
+        Stage a revision of an updated note, unless its title and content are
+        unchanged. The caller commits.
+
+        Args:
+            note_id (int): Id of the note
+            title (str): New title
+            content (str): New content
+            previous_title (str): Title before the update
+            previous_content (str): Content before the update
+            prepared (Optional[dict]): Revision from ``prepare``. It is encoded
+                again here if another revision was added or compacted since.
+
+        Returns:
+            int: Revisions added
+        """
+        latest = await self._latest(note_id)
+        if prepared is not None and prepared["latest"] == latest:
+            rows = prepared["rows"]
+        elif latest is not None and latest["title"] == title and latest["content_hash"] == _hash(content):
+            return 0
+        else:
+            rows = await asyncio.to_thread(
+                self._encode_update, note_id, latest, previous_title, previous_content, title, content
+            )
+        await self._insert(rows)
+        return len(rows)
+
+    async def list_revisions(
+        self,
+        note_id: int,
+        limit: int = 20,
+        before: Optional[int] = None,
+    ) -> tuple[list[dict], Optional[int]]:
+        """
+        Revisions of a note, newest first, without their content
+
+        Args:
+            note_id (int): Id of the note
+            limit (int): Page size
+            before (Optional[int]): Only revisions older than this one
+
+        Returns:
+            tuple[list[dict], Optional[int]]: The page and the ``before`` of the next page, if any
+        """
+        statement = select(*LIST_COLUMNS).where(NoteRevision.note_id == note_id)
+        if before is not None:
+            statement = statement.where(NoteRevision.revision < before)
+        rows = (await self.session.exec(statement.order_by(NoteRevision.revision.desc()).limit(limit + 1))).all()
+        next_before = rows[limit - 1].revision if len(rows) > limit else None
+        return [dict(row._mapping) for row in rows[:limit]], next_before
+
+    async def get_revision(self, note_id: int, revision: int) -> Optional[dict]:
+        """
+        Rebuild a revision from the nearest snapshot at or before it
+
+        Args:
+            note_id (int): Id of the note
+            revision (int): Revision number
+
+        Returns:
+            Optional[dict]: ``revision``, ``title``, ``content``, ``content_hash`` and ``created_at``,
+            None if the revision doesn't exist
+
+        Raises:
+            RevisionIntegrityError: If the rebuilt content doesn't match its hash
+        """
+        snapshot = (
+            select(func.max(NoteRevision.revision))
+            .where(
+                NoteRevision.note_id == note_id,
+                NoteRevision.revision <= revision,
+                NoteRevision.is_snapshot,
+            )
+            .scalar_subquery()
+        )
+        result = await self.session.exec(
+            select(
+                NoteRevision.revision,
+                NoteRevision.title,
+                NoteRevision.data,
+                NoteRevision.content_hash,
+                NoteRevision.created_at,
+            )
+            .where(
+                NoteRevision.note_id == note_id,
+                NoteRevision.revision >= snapshot,
+                NoteRevision.revision <= revision,
+            )
+            .order_by(NoteRevision.revision)
+        )
+        rows = result.all()
+        if not rows or rows[-1].revision != revision:
+            return None
+
+        content = "".join(await asyncio.to_thread(_rebuild, rows))
+        target = rows[-1]
+        if _hash(content) != target.content_hash:
+            raise RevisionIntegrityError(f"Revision {revision} of note {note_id} does not match its hash")
+        return {
+            "revision": target.revision,
+            "title": target.title,
+            "content": content,
+            "content_hash": target.content_hash,
+            "created_at": target.created_at,
+        }
+
+    def _recode(self, rows: list, keep: int, compression_level: int) -> tuple[list[int], list[dict]]:
+        """Ids of the revisions to drop and new stored fields of the others"""
+        dropped = len(rows) - keep if 0 < keep < len(rows) else 0
+        compressor = zstandard.ZstdCompressor(level=compression_level)
+        decompressor = zstandard.ZstdDecompressor()
+        lines: list[str] = []
+        previous: Optional[dict] = None
+        recoded = []
+        for index, row in enumerate(rows):
+            data = decompressor.decompress(row.data)
+            if row.is_snapshot:
+                lines = split_lines(data.decode("utf-8"))
+            else:
+                lines = apply_delta(lines, orjson.loads(data))
+            if index < dropped:
+                continue
+            content = "".join(lines)
+            if _hash(content) != row.content_hash:
+                raise RevisionIntegrityError(f"Revision {row.revision} of note {row.note_id} does not match its hash")
+            is_snapshot, data = self._encode(None if previous is None else previous["lines"], content, previous, compressor)
+            previous = {
+                "lines": lines,
+                "chain_length": 0 if is_snapshot else previous["chain_length"] + 1,
+                "chain_size": 0 if is_snapshot else previous["chain_size"] + len(data),
+                "snapshot_size": len(data) if is_snapshot else previous["snapshot_size"],
+            }
+            recoded.append({
+                "id": row.id,
+                "is_snapshot": is_snapshot,
+                "data": data,
+                "stored_size": len(data),
+                "chain_length": previous["chain_length"],
+                "chain_size": previous["chain_size"],
+            })
+        return [row.id for row in rows[:dropped]], recoded
+
+    async def compact(self, note_id: int, keep: int = 0, compression_level: int = 19) -> dict:
+        """
+        Drop old revisions of a note and store the others again, chained and
+        compressed as tightly as the snapshot interval allows. Commits.
+
+        Args:
+            note_id (int): Id of the note
+            keep (int): Newest revisions to keep, 0 keeps all
+            compression_level (int): zstd level of the stored revisions
+
+        Returns:
+            dict: ``dropped`` revisions and stored bytes ``before`` and ``after``
+        """
+        result = await self.session.exec(
+            select(
+                NoteRevision.id,
+                NoteRevision.note_id,
+                NoteRevision.revision,
+                NoteRevision.is_snapshot,
+                NoteRevision.data,
+                NoteRevision.content_hash,
+            )
+            .where(NoteRevision.note_id == note_id)
+            .order_by(NoteRevision.revision)
+        )
+        rows = result.all()
+        dropped, recoded = await asyncio.to_thread(self._recode, rows, keep, compression_level)
+
+        connection = await self.session.connection()
+        if dropped:
+            await connection.execute(delete(NoteRevision).where(NoteRevision.id.in_(dropped)))
+        for values in recoded:
+            await connection.execute(
+                update(NoteRevision).where(NoteRevision.id == values.pop("id")).values(**values)
+            )
+        await self.session.commit()
+        return {
+            "dropped": len(dropped),
+            "before": sum(len(row.data) for row in rows),
+            "after": sum(values["stored_size"] for values in recoded),
+        }
+
+    async def compact_all(self, keep: int = 0, compression_level: int = 19, batch_size: int = 100) -> dict:
+        """
+        Compact the revisions of every note, one note per transaction
+
+        Args:
+            keep (int): Newest revisions to keep per note, 0 keeps all
+            compression_level (int): zstd level of the stored revisions
+            batch_size (int): Note ids read per query
+
+        Returns:
+            dict: ``notes`` compacted, ``dropped`` revisions and stored bytes ``before`` and ``after``
+        """
+        totals = {"notes": 0, "dropped": 0, "before": 0, "after": 0}
+        last_id = 0
+        while True:
+            result = await self.session.exec(
+                select(NoteRevision.note_id)
+                .where(NoteRevision.note_id > last_id)
+                .distinct()
+                .order_by(NoteRevision.note_id)
+                .limit(batch_size)
+            )
+            note_ids = result.all()
+            if not note_ids:
+                break
+            for note_id in note_ids:
+                stats = await self.compact(note_id, keep=keep, compression_level=compression_level)
+                totals["notes"] += 1
+                for key, value in stats.items():
+                    totals[key] += value
+                # Keep memory flat over large histories
+                self.session.expunge_all()
+            last_id = note_ids[-1]
+        return totals
@@ -1,21 +1,426 @@
+import base64
+import html
+import json
+import re
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+
+from sqlalchemy import insert, text, tuple_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Note
+from app.schemas.note_schema import NoteCreate, NoteSortField, SortOrder
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_revision_service import NoteRevisionService
+from app.services.render_etag_service import RenderETagService
+from app.utils.record_stream import RecordError
+
+
+LIST_FIELDS = ("id", "title", "content", "created_at")
+DEFAULT_LIST_FIELDS = ("id", "title", "created_at")
+# Tries of an update that keeps losing the race to other updates of the note
+UPDATE_ATTEMPTS = 3
+
+
+SEARCH_TERM_PATTERN = re.compile(r"\w+\*?")
+# Control characters marking matches, replaced by the highlight tags after escaping
+MATCH_OPEN, MATCH_CLOSE = "\x02", "\x03"
+SEARCH_QUERY = text(
+    """
+    SELECT note.id, note.created_at,
+           highlight(note_fts, 0, :open, :close) AS title,
+           snippet(note_fts, 1, :open, :close, '…', 24) AS snippet,
+           bm25(note_fts, 10.0, 1.0) AS rank
+    FROM note_fts
+    JOIN note ON note.id = note_fts.rowid
+    WHERE note_fts MATCH :query
+    ORDER BY rank, note.id
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching all terms. Terms are quoted so
+    user input can't inject FTS5 syntax; a trailing ``*`` keeps prefix matching.
+
+    Args:
+        query (str): User search text
+
+    Returns:
+        str: FTS5 MATCH expression, empty if the text has no searchable terms
+    """
+    terms = []
+    for term in SEARCH_TERM_PATTERN.findall(query):
+        word = term.rstrip("*")
+        terms.append(f'"{word}"*' if term.endswith("*") else f'"{word}"')
+    return " ".join(terms)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or doesn't match the query"""
+
+
+class ConcurrentUpdateError(RuntimeError):
+    """Raised when a note kept being changed by other updates while replacing it"""
+
+
+def encode_cursor(sort: NoteSortField, order: SortOrder, value, note_id: int) -> str:
+    """
+    Encode the position after the last returned row as an opaque cursor
+
+    Args:
+        sort (NoteSortField): Sort column of the query
+        order (SortOrder): Sort direction of the query
+        value: Sort column value of the last row
+        note_id (int): Id of the last row
+
+    Returns:
+        str: URL-safe cursor
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort.value, order.value, value, note_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: NoteSortField, order: SortOrder) -> tuple:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the same sort and order
+
+    Returns:
+        tuple: ``(sort value, note id)``
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, note_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort == NoteSortField.CREATED_AT:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if (cursor_sort, cursor_order) != (sort.value, order.value) or not isinstance(note_id, int):
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return value, note_id
 
 
 class NoteService:
 
+    def __init__(
+        self,
+        session: AsyncSession,
+        derivatives: Optional[NoteDerivativeService] = None,
+        revisions: Optional[NoteRevisionService] = None,
+        etags: Optional[RenderETagService] = None,
+    ) -> None:
+        """
+        Args:
+            session (AsyncSession): Database session
+            derivatives (Optional[NoteDerivativeService]): Stores derived data of written notes, in the same transaction
+            revisions (Optional[NoteRevisionService]): Records the edit history of written notes, in the same transaction
+            etags (Optional[RenderETagService]): Shared render ETags, updated around the transaction of updated notes
+        """
+        self.session = session
+        self.derivatives = derivatives
+        self.revisions = revisions
+        self.etags = etags
+
     def get_notes(self):
         pass
 
-    def get_note_by_id(self, note_id: int):
-        pass
+    async def get_note_by_id(self, note_id: int) -> Optional[Note]:
+        return await self.session.get(Note, note_id)
 
-    def save_note(self, title: str, content: str) -> str:
-        pass
+    async def save_note(self, note: NoteCreate) -> Note:
+        """
+        Insert a note
 
-    def update_note(self, note_id: int, note: dict):
-        pass
+        Args:
+            note (NoteCreate): Note to save
+
+        Returns:
+            Note: The saved note with its id
+        """
+        db_note = Note.model_validate(note)
+        # Rendered and encoded before the insert takes the write lock
+        computed = await self.derivatives.compute([note.content]) if self.derivatives is not None else None
+        revisions = await self.revisions.encode_created([(note.title, note.content)]) if self.revisions is not None else None
+        self.session.add(db_note)
+        if self.derivatives is not None or self.revisions is not None:
+            await self.session.flush()
+        if self.derivatives is not None:
+            await self.derivatives.store([(db_note.id, db_note.content)], computed)
+        if self.revisions is not None:
+            await self.revisions.record_created([db_note.id], revisions)
+        await self.session.commit()
+        await self.session.refresh(db_note)
+        return db_note
+
+    async def save_notes(self, notes: list[NoteCreate]) -> list[int]:
+        """
+        Insert notes in a single transaction with one executemany-style statement
+
+        Args:
+            notes (list[NoteCreate]): Notes to save
+
+        Returns:
+            list[int]: Ids of the new notes, in input order
+        """
+        if not notes:
+            return []
+        # Rendered and encoded before the insert takes the write lock
+        computed = None
+        if self.derivatives is not None:
+            computed = await self.derivatives.compute([note.content for note in notes])
+        revisions = None
+        if self.revisions is not None:
+            revisions = await self.revisions.encode_created([(note.title, note.content) for note in notes])
+        created_at = datetime.now(timezone.utc)
+        rows = [{"title": note.title, "content": note.content, "created_at": created_at} for note in notes]
+        connection = await self.session.connection()
+        result = await connection.execute(
+            insert(Note).returning(Note.id, sort_by_parameter_order=True), rows
+        )
+        note_ids = list(result.scalars())
+        if self.derivatives is not None:
+            await self.derivatives.store([(note_id, note.content) for note_id, note in zip(note_ids, notes)], computed)
+        if self.revisions is not None:
+            await self.revisions.record_created(note_ids, revisions)
+        await self.session.commit()
+        return note_ids
+
+    async def import_notes(self, records: AsyncIterator, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Validate and insert a stream of note records in transaction batches
+
+        A record that fails validation, or a batch that fails to insert, is
+        reported in the results without stopping the import. Results are
+        yielded as each batch is committed, so at most ``batch_size`` of them
+        are held at a time.
+
+        Args:
+            records (AsyncIterator): Decoded records, or RecordError for undecodable ones
+            batch_size (int): Notes per transaction
+
+        Yields:
+            dict: ``{"index", "note_id"}`` or ``{"index", "error"}`` per record, in input order
+        """
+        # Results since the last batch, in input order; inserted notes get their id on flush
+        pending: list[dict] = []
+        batch: list[tuple[dict, NoteCreate]] = []
+
+        async def flush():
+            try:
+                note_ids = await self.save_notes([note for _, note in batch])
+            except SQLAlchemyError as e:
+                await self.session.rollback()
+                for result, _ in batch:
+                    result["error"] = f"Insert failed: {e}"
+            else:
+                for (result, _), note_id in zip(batch, note_ids):
+                    result["note_id"] = note_id
+            batch.clear()
+
+        index = 0
+        async for record in records:
+            if isinstance(record, RecordError):
+                pending.append({"index": index, "error": str(record)})
+            else:
+                try:
+                    note = NoteCreate.model_validate(record)
+                except ValidationError as e:
+                    message = "; ".join(
+                        f"{'.'.join(str(loc) for loc in error['loc']) or 'record'}: {error['msg']}"
+                        for error in e.errors()
+                    )
+                    pending.append({"index": index, "error": message})
+                else:
+                    result = {"index": index}
+                    pending.append(result)
+                    batch.append((result, note))
+            index += 1
+            if len(pending) >= batch_size:
+                if batch:
+                    await flush()
+                for result in pending:
+                    yield result
+                pending.clear()
+        if batch:
+            await flush()
+        for result in pending:
+            yield result
+
+    async def update_note(self, note_id: int, note: NoteCreate) -> Optional[Note]:
+        """
+        Replace the title and content of a note. The note is only written if
+        its version is still the one read, which takes its write lock before
+        the latest revision is read; an update that lost the race to another
+        one is redone on top of it.
+
+        Args:
+            note_id (int): Id of the note
+            note (NoteCreate): New title and content
+
+        Returns:
+            Optional[Note]: The updated note, None if it doesn't exist
+
+        Raises:
+            ConcurrentUpdateError: If every attempt lost the race to another update
+        """
+        computed = None
+        for _ in range(UPDATE_ATTEMPTS):
+            # Reloaded after a rollback, the previous content is the one the other update wrote
+            db_note = await self.session.get(Note, note_id, populate_existing=True)
+            if db_note is None:
+                return None
+            previous_title, previous_content, version = db_note.title, db_note.content, db_note.version
+            # Rendered and encoded before the update takes the write lock
+            if computed is None and self.derivatives is not None and note.content != previous_content:
+                computed = await self.derivatives.compute([note.content])
+            prepared = None
+            if self.revisions is not None:
+                prepared = await self.revisions.prepare(
+                    note_id, note.title, note.content, previous_title, previous_content
+                )
+            try:
+                result = await self.session.exec(
+                    update(Note)
+                    .where(Note.id == note_id, Note.version == version)
+                    .values(**note.model_dump(), version=version + 1)
+                )
+                if result.rowcount == 1:
+                    derivative = None
+                    if self.derivatives is not None:
+                        [derivative] = await self.derivatives.store([(note_id, note.content)], computed)
+                    if self.revisions is not None:
+                        await self.revisions.record(
+                            note_id, note.title, note.content, previous_title, previous_content, prepared
+                        )
+                    if self.etags is not None:
+                        # Read from the database until the commit is known to have happened
+                        await self.etags.invalidate(note_id, version + 1)
+                    await self.session.commit()
+                    if self.etags is not None and derivative is not None:
+                        await self.etags.store(note_id, version + 1, derivative.content_hash)
+                    await self.session.refresh(db_note)
+                    return db_note
+            except IntegrityError:
+                # Revision number taken by a writer that didn't go through the note first
+                pass
+            # Another update won the race: redo this one on top of it
+            await self.session.rollback()
+        raise ConcurrentUpdateError(f"Note {note_id} kept changing during the update")
 
     def delete_note(self, note_id: int) -> None:
         pass
 
-    def list_notes(self) -> list[dict]:
-        pass
\ No newline at end of file
+    async def search_notes(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        highlight: tuple[str, str] = ("<mark>", "</mark>"),
+    ) -> tuple[list[dict], Optional[int]]:
+        """
+        Full-text search over note titles and content, ranked by BM25 with
+        title matches weighted above content matches
+
+        Args:
+            query (str): Search text
+            limit (int): Page size
+            offset (int): Results to skip
+            highlight (tuple[str, str]): HTML tags around matched terms in the title and snippet,
+                which are otherwise HTML-escaped
+
+        Returns:
+            tuple[list[dict], Optional[int]]: The page and the offset of the next page, if any
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return [], None
+
+        connection = await self.session.connection()
+        rows = (await connection.execute(SEARCH_QUERY, {
+            "query": match_query,
+            "open": MATCH_OPEN,
+            "close": MATCH_CLOSE,
+            "limit": limit + 1,
+            "offset": offset,
+        })).mappings().all()
+
+        results = []
+        for row in rows[:limit]:
+            result = dict(row)
+            for field in ("title", "snippet"):
+                result[field] = (
+                    html.escape(result[field])
+                    .replace(MATCH_OPEN, highlight[0])
+                    .replace(MATCH_CLOSE, highlight[1])
+                )
+            results.append(result)
+        next_offset = offset + limit if len(rows) > limit else None
+        return results, next_offset
+
+    async def list_notes(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: NoteSortField = NoteSortField.CREATED_AT,
+        order: SortOrder = SortOrder.DESC,
+        title: Optional[str] = None,
+        fields: tuple[str, ...] = DEFAULT_LIST_FIELDS,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        List notes with keyset pagination on ``(sort column, id)``
+
+        Pages are located with an index seek from the cursor rather than
+        OFFSET, so deep pages cost the same as the first one.
+
+        Args:
+            limit (int): Page size
+            cursor (Optional[str]): Cursor returned with the previous page
+            sort (NoteSortField): Sort column
+            order (SortOrder): Sort direction
+            title (Optional[str]): Only notes whose title starts with this prefix
+            fields (tuple[str, ...]): Columns to return
+
+        Returns:
+            tuple[list[dict], Optional[str]]: The page and the cursor of the next page, if any
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        sort_column = getattr(Note, sort.value)
+        # The sort column and id are always selected to build the next cursor
+        selected = list(dict.fromkeys((*fields, sort.value, "id")))
+        statement = select(*(getattr(Note, field) for field in selected))
+
+        if title:
+            statement = statement.where(Note.title >= title, Note.title < title + "\U0010ffff")
+
+        key = tuple_(sort_column, Note.id)
+        if cursor:
+            value, note_id = decode_cursor(cursor, sort, order)
+            position = tuple_(value, note_id)
+            statement = statement.where(key < position if order == SortOrder.DESC else key > position)
+
+        if order == SortOrder.DESC:
+            statement = statement.order_by(sort_column.desc(), Note.id.desc())
+        else:
+            statement = statement.order_by(sort_column.asc(), Note.id.asc())
+
+        rows = (await self.session.exec(statement.limit(limit + 1))).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor(sort, order, last[sort.value], last["id"])
+
+        return [{field: row._mapping[field] for field in fields} for row in rows], next_cursor
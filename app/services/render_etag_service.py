@@ -0,0 +1,55 @@
+from typing import Optional
+
+from app.services.markdown_service import RENDERER_VERSION
+from app.utils.cache_redis import CacheHandler as RedisCacheHandler
+
+
+def render_etag(content_hash: str) -> str:
+    """
+    Strong ETag of the rendered HTML, derived from the content hash and renderer version
+
+    Args:
+        content_hash (str): SHA-256 of the markdown content
+
+    Returns:
+        str: Quoted ETag value
+    """
+    return f'"{RENDERER_VERSION}-{content_hash}"'
+
+
+class RenderETagService:
+    """
+    Current render ETag of each note, kept in Redis for every worker so that
+    conditional render requests are answered without a database query.
+
+    Entries are tagged with the note version and only replaced by the same
+    or a newer version. An update marks its version as pending before its
+    transaction commits and stores the new ETag after the commit, so a
+    lost write leaves a pending entry, never the previous ETag. Missing and
+    pending entries are read from the database instead.
+    """
+
+    def __init__(self, redis_cache: RedisCacheHandler) -> None:
+        self.redis_cache = redis_cache
+
+    @staticmethod
+    def _key(note_id: int) -> str:
+        return f"render_etag:{RENDERER_VERSION}:{note_id}"
+
+    async def get(self, note_id: int) -> Optional[str]:
+        """
+        ETag of a note's current render
+
+        Returns:
+            Optional[str]: The ETag, None if unknown or an update is pending
+        """
+        value = await self.redis_cache.get_versioned(self._key(note_id))
+        return value.decode() if value else None
+
+    async def store(self, note_id: int, version: int, content_hash: str) -> None:
+        """Record the render ETag of a note version, unless a newer version is known"""
+        await self.redis_cache.set_versioned(self._key(note_id), version, render_etag(content_hash).encode())
+
+    async def invalidate(self, note_id: int, version: int) -> None:
+        """Mark a note version as pending until its ETag is stored, before its transaction commits"""
+        await self.redis_cache.set_versioned(self._key(note_id), version, b"")
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_service import NoteService
+from app.services.render_etag_service import RenderETagService, render_etag
+from app.utils.tracing import span
+
+
+class NoteRenderService:
+    """
+    Rendered note HTML, served from the derivatives stored with the note.
+
+    The ETag is derived from the content hash persisted with the HTML. Its
+    current value per note is kept in Redis by ``RenderETagService`` and
+    read from the database when Redis doesn't know it.
+    """
+
+    def __init__(self, note_service: NoteService, derivatives: NoteDerivativeService, etags: RenderETagService) -> None:
+        self.note_service = note_service
+        self.derivatives = derivatives
+        self.etags = etags
+
+    async def current_etag(self, note_id: int) -> Optional[str]:
+        """
+        ETag of the note's stored render, without loading the HTML, and
+        without querying the database once it is known
+
+        Returns:
+            Optional[str]: The ETag, None if the note or its render is missing
+        """
+        etag = await self.etags.get(note_id)
+        if etag is not None:
+            return etag
+        found = await self.derivatives.get_content_version(note_id)
+        if found is None:
+            return None
+        digest, version = found
+        await self.etags.store(note_id, version, digest)
+        return render_etag(digest)
+
+    async def render(self, note_id: int) -> Optional[tuple[str, str]]:
+        """
+        HTML of a note. Notes written before derivatives were stored, or
+        rendered by an older renderer, are rendered and stored now.
+
+        Args:
+            note_id (int): Id of the note
+
+        Returns:
+            Optional[tuple[str, str]]: ``(html, etag)``, None if the note doesn't exist
+        """
+        derivative = await self.derivatives.get(note_id)
+        if derivative is None:
+            note = await self.note_service.get_note_by_id(note_id)
+            if note is None:
+                return None
+            with span("render"):
+                derivative = await self.derivatives.refresh(note)
+        return derivative.html, render_etag(derivative.content_hash)
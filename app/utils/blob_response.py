@@ -0,0 +1,153 @@
+import os
+import stat
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Optional
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a byte range starts past the end of the blob"""
+
+
+def parse_range(http_range: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a ``Range`` header asking for a single byte range
+
+    Args:
+        http_range (str): Value of the ``Range`` header
+        size (int): Size of the blob in bytes
+
+    Returns:
+        Optional[tuple[int, int]]: Start and exclusive end of the range, or None
+        if the header is malformed or asks for several ranges, which is
+        answered with the whole blob
+
+    Raises:
+        RangeNotSatisfiable: If the range doesn't overlap the blob
+    """
+    units, _, spec = http_range.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first.isdigit() or last.isdigit()):
+        return None
+    if not first.isdigit():
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size
+    start = int(first)
+    if last and not last.isdigit():
+        return None
+    end = min(int(last) + 1, size) if last else size
+    if last and end <= start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class BlobResponse(Response):
+    """
+    Download of a content-addressed blob, with HTTP Range support.
+
+    The digest is a strong ETag that never changes for the same URL content
+    and also validates ``If-Range``. A single byte range is answered with
+    206, several ranges or a malformed header with the whole blob. The body
+    is sent with ``sendfile`` when the server supports the ASGI zero-copy
+    extension, and read chunk by chunk on a worker thread otherwise.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        digest: str,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None,
+        stat_result: Optional[os.stat_result] = None,
+    ) -> None:
+        self.path = path
+        self.etag = f'"{digest}"'
+        self.status_code = 200
+        self.media_type = media_type or guess_type(filename or path)[0] or "application/octet-stream"
+        self.background = None
+        self.stat_result = stat_result
+        self.init_headers(
+            {
+                "ETag": self.etag,
+                "Cache-Control": "private, max-age=31536000, immutable",
+                "X-Content-Type-Options": "nosniff",
+                "Accept-Ranges": "bytes",
+            }
+        )
+        if filename is not None:
+            quoted = quote(filename)
+            if quoted != filename:
+                self.headers["content-disposition"] = f"attachment; filename*=utf-8''{quoted}"
+            else:
+                self.headers["content-disposition"] = f'attachment; filename="{filename}"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = self.stat_result
+        if stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+        size = stat_result.st_size
+        self.headers["content-length"] = str(size)
+        self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        http_if_range = headers.get("if-range")
+        byte_range = None
+        # A stale If-Range validator asks for the whole, current blob
+        if http_range is not None and (http_if_range is None or http_if_range.strip() == self.etag):
+            try:
+                byte_range = parse_range(http_range, size)
+            except RangeNotSatisfiable:
+                response = Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+                return await response(scope, receive, send)
+
+        status_code, start, end = 200, 0, size
+        if byte_range is not None:
+            status_code, (start, end) = 206, byte_range
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+            self.headers["content-length"] = str(end - start)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+            await self._send_range(send, start, end, zerocopy)
+
+    async def _send_range(self, send: Send, start: int, end: int, zerocopy: bool) -> None:
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            if zerocopy:
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": start, "count": end - start})
+                return
+            if start == end:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            for offset in range(start, end, self.chunk_size):
+                chunk_end = min(offset + self.chunk_size, end)
+                chunk = await anyio.to_thread.run_sync(os.pread, file.fileno(), chunk_end - offset, offset)
+                await send({"type": "http.response.body", "body": chunk, "more_body": chunk_end < end})
+        finally:
+            await anyio.to_thread.run_sync(file.close)
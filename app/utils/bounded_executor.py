@@ -0,0 +1,140 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.utils.timing_stats import TimingStats
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the executor queue is full and a task is rejected"""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded queue for blocking work called from async routes.
+
+    Tasks beyond ``max_workers + max_queue`` are rejected immediately with
+    ``ExecutorSaturatedError`` so callers can shed load instead of queueing
+    without limit.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, name: str = "executor") -> None:
+        """
+        Initialize the executor
+
+        Args:
+            max_workers (int): Number of worker threads.
+            max_queue (int): Tasks allowed to wait for a free worker.
+            name (str): Thread name prefix.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_time = TimingStats()
+        self._execution_time = TimingStats()
+
+    def _retry_after(self) -> int:
+        # Rough time until a queue slot frees up
+        waves = (self._pending - self.max_workers + 1) / self.max_workers
+        return max(1, math.ceil(self._execution_time.avg * waves))
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    "Executor queue is full", retry_after=self._retry_after()
+                )
+            self._pending += 1
+            self._submitted += 1
+
+    def _call(self, submitted_at: float, fn: Callable[..., T], *args: Any) -> T:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_time.record(started_at - submitted_at)
+        failed = False
+        try:
+            return fn(*args)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._execution_time.record(time.perf_counter() - started_at)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run ``fn(*args)`` on a worker thread
+
+        Args:
+            fn (Callable): Blocking callable
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            ExecutorSaturatedError: If the queue is full
+        """
+        self._admit()
+        try:
+            future = self._executor.submit(self._call, time.perf_counter(), fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future) -> None:
+        # A job cancelled while still queued never reaches _call, which frees the slot otherwise
+        if future.cancelled():
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        """
+        Queue depth, throughput counters and wait/execution timings
+
+        Returns:
+            dict: Executor statistics
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_time": self._wait_time.to_dict(),
+                "execution_time": self._execution_time.to_dict(),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
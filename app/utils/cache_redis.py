@@ -1,92 +1,460 @@
-import redis
-import json
+import logging
+import time
 from typing import Any, Optional
 
+import orjson
+import zstandard
+
+from app.utils.prometheus import CACHE_VALUE_BYTES
+from app.utils.timing_stats import TimingStats
+
+logger = logging.getLogger(__name__)
+
+
+# Delete a lease only if it still holds our token
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Extend a lease only if it still holds our token
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Store a value tagged with a version unless a newer version is already stored
+SET_VERSIONED_SCRIPT = """
+local current = redis.call("HGET", KEYS[1], "version")
+if current and tonumber(current) > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("HSET", KEYS[1], "version", ARGV[1], "value", ARGV[2])
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return 1
+"""
+
+# Prefix of zstd-compressed values. JSON never starts with a NUL byte, so
+# uncompressed entries written before compression was added still read.
+COMPRESSED_MARKER = b"\x00zs"
+
+
+def _key_prefix(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
 class CacheHandler:
     def __init__(
-        self, 
-        redis_host: str = "localhost", 
-        redis_port: int = 6379, 
-        expiry_time: int = 300
+        self,
+        redis_host: str = "localhost",
+        redis_port: int = 6379,
+        expiry_time: int = 300,
+        socket_timeout: float = 1.0,
+        max_connections: int = 50,
+        reconnect_backoff: float = 1.0,
+        max_reconnect_backoff: float = 60.0,
+        compress_threshold: int = 1024,
+        compress_level: int = 3,
     ) -> None:
         """
-        Initialize the Redis cache handler
-        
+        Initialize the asyncio Redis cache handler. The client is created and
+        connections are opened on first use; while Redis is unreachable every
+        operation is a cheap miss/no-op and reconnection is retried with
+        exponential backoff.
+
         Args:
             redis_host (str): Hostname of the Redis server.
             redis_port (int): Port of the Redis server.
             expiry_time (int): Time-to-live (TTL) for cached items in seconds.
+            socket_timeout (float): Connect, read and pool checkout timeout in seconds.
+            max_connections (int): Size of the shared connection pool.
+            reconnect_backoff (float): Initial delay before retrying an unreachable server.
+            max_reconnect_backoff (float): Upper bound for the retry delay.
+            compress_threshold (int): Values of at least this many bytes are stored zstd-compressed.
+            compress_level (int): zstd compression level.
         """
-        try:
-            self.client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                decode_responses=True,
-                # Add optional connection parameters for robustness
-                socket_timeout=5,  # 5 second timeout
-                socket_connect_timeout=5,  # 5 second connection timeout
-                retry_on_timeout=True  # Automatically retry on timeout
-            )
-            
-            # Test connection
-            self.client.ping()
-        except redis.ConnectionError as e:
-            # Log the connection error
-            print(f"Redis connection failed: {e}")
-            raise
-        
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.socket_timeout = socket_timeout
+        self.max_connections = max_connections
+        self.pool = None
+        self._client = None
+        # Redis exception types, known once the client is created; nothing to catch before
+        self._redis_errors: tuple[type[Exception], ...] = ()
+        self._connection_errors: tuple[type[Exception], ...] = ()
         self.expiry_time = expiry_time
+        self.reconnect_backoff = reconnect_backoff
+        self.max_reconnect_backoff = max_reconnect_backoff
+        self._failures = 0
+        self._retry_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.latency = TimingStats()
+        self.compress_threshold = compress_threshold
+        self._compressor = zstandard.ZstdCompressor(level=compress_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self.values_written = 0
+        self.values_compressed = 0
+        self.bytes_before_compression = 0
+        self.bytes_stored = 0
+
+    @property
+    def client(self):
+        """The Redis client, created on first use so importing the app stays fast"""
+        if self._client is None:
+            import redis.asyncio as redis
+            from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+            self.pool = redis.BlockingConnectionPool(
+                host=self.redis_host,
+                port=self.redis_port,
+                max_connections=self.max_connections,
+                timeout=self.socket_timeout,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+            )
+            self._redis_errors = (RedisError,)
+            self._connection_errors = (ConnectionError, TimeoutError)
+            self._client = redis.Redis(connection_pool=self.pool)
+        return self._client
+
+    async def connect(self) -> bool:
+        """
+        Open a connection ahead of the first request
+
+        Returns:
+            bool: Whether Redis answered
+        """
+        try:
+            await self.client.ping()
+        except self._redis_errors as e:
+            self._record_failure(e)
+            return False
+        return True
+
+    @property
+    def available(self) -> bool:
+        """Whether Redis is believed reachable or due for a reconnection attempt"""
+        return time.monotonic() >= self._retry_at
+
+    def _record_success(self, started: float) -> None:
+        self.latency.record(time.perf_counter() - started)
+        if self._failures:
+            logger.info("Redis connection restored")
+        self._failures = 0
+
+    def _record_failure(self, error: Exception) -> None:
+        self.errors += 1
+        if isinstance(error, self._connection_errors):
+            self._failures += 1
+            backoff = min(self.reconnect_backoff * 2 ** (self._failures - 1), self.max_reconnect_backoff)
+            self._retry_at = time.monotonic() + backoff
+            if self._failures == 1:
+                logger.warning("Redis unavailable, continuing without it: %s", error)
 
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str, decode: bool = True) -> Optional[Any]:
         """
         Retrieve a value from the cache by key
-        
+
         Args:
             key (str): The cache key
-        
+            decode (bool): Decode the stored JSON. With False the stored bytes are returned.
+
         Returns:
-            Any: The cached value or None if the key doesn't exist or expired
+            Any: The cached value or None if the key doesn't exist, expired or Redis is unavailable
         """
-        try:
-            value = self.client.get(key)
-            return json.loads(value) if value else None
-        except (json.JSONDecodeError, TypeError) as e:
-            print(f"Cache retrieval error: {e}")
-            return None
+        return (await self.get_many([key], decode))[0]
 
-    def set(self, key: str, value: Any) -> None:
+    async def set(self, key: str, value: Any) -> None:
         """
         Store a value in the cache with an expiration time
-        
+
         Args:
             key (str): The cache key.
-            value (Any): The value to cache (serializable as JSON).
+            value (Any): The value to cache, JSON-serializable or already encoded bytes.
+        """
+        await self.set_many({key: value})
+
+    async def get_many(self, keys: list[str], decode: bool = True) -> list[Optional[Any]]:
         """
+        Retrieve several values in a single MGET round trip
+
+        Args:
+            keys (list[str]): The cache keys
+            decode (bool): Decode the stored JSON. With False the stored bytes are returned.
+
+        Returns:
+            list: Cached values in key order, None for missing keys
+        """
+        if not keys:
+            return []
+        if not self.available:
+            self.misses += len(keys)
+            return [None] * len(keys)
+        started = time.perf_counter()
         try:
-            self.client.setex(
-                key,
-                self.expiry_time,
-                json.dumps(value)
-            )
-        except Exception as e:
-            print(f"Cache storage error: {e}")
+            values = await self.client.mget(keys)
+        except self._redis_errors as e:
+            self._record_failure(e)
+            self.misses += len(keys)
+            return [None] * len(keys)
+        self._record_success(started)
 
-    def clear(self, pattern: str = "*") -> int:
+        results = []
+        for value in values:
+            try:
+                if value is not None and value.startswith(COMPRESSED_MARKER):
+                    value = self._decompressor.decompress(value[len(COMPRESSED_MARKER):])
+                if decode and value is not None:
+                    value = orjson.loads(value)
+            except (zstandard.ZstdError, orjson.JSONDecodeError) as e:
+                logger.warning("Cache retrieval error: %s", e)
+                value = None
+            results.append(value)
+        found = sum(result is not None for result in results)
+        self.hits += found
+        self.misses += len(results) - found
+        return results
+
+    async def set_many(self, items: dict[str, Any]) -> None:
         """
-        Clear cached entries matching a pattern
-        
+        Store several values with the expiration time in one pipelined round trip.
+        Bytes are stored as is, other values are encoded as JSON. Values above
+        the compression threshold are stored zstd-compressed.
+
+        Args:
+            items (dict[str, Any]): Mapping of cache keys to values
+        """
+        if not items or not self.available:
+            return
+        try:
+            payloads = {
+                key: value if isinstance(value, bytes) else orjson.dumps(value)
+                for key, value in items.items()
+            }
+        except TypeError as e:
+            logger.warning("Cache storage error: %s", e)
+            return
+        payloads = {key: self._compress(key, payload) for key, payload in payloads.items()}
+        started = time.perf_counter()
+        try:
+            async with self.client.pipeline(transaction=False) as pipeline:
+                for key, payload in payloads.items():
+                    pipeline.setex(key, self.expiry_time, payload)
+                await pipeline.execute()
+        except self._redis_errors as e:
+            self._record_failure(e)
+            return
+        self._record_success(started)
+
+    def _compress(self, key: str, payload: bytes) -> bytes:
+        size = len(payload)
+        stored = payload
+        if size >= self.compress_threshold:
+            compressed = COMPRESSED_MARKER + self._compressor.compress(payload)
+            # Incompressible values are kept as they are
+            if len(compressed) < size:
+                stored = compressed
+                self.values_compressed += 1
+        self.values_written += 1
+        self.bytes_before_compression += size
+        self.bytes_stored += len(stored)
+        prefix = _key_prefix(key)
+        CACHE_VALUE_BYTES.observe(size, prefix, "encoded")
+        CACHE_VALUE_BYTES.observe(len(stored), prefix, "stored")
+        return stored
+
+    async def delete(self, key: str) -> None:
+        if not self.available:
+            return
+        try:
+            await self.client.unlink(key)
+        except self._redis_errors as e:
+            self._record_failure(e)
+
+    async def clear(self, pattern: str = "*", batch_size: int = 500) -> int:
+        """
+        Clear cached entries matching a pattern. Keys are found with SCAN and
+        removed with UNLINK in batches, so the server is never blocked by a
+        full keyspace walk or a large synchronous delete.
+
         Args:
             pattern (str): Redis key pattern to match. Defaults to all keys.
-        
+            batch_size (int): Keys per SCAN step and UNLINK call.
+
         Returns:
             int: Number of keys deleted
         """
-        try:
-            # Find and delete keys matching the pattern
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
+        if not self.available:
             return 0
-        except Exception as e:
-            print(f"Cache clearing error: {e}")
-            return 0
\ No newline at end of file
+        deleted = 0
+        batch = []
+        try:
+            async for key in self.client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.client.unlink(*batch)
+        except self._redis_errors as e:
+            self._record_failure(e)
+        return deleted
+
+    async def acquire_lease(self, key: str, token: str, ttl: float) -> Optional[bool]:
+        """
+        Try to take a lease with SET NX PX
+
+        Args:
+            key (str): Lease key
+            token (str): Owner token, needed to release the lease
+            ttl (float): Lease lifetime in seconds
+
+        Returns:
+            Optional[bool]: Whether the lease was taken, None if Redis is unavailable
+        """
+        if not self.available:
+            return None
+        try:
+            return bool(await self.client.set(key, token, nx=True, px=int(ttl * 1000)))
+        except self._redis_errors as e:
+            self._record_failure(e)
+            return None
+
+    async def renew_lease(self, key: str, token: str, ttl: float) -> Optional[bool]:
+        """
+        Reset the lifetime of a lease if it is still owned by ``token``
+
+        Returns:
+            Optional[bool]: Whether the lease is still ours, None if Redis is unavailable
+        """
+        if not self.available:
+            return None
+        try:
+            return bool(await self.client.eval(RENEW_LEASE_SCRIPT, 1, key, token, int(ttl * 1000)))
+        except self._redis_errors as e:
+            self._record_failure(e)
+            return None
+
+    async def release_lease(self, key: str, token: str) -> None:
+        """Release a lease if it is still owned by ``token``"""
+        if not self.available:
+            return
+        try:
+            await self.client.eval(RELEASE_LEASE_SCRIPT, 1, key, token)
+        except self._redis_errors as e:
+            self._record_failure(e)
+
+    async def get_versioned(self, key: str) -> Optional[bytes]:
+        """
+        Value stored with ``set_versioned``
+
+        Returns:
+            Optional[bytes]: The value, None if the key doesn't exist, expired or Redis is unavailable
+        """
+        if not self.available:
+            self.misses += 1
+            return None
+        started = time.perf_counter()
+        try:
+            value = await self.client.hget(key, "value")
+        except self._redis_errors as e:
+            self._record_failure(e)
+            self.misses += 1
+            return None
+        self._record_success(started)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set_versioned(self, key: str, version: int, value: bytes) -> Optional[bool]:
+        """
+        Store a value with the expiration time, unless the key holds a newer version.
+        Writers that finish out of order can't replace a newer value with an older one.
+
+        Args:
+            key (str): The cache key
+            version (int): Version of the value; the same version replaces it
+            value (bytes): The value
+
+        Returns:
+            Optional[bool]: Whether the value was stored, None if Redis is unavailable
+        """
+        if not self.available:
+            return None
+        started = time.perf_counter()
+        try:
+            stored = await self.client.eval(SET_VERSIONED_SCRIPT, 1, key, version, value, self.expiry_time)
+        except self._redis_errors as e:
+            self._record_failure(e)
+            return None
+        self._record_success(started)
+        return bool(stored)
+
+    async def memory_usage(self, pattern: str = "*", samples: int = 100) -> list[dict]:
+        """
+        Redis memory used by a sample of entries, for tuning the compression threshold
+
+        Args:
+            pattern (str): Redis key pattern to sample
+            samples (int): Maximum number of keys to report
+
+        Returns:
+            list[dict]: ``{"key", "memory_bytes", "value_bytes", "compressed"}`` per sampled key
+        """
+        if not self.available:
+            return []
+        entries = []
+        try:
+            async for key in self.client.scan_iter(match=pattern, count=samples):
+                async with self.client.pipeline(transaction=False) as pipeline:
+                    pipeline.memory_usage(key)
+                    pipeline.strlen(key)
+                    pipeline.getrange(key, 0, len(COMPRESSED_MARKER) - 1)
+                    memory, length, head = await pipeline.execute()
+                if memory is None:
+                    continue
+                entries.append({
+                    "key": key.decode("utf-8", errors="replace"),
+                    "memory_bytes": memory,
+                    "value_bytes": length,
+                    "compressed": head == COMPRESSED_MARKER,
+                })
+                if len(entries) >= samples:
+                    break
+        except self._redis_errors as e:
+            self._record_failure(e)
+        return entries
+
+    async def close(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        await self.pool.disconnect()
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "consecutive_failures": self._failures,
+            "pool_max_connections": self.max_connections,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "latency": self.latency.to_dict(),
+            "compression": {
+                "threshold": self.compress_threshold,
+                "values_written": self.values_written,
+                "values_compressed": self.values_compressed,
+                "bytes_before_compression": self.bytes_before_compression,
+                "bytes_stored": self.bytes_stored,
+                "ratio": round(self.bytes_stored / self.bytes_before_compression, 3)
+                if self.bytes_before_compression else None,
+            },
+        }
@@ -1,24 +1,150 @@
-from typing import Any
+import fnmatch
+import json
+import threading
 import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.utils.timing_stats import TimingStats
 
 
 class CacheHandler:
-    def __init__(self) -> None:
-        self.cache = {}
-        self.expiration_time = 300
+    """
+    In-process LRU cache bounded by entry count and approximate size in bytes.
+
+    Entries expire after ``expiry_time`` seconds and are dropped lazily on
+    access. When either bound is exceeded, expired entries are purged first
+    and only then are the least recently used live entries evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        expiry_time: int = 300,
+    ) -> None:
+        """
+        Initialize the in-memory cache handler
+
+        Args:
+            max_entries (int): Maximum number of cached entries.
+            max_bytes (int): Maximum total size of cached values in bytes.
+            expiry_time (int): Time-to-live (TTL) for cached items in seconds.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.expiration_time = expiry_time
+        # key -> (value, expiry, size)
+        self.cache: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self.size_bytes = 0
+        # No entry expires before this, so purging is skipped until then
+        self._earliest_expiry = float("inf")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.latency = TimingStats()
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, (bytes, str)):
+            return len(value)
+        return len(json.dumps(value))
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self.cache.pop(key)
+        self.size_bytes -= size
+
+    def _over_bounds(self) -> bool:
+        return len(self.cache) > self.max_entries or self.size_bytes > self.max_bytes
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        if now < self._earliest_expiry:
+            return
+        expired = [key for key, (_, expiry, _) in self.cache.items() if expiry <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._earliest_expiry = min((expiry for _, expiry, _ in self.cache.values()), default=float("inf"))
+
+    def _evict(self) -> None:
+        if not self._over_bounds():
+            return
+        # Dead entries go before any live one loses its place
+        self._purge_expired()
+        while self.cache and self._over_bounds():
+            self._remove(next(iter(self.cache)))
+            self.evictions += 1
 
     def get(self, key: str) -> Any:
-        if key in self.cache:
-            value, expiry = self.cache[key]
-            if time.time() < expiry:
-                return value
+        started = time.perf_counter()
+        with self._lock:
+            value = None
+            entry = self.cache.get(key)
+            if entry is not None:
+                if time.time() < entry[1]:
+                    self.cache.move_to_end(key)
+                    value = entry[0]
+                else:
+                    self._remove(key)
+                    self.expirations += 1
+            if value is None:
+                self.misses += 1
             else:
-                del self.cache[key]
-        return None
-    
-    def set(self, key: str, value: Any) -> None:
-        expiry = time.time() + self.expiration_time
-        self.cache[key] = (value, expiry)
-
-    def clear(self):
-        self.cache.clear()
\ No newline at end of file
+                self.hits += 1
+            self.latency.record(time.perf_counter() - started)
+            return value
+
+    def set(self, key: str, value: Any, expiry_time: Optional[int] = None) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        expiry = time.time() + (expiry_time or self.expiration_time)
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            self.cache[key] = (value, expiry, size)
+            self.size_bytes += size
+            self._earliest_expiry = min(self._earliest_expiry, expiry)
+            self._evict()
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items: dict[str, Any]) -> None:
+        for key, value in items.items():
+            self.set(key, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+
+    def clear(self, pattern: str = "*") -> int:
+        with self._lock:
+            if pattern == "*":
+                count = len(self.cache)
+                self.cache.clear()
+                self.size_bytes = 0
+                self._earliest_expiry = float("inf")
+                return count
+            keys = [key for key in self.cache if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self.cache),
+                "bytes": self.size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "latency": self.latency.to_dict(),
+            }
@@ -0,0 +1,55 @@
+import asyncio
+import ipaddress
+import socket
+from typing import Iterable
+from urllib.parse import urlsplit
+
+
+class UnsafeCallbackURLError(ValueError):
+    """Raised when a callback URL would make the server call a host it must not reach"""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_callback_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """
+    Check that a callback URL is an http(s) URL of a host the server may call
+
+    Hosts in ``allowed_hosts`` are accepted as they are. When it is empty,
+    any host is accepted whose addresses are all public, which excludes
+    loopback, private, link-local (cloud metadata) and reserved ranges.
+
+    Args:
+        url (str): Callback URL
+        allowed_hosts (Iterable[str]): Configured callback hosts, empty to allow any public host
+
+    Raises:
+        UnsafeCallbackURLError: If the URL is malformed or its host is not allowed
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError as e:
+        raise UnsafeCallbackURLError(f"Invalid callback URL: {e}") from e
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeCallbackURLError("callback_url must be an http(s) URL")
+
+    host = parts.hostname.lower()
+    allowed_hosts = [allowed.lower() for allowed in allowed_hosts]
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise UnsafeCallbackURLError(f"Callbacks to {host} are not allowed")
+        return
+
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise UnsafeCallbackURLError(f"Callback host {host} cannot be resolved") from e
+    # Every address counts: the client may connect to any of them
+    if not addresses or not all(_is_public(address[4][0]) for address in addresses):
+        raise UnsafeCallbackURLError(f"Callbacks to {host} are not allowed: it is not a public address")
@@ -0,0 +1,172 @@
+import gzip
+import zlib
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.prometheus import RESPONSE_BODY_BYTES
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+# Preferred first when the client accepts both with the same quality
+ENCODINGS = ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a content encoding from an ``Accept-Encoding`` header
+
+    Args:
+        accept_encoding (str): Header value, e.g. ``gzip, br;q=0.9``
+
+    Returns:
+        Optional[str]: ``br``, ``gzip``, or None when neither is acceptable
+    """
+    qualities = {}
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            qualities[name.strip().lower()] = quality
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _StreamEncoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Flushed per chunk so streamed records reach the client without delay
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli response compression negotiated with ``Accept-Encoding``.
+
+    Complete responses are compressed when at least ``minimum_size`` bytes;
+    streamed responses are compressed chunk by chunk. Partial content,
+    range-capable downloads, already encoded and non-text responses are
+    passed through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        encoder: Optional[_StreamEncoder] = None
+        passthrough = False
+        size = sent = 0
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, passthrough, size, sent
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    encoding is None
+                    or message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    # Byte ranges refer to the stored representation, and the body may go out with sendfile
+                    or headers.get("accept-ranges") == "bytes"
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            size += len(body)
+            if passthrough:
+                sent += len(body)
+                await send(message)
+            elif start is not None and not more_body:
+                headers = MutableHeaders(scope=start)
+                if len(body) >= self.minimum_size:
+                    if encoding == "br":
+                        body = brotli.compress(body, quality=self.brotli_quality)
+                    else:
+                        body = gzip.compress(body, self.gzip_level)
+                    self._set_encoding_headers(headers, encoding)
+                    headers["Content-Length"] = str(len(body))
+                else:
+                    passthrough = True
+                sent += len(body)
+                await send(start)
+                start = None
+                await send({"type": "http.response.body", "body": body})
+            else:
+                if start is not None:
+                    headers = MutableHeaders(scope=start)
+                    self._set_encoding_headers(headers, encoding)
+                    del headers["Content-Length"]
+                    encoder = _StreamEncoder(encoding, self.gzip_level, self.brotli_quality)
+                    await send(start)
+                    start = None
+                chunk = encoder.compress(body) if body else b""
+                if not more_body:
+                    chunk += encoder.finish()
+                sent += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+            if not more_body:
+                label = "identity" if passthrough else encoding
+                RESPONSE_BODY_BYTES.observe(size, label, "uncompressed")
+                RESPONSE_BODY_BYTES.observe(sent, label, "sent")
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _set_encoding_headers(headers: MutableHeaders, encoding: str) -> None:
+        headers["Content-Encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        # The compressed body is a different representation of the same content
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
@@ -1,15 +1,45 @@
 import hashlib
 
-def generate_cache_key(content: str, source: str) -> str:
+def generate_cache_key(content: str, source: str, lang: str = "auto") -> str:
     """
-    Generate a unique cache key based on the content and source type.
+    Generate a unique cache key based on the content, source type and language.
 
     Args:
         content (str): Markdown content.
         source (str): Source type, either 'file' or 'text'.
+        lang (str): Language code the content is checked with.
 
     Returns:
         str: A unique cache key.
     """
     content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
-    return f"grammar_check:{content_hash}:{source}"
+    return f"grammar_check:{content_hash}:{source}:{lang}"
+
+
+def generate_block_cache_key(block: str, lang: str) -> str:
+    """
+    Generate a cache key for the grammar matches of a single markdown block.
+
+    Args:
+        block (str): Block text.
+        lang (str): Language code the block is checked with.
+
+    Returns:
+        str: A unique cache key.
+    """
+    block_hash = hashlib.sha256(block.encode("utf-8")).hexdigest()
+    return f"grammar_block:{lang}:{block_hash}"
+
+
+def generate_language_cache_key(content: str) -> str:
+    """
+    Generate a cache key for the detected language of a document.
+
+    Args:
+        content (str): Markdown content.
+
+    Returns:
+        str: A unique cache key.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"language:{content_hash}"
@@ -0,0 +1,112 @@
+import math
+import re
+from collections import Counter
+from functools import cached_property
+from typing import Optional
+
+from app.utils.language_code import LanguageCode
+from app.utils.language_samples import SAMPLES
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+def trigrams(text: str) -> Counter:
+    """Character trigrams of the lowercased words of a text, separated and surrounded by single spaces"""
+    words = f" {' '.join(WORD_PATTERN.findall(text.lower()))} "
+    return Counter([words[i:i + 3] for i in range(len(words) - 2)])
+
+
+class LanguageDetector:
+    """
+    Character trigram language identification.
+
+    A naive Bayes classifier over the trigram frequencies of the bundled
+    sample prose of each language. Only the first ``sample_chars`` characters
+    of a text are looked at, so detection time doesn't grow with the
+    document. Texts too short or too ambiguous to tell are left to the
+    grammar checker's own detection.
+    """
+
+    def __init__(
+        self,
+        variants: Optional[list[LanguageCode]] = None,
+        sample_chars: int = 1000,
+        min_trigrams: int = 12,
+        min_confidence: float = 0.1,
+    ) -> None:
+        """
+        Args:
+            variants (Optional[list[LanguageCode]]): Code returned for each detected language.
+                Languages without a variant, or without sample prose, are not detected.
+            sample_chars (int): Characters of a text sampled for detection.
+            min_trigrams (int): Fewest trigrams in the sample to attempt detection.
+            min_confidence (float): Minimum average log-likelihood margin per trigram
+                between the best and second best language.
+        """
+        variants = variants or [LanguageCode.EN_US, LanguageCode.FR_FR, LanguageCode.ES_ES, LanguageCode.DE_DE]
+        self.variants = {
+            language: variant
+            for variant in variants
+            if (language := variant.value.split("-")[0]) in SAMPLES
+        }
+        self.languages = list(self.variants)
+        self.sample_chars = sample_chars
+        self.min_trigrams = min_trigrams
+        self.min_confidence = min_confidence
+
+    @cached_property
+    def model(self) -> tuple[dict[str, tuple[float, ...]], tuple[float, ...]]:
+        """
+        Add-one smoothed log probabilities of each trigram, one entry per
+        language, and those of unseen trigrams. Built on first use.
+        """
+        profiles = [trigrams(SAMPLES[language]) for language in self.languages]
+        vocabulary = set().union(*profiles)
+        denominators = [sum(profile.values()) + len(vocabulary) + 1 for profile in profiles]
+        log_probabilities = {
+            trigram: tuple(
+                math.log(profile[trigram] + 1) - math.log(denominator)
+                for profile, denominator in zip(profiles, denominators)
+            )
+            for trigram in vocabulary
+        }
+        return log_probabilities, tuple(-math.log(denominator) for denominator in denominators)
+
+    def scores(self, text: str) -> tuple[dict[str, float], int]:
+        """
+        Log-likelihood of the sampled text under each language
+
+        Returns:
+            tuple[dict[str, float], int]: Score per language and the number of trigrams scored
+        """
+        log_probabilities, unseen = self.model
+        counts = trigrams(text[:self.sample_chars])
+        totals = [0.0] * len(self.languages)
+        for trigram, count in counts.items():
+            for index, log_probability in enumerate(log_probabilities.get(trigram, unseen)):
+                totals[index] += count * log_probability
+        return dict(zip(self.languages, totals)), sum(counts.values())
+
+    def detect(self, text: str) -> LanguageCode:
+        """
+        Detect the language of a text
+
+        Args:
+            text (str): Plain text, markup removed
+
+        Returns:
+            LanguageCode: The configured variant of the detected language, AUTO if undetermined
+        """
+        if not self.languages:
+            return LanguageCode.AUTO
+        if len(self.languages) == 1:
+            # Nothing to tell apart, but a text too short to be prose is still left undetermined
+            count = sum(trigrams(text[:self.sample_chars]).values())
+            return self.variants[self.languages[0]] if count >= self.min_trigrams else LanguageCode.AUTO
+        scores, count = self.scores(text)
+        if count < self.min_trigrams:
+            return LanguageCode.AUTO
+        best, second = sorted(scores, key=scores.get, reverse=True)[:2]
+        if (scores[best] - scores[second]) / count < self.min_confidence:
+            return LanguageCode.AUTO
+        return self.variants[best]
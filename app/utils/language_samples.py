@@ -0,0 +1,111 @@
+"""
+Sample prose the language detector builds its trigram profiles from, keyed
+by ISO 639-1 language code. Kept to everyday sentences with the function
+words, inflections and diacritics typical of each language.
+"""
+
+SAMPLES = {
+    "en": """
+The meeting was moved to Thursday because most of the team could not make it
+on Monday. We should have sent the agenda earlier, but nobody knew who was
+responsible for it. Next time I will write it myself and share it with
+everyone the day before. There are still a few open questions about the
+budget, and the manager wants an answer by the end of the week.
+When I was walking home yesterday, it started to rain, so I stopped at a small
+café and ordered a cup of tea. The waiter told me that the weather would be
+better tomorrow. I hope he is right, because we are planning a trip to the
+mountains with some friends. They have already booked the hotel and bought the
+train tickets. It would be a shame if we had to stay at home.
+This document describes how the application works and what you need to do
+before you can use it. First, install the dependencies and create a new
+database. Then run the tests to make sure that everything is working. If
+something goes wrong, check the logs and read the error message carefully.
+Most problems are caused by a missing configuration value or an outdated
+version of the software. You can also ask for help in the issue tracker,
+where other users often share what they have learned.
+Reading every day is one of the best ways to improve your writing. Good
+writers pay attention to the words they choose and to the rhythm of their
+sentences. They also know when to stop. Which book are you reading right now,
+and would you recommend it to a friend? I think that the story matters more
+than the style, although both should work together.
+""",
+    "fr": """
+La réunion a été déplacée à jeudi parce que la plupart de l'équipe ne pouvait
+pas venir lundi. Nous aurions dû envoyer l'ordre du jour plus tôt, mais
+personne ne savait qui en était responsable. La prochaine fois, je
+l'écrirai moi-même et je le partagerai avec tout le monde la veille. Il reste
+encore quelques questions sur le budget, et le directeur veut une réponse
+avant la fin de la semaine.
+Hier, quand je rentrais chez moi, il a commencé à pleuvoir, alors je me suis
+arrêté dans un petit café et j'ai commandé une tasse de thé. Le serveur m'a dit
+que le temps serait meilleur demain. J'espère qu'il a raison, car nous
+prévoyons une excursion à la montagne avec des amis. Ils ont déjà réservé
+l'hôtel et acheté les billets de train. Ce serait dommage de devoir rester à
+la maison.
+Ce document décrit le fonctionnement de l'application et ce que vous devez
+faire avant de pouvoir l'utiliser. D'abord, installez les dépendances et créez
+une nouvelle base de données. Ensuite, lancez les tests pour vérifier que tout
+fonctionne. Si quelque chose ne va pas, consultez les journaux et lisez
+attentivement le message d'erreur. La plupart des problèmes viennent d'une
+valeur de configuration manquante ou d'une version trop ancienne du logiciel.
+Vous pouvez aussi demander de l'aide sur le gestionnaire de tickets, où
+d'autres utilisateurs partagent souvent ce qu'ils ont appris.
+Lire tous les jours est l'un des meilleurs moyens d'améliorer son écriture.
+Les bons écrivains font attention aux mots qu'ils choisissent et au rythme de
+leurs phrases. Ils savent aussi quand s'arrêter. Quel livre êtes-vous en train
+de lire, et le conseilleriez-vous à un ami ? Je pense que l'histoire compte
+plus que le style, même si les deux doivent aller ensemble.
+""",
+    "es": """
+La reunión se cambió al jueves porque la mayor parte del equipo no podía venir
+el lunes. Deberíamos haber enviado el orden del día antes, pero nadie sabía
+quién era el responsable. La próxima vez lo escribiré yo mismo y lo compartiré
+con todos el día anterior. Todavía quedan algunas preguntas sobre el
+presupuesto, y el director quiere una respuesta antes del final de la semana.
+Ayer, cuando volvía a casa, empezó a llover, así que me paré en una pequeña
+cafetería y pedí una taza de té. El camarero me dijo que mañana haría mejor
+tiempo. Espero que tenga razón, porque estamos planeando una excursión a la
+montaña con unos amigos. Ellos ya han reservado el hotel y han comprado los
+billetes de tren. Sería una pena tener que quedarnos en casa.
+Este documento explica cómo funciona la aplicación y lo que tienes que hacer
+antes de poder usarla. Primero, instala las dependencias y crea una nueva base
+de datos. Después, ejecuta las pruebas para comprobar que todo funciona. Si
+algo sale mal, revisa los registros y lee con atención el mensaje de error. La
+mayoría de los problemas se deben a un valor de configuración que falta o a
+una versión antigua del programa. También puedes pedir ayuda en el gestor de
+incidencias, donde otros usuarios suelen compartir lo que han aprendido.
+Leer todos los días es una de las mejores maneras de mejorar la escritura. Los
+buenos escritores prestan atención a las palabras que eligen y al ritmo de sus
+frases. También saben cuándo parar. ¿Qué libro estás leyendo ahora y se lo
+recomendarías a un amigo? Creo que la historia importa más que el estilo,
+aunque los dos deberían ir juntos.
+""",
+    "de": """
+Die Besprechung wurde auf Donnerstag verschoben, weil die meisten Kollegen am
+Montag nicht kommen konnten. Wir hätten die Tagesordnung früher verschicken
+sollen, aber niemand wusste, wer dafür zuständig war. Beim nächsten Mal
+schreibe ich sie selbst und schicke sie allen am Tag vorher. Es gibt noch ein
+paar offene Fragen zum Budget, und der Chef möchte bis zum Ende der Woche eine
+Antwort haben.
+Als ich gestern nach Hause ging, fing es an zu regnen, also bin ich in ein
+kleines Café gegangen und habe eine Tasse Tee bestellt. Der Kellner sagte mir,
+dass das Wetter morgen besser wird. Ich hoffe, er hat recht, denn wir planen
+mit ein paar Freunden einen Ausflug in die Berge. Sie haben das Hotel schon
+gebucht und die Zugfahrkarten gekauft. Es wäre schade, wenn wir zu Hause
+bleiben müssten.
+Dieses Dokument beschreibt, wie die Anwendung funktioniert und was Sie tun
+müssen, bevor Sie sie benutzen können. Installieren Sie zuerst die
+Abhängigkeiten und legen Sie eine neue Datenbank an. Führen Sie dann die Tests
+aus, um sicherzustellen, dass alles funktioniert. Wenn etwas schiefgeht,
+prüfen Sie die Protokolle und lesen Sie die Fehlermeldung sorgfältig. Die
+meisten Probleme entstehen durch einen fehlenden Konfigurationswert oder eine
+veraltete Version der Software. Sie können auch im Ticketsystem um Hilfe
+bitten, wo andere Benutzer oft teilen, was sie gelernt haben.
+Jeden Tag zu lesen ist einer der besten Wege, das eigene Schreiben zu
+verbessern. Gute Schriftsteller achten auf die Wörter, die sie wählen, und auf
+den Rhythmus ihrer Sätze. Sie wissen auch, wann sie aufhören müssen. Welches
+Buch lesen Sie gerade, und würden Sie es einem Freund empfehlen? Ich glaube,
+dass die Geschichte wichtiger ist als der Stil, obwohl beides zusammenpassen
+sollte.
+""",
+}
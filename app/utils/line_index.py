@@ -0,0 +1,53 @@
+from bisect import bisect_right
+
+
+class LineIndex:
+    """
+    Precomputed line start offsets of a text for O(log n) offset to
+    line/column lookups.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.line_starts = [0]
+        find = text.find
+        position = find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = find("\n", position + 1)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def position(self, offset: int) -> tuple[int, int]:
+        """
+        Convert a character offset to a position
+
+        Args:
+            offset (int): Offset in the text
+
+        Returns:
+            tuple[int, int]: 1-based ``(line, column)``
+        """
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+    def lines(self, first: int, last: int) -> str:
+        """
+        Slice whole lines out of the text without splitting it
+
+        Args:
+            first (int): First 1-based line, inclusive
+            last (int): Last 1-based line, inclusive
+
+        Returns:
+            str: The lines joined by newlines
+        """
+        first = max(first, 1)
+        last = min(last, self.line_count)
+        if first > last:
+            return ""
+        start = self.line_starts[first - 1]
+        end = self.line_starts[last] - 1 if last < self.line_count else len(self.text)
+        return self.text[start:end]
@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+from collections import defaultdict
+from typing import IO, AsyncIterator, Optional
+
+from app.interfaces.file_storage import FileTooLargeError, StagedBlob, StoredBlob
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class LocalFileStorage:
+    """
+    Content-addressed blob storage on the local filesystem.
+
+    Blobs are stored once per SHA-256 digest under ``blobs/<2 hex>/<digest>``.
+    Content is written to a temporary file while it is hashed and only linked
+    to its address once complete and synced, so readers never see a partial
+    blob and identical uploads keep the first copy.
+
+    Storing and deleting a blob take an exclusive ``flock`` on one of 256
+    lock files picked by the digest prefix, so that an upload linking to an
+    existing blob and the deletion of its last reference cannot interleave
+    between processes.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.temp_dir = os.path.join(root, "tmp")
+        self.lock_dir = os.path.join(root, "locks")
+        # One waiter per lock file and process, so waiting doesn't hold more than one thread each
+        self._local_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def path(self, digest: str) -> str:
+        if not DIGEST_PATTERN.fullmatch(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    async def stage(self, chunks: AsyncIterator[bytes], max_size: Optional[int] = None) -> StagedBlob:
+        """
+        Write content read chunk by chunk to a temporary file while hashing it
+
+        Args:
+            chunks (AsyncIterator[bytes]): Content chunks
+            max_size (Optional[int]): Size limit in bytes, unlimited if None
+
+        Returns:
+            StagedBlob: Digest and size of the content, and its temporary path
+
+        Raises:
+            FileTooLargeError: If the content exceeds ``max_size``
+        """
+        os.makedirs(self.temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise FileTooLargeError(f"File exceeds {max_size} bytes")
+                    # Hashing and writing release the GIL, one thread hop per chunk
+                    await asyncio.to_thread(self._write_chunk, temp_file, digest, chunk)
+                await asyncio.to_thread(self._sync, temp_file)
+        except BaseException:
+            self._unlink(temp_path)
+            raise
+        return StagedBlob(digest.hexdigest(), size, temp_path)
+
+    async def store(self, staged: StagedBlob) -> StoredBlob:
+        """
+        Link staged content to its address
+
+        Must be called while holding ``lock(staged.digest)``, up to the point
+        where the reference to the blob is persisted.
+
+        Returns:
+            StoredBlob: Digest and size of the content, and whether it was new
+        """
+        created = await asyncio.to_thread(self._link, staged.temp_path, staged.digest)
+        return StoredBlob(staged.digest, staged.size, created)
+
+    async def discard(self, staged: StagedBlob) -> None:
+        await asyncio.to_thread(self._unlink, staged.temp_path)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, digest: str) -> AsyncIterator[None]:
+        """
+        Hold the lock guarding the blob against concurrent storing and deletion
+
+        Args:
+            digest (str): Blob digest
+        """
+        stripe = os.path.basename(self.path(digest))[:2]
+        async with self._local_locks[stripe]:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            lock_file = open(os.path.join(self.lock_dir, stripe), "a")
+            acquiring = asyncio.ensure_future(asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX))
+            try:
+                await asyncio.shield(acquiring)
+            except BaseException:
+                # The thread may still get the lock: closing the file releases it
+                acquiring.add_done_callback(lambda _: lock_file.close())
+                raise
+            try:
+                yield
+            finally:
+                lock_file.close()
+
+    @staticmethod
+    def _write_chunk(temp_file: IO[bytes], digest, chunk: bytes) -> None:
+        digest.update(chunk)
+        temp_file.write(chunk)
+
+    @staticmethod
+    def _sync(temp_file: IO[bytes]) -> None:
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+
+    def _link(self, temp_path: str, digest: str) -> bool:
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Unlike a rename, a hard link never replaces a blob another upload stored first
+            os.link(temp_path, path)
+        except FileExistsError:
+            return False
+        return True
+
+    async def exists(self, digest: str) -> bool:
+        return await asyncio.to_thread(os.path.isfile, self.path(digest))
+
+    async def delete(self, digest: str) -> None:
+        await asyncio.to_thread(self._unlink, self.path(digest))
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
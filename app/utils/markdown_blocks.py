@@ -0,0 +1,83 @@
+import re
+from typing import NamedTuple
+
+
+HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}(\s|$)")
+LIST_ITEM_PATTERN = re.compile(r"^\s*([-*+]|\d+[.)])\s")
+FENCE_PATTERN = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+# Front matter needs a YAML ``key:`` or TOML ``key =`` line right after the opening fence, so that
+# a leading thematic break followed by another one further down stays content
+FRONT_MATTER_PATTERN = re.compile(
+    r"\A(?:"
+    r"(---)[ \t]*\r?\n(?=(?:[\w-]+|\"[^\"\n]*\"|'[^'\n]*')[ \t]*:(?:[ \t]|\r?$))"
+    r"|(\+\+\+)[ \t]*\r?\n(?=(?:[\w-]+|\"[^\"\n]*\")(?:\.[\w-]+)*[ \t]*=|\[)"
+    r").*?^(?:\1|\2)[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+class MarkdownBlock(NamedTuple):
+    text: str
+    offset: int
+
+
+def split_markdown_blocks(text: str) -> list[MarkdownBlock]:
+    """
+    Split markdown into top-level blocks: paragraphs, headings, list items
+    and fenced code blocks. YAML/TOML front matter is skipped.
+
+    Args:
+        text (str): Markdown content
+
+    Returns:
+        list[MarkdownBlock]: Blocks in document order with their offset in ``text``
+    """
+    blocks = []
+    start = None
+    end = 0
+    fence = None
+    front_matter = FRONT_MATTER_PATTERN.match(text)
+    offset = front_matter.end() if front_matter else 0
+
+    def flush():
+        if start is not None:
+            blocks.append(MarkdownBlock(text[start:end], start))
+
+    for line in text[offset:].splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+        content = line.rstrip("\r\n")
+        line_end = line_start + len(content)
+
+        if fence is not None:
+            end = line_end
+            if content.lstrip().startswith(fence):
+                flush()
+                start, fence = None, None
+            continue
+
+        fence_match = FENCE_PATTERN.match(content)
+        if fence_match:
+            flush()
+            start, end = line_start, line_end
+            fence = fence_match.group(1)
+            continue
+
+        if not content.strip():
+            flush()
+            start = None
+            continue
+
+        if HEADING_PATTERN.match(content):
+            flush()
+            blocks.append(MarkdownBlock(content, line_start))
+            start = None
+            continue
+
+        if start is None or LIST_ITEM_PATTERN.match(content):
+            flush()
+            start = line_start
+        end = line_end
+
+    flush()
+    return blocks
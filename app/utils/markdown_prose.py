@@ -0,0 +1,129 @@
+from bisect import bisect_right
+from functools import cache
+from typing import Callable, NamedTuple
+
+from app.utils.markdown_blocks import split_markdown_blocks
+
+
+@cache
+def _markdown_parser() -> Callable[[str], list[dict]]:
+    # AST-only parser, built on first use and reused across calls
+    from mistune import create_markdown
+
+    return create_markdown(renderer=None, plugins=["table", "url", "strikethrough"])
+
+# Containers whose text is prose
+PROSE_CONTAINERS = {
+    "paragraph", "heading", "block_text", "block_quote", "list", "list_item",
+    "emphasis", "strong", "strikethrough", "link",
+}
+# Emphasis markers can be dropped without separating the surrounding words
+EMPHASIS_MARKUP = set("*_~")
+
+
+class ProseBlock(NamedTuple):
+    """
+    Prose of a markdown block with a map from prose offsets back to the source.
+
+    ``prose_starts[i]`` in ``text`` corresponds to ``source_starts[i]`` in the
+    original document; characters in between map one to one.
+    """
+    text: str
+    prose_starts: list[int]
+    source_starts: list[int]
+
+    def to_source(self, offset: int) -> int:
+        """
+        Map an offset in ``text`` to an offset in the original document
+
+        Args:
+            offset (int): Offset in the prose text
+
+        Returns:
+            int: Offset in the source markdown
+        """
+        run = max(bisect_right(self.prose_starts, offset) - 1, 0)
+        return self.source_starts[run] + offset - self.prose_starts[run]
+
+
+def _text_fragments(tokens: list[dict]):
+    for token in tokens:
+        token_type = token["type"]
+        if token_type == "text":
+            yield token["raw"]
+        elif token_type == "link":
+            children = token.get("children", [])
+            # Autolinked bare URLs are not prose
+            if [child.get("raw") for child in children] == [token["attrs"]["url"]]:
+                continue
+            yield from _text_fragments(children)
+        elif token_type in PROSE_CONTAINERS:
+            yield from _text_fragments(token.get("children", []))
+
+
+def extract_prose(source: str, offset: int = 0) -> ProseBlock:
+    """
+    Extract the prose of a markdown fragment. Code, inline HTML, images,
+    tables and link URLs are left out.
+
+    Args:
+        source (str): Markdown fragment
+        offset (int): Offset of ``source`` in the document
+
+    Returns:
+        ProseBlock: Prose text and its offset map
+    """
+    parts: list[str] = []
+    prose_starts: list[int] = []
+    source_starts: list[int] = []
+    length = 0
+    cursor = 0
+
+    def append(text: str, source_start: int) -> None:
+        nonlocal length
+        parts.append(text)
+        prose_starts.append(length)
+        source_starts.append(offset + source_start)
+        length += len(text)
+
+    for fragment in _text_fragments(_markdown_parser()(source)):
+        position = source.find(fragment, cursor)
+        if position < 0:
+            # Text rewritten by the parser (e.g. escapes) is not in the source verbatim
+            continue
+
+        gap = source[cursor:position]
+        if parts and gap:
+            if gap.isspace():
+                append(gap, cursor)
+            elif not set(gap) <= EMPHASIS_MARKUP:
+                if parts[-1][-1:].isspace():
+                    stripped = fragment.lstrip()
+                    position += len(fragment) - len(stripped)
+                    fragment = stripped
+                elif not fragment[:1].isspace():
+                    append(" ", cursor)
+
+        if fragment:
+            append(fragment, position)
+        cursor = position + len(fragment)
+
+    return ProseBlock("".join(parts), prose_starts, source_starts)
+
+
+def extract_prose_blocks(md_file: str) -> list[ProseBlock]:
+    """
+    Split markdown into blocks and extract the prose of each
+
+    Args:
+        md_file (str): Markdown content
+
+    Returns:
+        list[ProseBlock]: Blocks that contain prose, in document order
+    """
+    blocks = []
+    for block in split_markdown_blocks(md_file):
+        prose = extract_prose(block.text, block.offset)
+        if prose.text.strip():
+            blocks.append(prose)
+    return blocks
@@ -1,21 +1,34 @@
+import asyncio
+import codecs
+import io
+import logging
+import mmap
+import os
 import re
-from typing import Optional
+import tempfile
+from typing import IO, Optional
 
 from fastapi import UploadFile, HTTPException, status
-import magic
-from mistune import create_markdown
-from mistune.renderers.html import HTMLRenderer
 
+from app.services.markdown_service import MarkdownService
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
 
 class NoteUtilities:
     """
     Utility functions for note operations
     """
     
+    ALLOWED_EXTENSIONS = ('.md', '.markdown', '.mdown', '.mkdn')
+    ALLOWED_MIMES = ('text/markdown', 'text/x-markdown', 'text/plain')
+    MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
+    CHUNK_SIZE = 64 * 1024
+    
     @staticmethod
-    async def validate_markdown_file(md_file: UploadFile):
+    def validate_markdown_file(md_file: UploadFile):
         """
-        Comprehensive markdown file validation
+        Cheap markdown file checks that need no file content
         
         Args:
             md_file (UploadFile): Uploaded file to validate
@@ -24,39 +37,98 @@ class NoteUtilities:
             HTTPException: If file fails validation
         """
         # Validate file extension
-        ALLOWED_EXTENSIONS = ('.md', '.markdown', '.mdown', '.mkdn')
-        if not any(md_file.filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS):
+        if not md_file.filename or not md_file.filename.lower().endswith(NoteUtilities.ALLOWED_EXTENSIONS):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Only markdown files are allowed"
             )
         
-        # Validate file MIME type using python-magic
-        file_mime = magic.from_buffer(await md_file.read(2048), mime=True)
-        allowed_mimes = [
-            'text/markdown', 
-            'text/x-markdown', 
-            'text/plain'
-        ]
-        if file_mime not in allowed_mimes:
+        # Reject on the declared size before reading anything
+        if md_file.size is not None and md_file.size > NoteUtilities.MAX_FILE_SIZE:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type. Must be a markdown file"
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File exceeds 5MB limit"
             )
+    
+    @staticmethod
+    def _upload_size(md_file: UploadFile) -> int:
+        """Actual size of the spooled upload, whatever the client declared"""
+        file = md_file.file
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return size
+    
+    @staticmethod
+    def _map_upload(file: IO[bytes]) -> Optional[mmap.mmap]:
+        """Memory map of an upload spooled to disk, None if it is still in memory"""
+        if isinstance(file, tempfile.SpooledTemporaryFile):
+            # fileno() would roll an in-memory spool over to disk
+            file = file._file
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation):
+            return None
+    
+    @staticmethod
+    def _decode_mapped(mapped: mmap.mmap) -> str:
+        with mapped:
+            return str(mapped, 'utf-8')
+    
+    @staticmethod
+    async def read_markdown_file(md_file: UploadFile) -> str:
+        """
+        Read and decode a markdown upload. The size limit is checked against
+        the spooled file before anything is read and the MIME type is sniffed
+        from its first bytes. Uploads spooled to disk are decoded from a memory
+        map, so only the decoded text is allocated; smaller ones are decoded
+        chunk by chunk.
         
-        # Reset file pointer
-        await md_file.seek(0)
+        Args:
+            md_file (UploadFile): Uploaded file to read
         
-        # File size validation
-        max_file_size = 5 * 1024 * 1024  # 5 MB
-        file_size = len(await md_file.read())
-        await md_file.seek(0)
+        Returns:
+            str: Decoded file content
         
-        if file_size > max_file_size:
+        Raises:
+            HTTPException: If file is too large, not markdown or not UTF-8
+        """
+        size = NoteUtilities._upload_size(md_file)
+        if size > NoteUtilities.MAX_FILE_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail="File exceeds 5MB limit"
             )
+        
+        await md_file.seek(0)
+        head = await md_file.read(2048)
+        if head:
+            # Validate file MIME type using python-magic, loaded with the first upload
+            import magic
+
+            file_mime = magic.from_buffer(head, mime=True)
+        if not head or file_mime not in NoteUtilities.ALLOWED_MIMES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Must be a markdown file"
+            )
+        
+        try:
+            mapped = NoteUtilities._map_upload(md_file.file)
+            if mapped is not None:
+                return await asyncio.to_thread(NoteUtilities._decode_mapped, mapped)
+            
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            parts = [decoder.decode(head)]
+            while chunk := await md_file.read(NoteUtilities.CHUNK_SIZE):
+                parts.append(decoder.decode(chunk))
+            parts.append(decoder.decode(b'', final=True))
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File must be UTF-8 encoded"
+            )
+        return ''.join(parts)
     
     @staticmethod
     async def process_markdown_content(
@@ -83,21 +155,16 @@ class NoteUtilities:
             )
         
         if md_file:
-            # Validate markdown file
-            await NoteUtilities.validate_markdown_file(md_file)
-            
-            # Read file content
-            try:
-                content = await md_file.read()
-                content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="File must be UTF-8 encoded"
-                )
+            # Validate and read markdown file in a single streaming pass
+            with span("validate_file"):
+                NoteUtilities.validate_markdown_file(md_file)
+            with span("read_file"):
+                content = await NoteUtilities.read_markdown_file(md_file)
         else:
             # Validate markdown text
-            if not NoteUtilities.is_valid_markdown(md_text):
+            with span("validate_markdown"):
+                valid = NoteUtilities.is_valid_markdown(md_text)
+            if not valid:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid markdown content"
@@ -135,10 +202,9 @@ class NoteUtilities:
             return False
 
         try:
-            markdown = create_markdown(renderer=HTMLRenderer())
-            html = markdown(text)
+            html = MarkdownService.render_markdown_to_html(text)
             # Ensure the rendered HTML contains meaningful content
             return bool(html.strip() and html != text)
         except Exception as e:
-            print(f"Markdown parsing error: {e}")
+            logger.warning("Markdown parsing error: %s", e)
             return False
\ No newline at end of file
@@ -0,0 +1,240 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Optional, Union
+
+
+class RecordError(ValueError):
+    """A record of the stream could not be decoded"""
+
+
+Record = Union[Any, RecordError]
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# Characters that can continue a number cut at the end of the buffer
+_NUMBER_CHARS = "0123456789.eE+-"
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+# What ends or nests an element skipped without decoding it, outside and inside strings
+_STRUCTURE = re.compile(r'["\[\]{},]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def _too_large(max_record_bytes: int) -> RecordError:
+    return RecordError(f"Record larger than {max_record_bytes} bytes")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_record_bytes: Optional[int] = None) -> AsyncIterator[Record]:
+    """
+    Decode newline-delimited JSON from a byte stream, one line at a time
+
+    Args:
+        chunks (AsyncIterator[bytes]): Request body chunks
+        max_record_bytes (Optional[int]): Longest line kept; longer ones are discarded up to the next newline
+
+    Yields:
+        The decoded record, or a RecordError for lines that aren't valid JSON or are too long. Blank lines are skipped.
+    """
+    # Pieces of the current line, joined once it is complete
+    pending: list[bytes] = []
+    pending_size = 0
+    # Set while the rest of a line that was too long is discarded
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while (newline := chunk.find(b"\n", start)) != -1:
+            if not skipping:
+                pending.append(chunk[start:newline])
+                line = b"".join(pending)
+                if max_record_bytes is not None and len(line) > max_record_bytes:
+                    yield _too_large(max_record_bytes)
+                elif line.strip():
+                    yield _decode_line(line)
+            pending.clear()
+            pending_size = 0
+            skipping = False
+            start = newline + 1
+        if start < len(chunk) and not skipping:
+            pending.append(chunk[start:])
+            pending_size += len(chunk) - start
+            if max_record_bytes is not None and pending_size > max_record_bytes:
+                pending.clear()
+                skipping = True
+                yield _too_large(max_record_bytes)
+    line = b"".join(pending)
+    if max_record_bytes is not None and len(line) > max_record_bytes:
+        yield _too_large(max_record_bytes)
+    elif line.strip():
+        yield _decode_line(line)
+
+
+def _decode_line(line: bytes) -> Record:
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return RecordError(f"Invalid JSON: {e}")
+
+
+def _truncated(buffer: str, error: json.JSONDecodeError) -> bool:
+    # Whether the element failed to decode only because the buffer ends within it
+    if error.pos >= len(buffer) or error.msg == "Unterminated string starting at":
+        return True
+    if error.msg == "Invalid \\uXXXX escape":
+        # Reported at the backslash of an escape, or surrogate pair of escapes, that may be cut
+        return len(buffer) - error.pos <= len("\\ud83d\\ude00")
+    tail = buffer[error.pos:]
+    return any(literal.startswith(tail) for literal in _LITERALS)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes], max_record_bytes: Optional[int] = None) -> AsyncIterator[Record]:
+    """
+    Decode the elements of a top-level JSON array as they arrive, without
+    buffering the whole body
+
+    An element cut by the end of the buffer is decoded again once at least
+    as much data as it already has has arrived, so large elements cost
+    linear time.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Request body chunks
+        max_record_bytes (Optional[int]): Largest element kept; larger ones are
+            discarded up to the next separator. Measured in decoded characters,
+            which never outnumber the bytes they were decoded from.
+
+    Yields:
+        Each array element, or a RecordError for elements that are too large.
+        A RecordError is yielded and decoding stops if the array is malformed.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    # What comes next: "[", the first element or "]", an element, or "," or "]"
+    expected = "open"
+
+    async def more(minimum: int = 1) -> bool:
+        # Append at least ``minimum`` characters to the unparsed part of the buffer
+        nonlocal buffer, position
+        pieces = [buffer[position:]]
+        received = 0
+        while received < minimum:
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+            try:
+                decoded = text_decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                raise RecordError(f"Invalid UTF-8: {e}")
+            pieces.append(decoded)
+            received += len(decoded)
+        buffer = "".join(pieces)
+        position = 0
+        return received > 0
+
+    def wanted() -> int:
+        # Characters to read before decoding the pending element again, without outgrowing the limit much
+        pending = len(buffer) - position
+        if max_record_bytes is None:
+            return pending
+        return max(1, min(pending, max_record_bytes + 1 - pending))
+
+    async def skip() -> None:
+        # Discard the element at ``position`` up to the "," or "]" after it
+        nonlocal position
+        depth = 0
+        in_string = False
+        while True:
+            while position < len(buffer):
+                if in_string:
+                    match = _STRING_SPECIAL.search(buffer, position)
+                    if match is None:
+                        position = len(buffer)
+                        break
+                    # Past an escape's character, or the closing quote
+                    position = match.end() + (match.group() == "\\")
+                    in_string = match.group() == "\\"
+                    continue
+                match = _STRUCTURE.search(buffer, position)
+                if match is None:
+                    position = len(buffer)
+                    break
+                char = match.group()
+                if char == '"':
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                elif not depth:
+                    # The separator or closing bracket after the element
+                    position = match.start()
+                    return
+                elif char in "]}":
+                    depth -= 1
+                position = match.end()
+            # An escape cut at the end of the buffer skips the first character of the next chunk
+            overflow = position - len(buffer)
+            position = len(buffer)
+            if not await more():
+                return
+            position = overflow
+
+    chunks = chunks.__aiter__()
+    try:
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                if not await more():
+                    break
+                continue
+
+            char = buffer[position]
+            if expected == "open":
+                if char != "[":
+                    raise RecordError("Expected a JSON array")
+                expected = "first"
+                position += 1
+                continue
+            if char == "]" and expected in ("first", "separator"):
+                expected = "closed"
+                break
+            if expected == "separator":
+                if char != ",":
+                    raise RecordError("Expected ',' or ']' after an array element")
+                expected = "element"
+                position += 1
+                continue
+
+            try:
+                record, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if not _truncated(buffer, e):
+                    raise RecordError(f"Invalid JSON array element: {e.msg}")
+                if max_record_bytes is not None and len(buffer) - position > max_record_bytes:
+                    await skip()
+                    expected = "separator"
+                    yield _too_large(max_record_bytes)
+                    continue
+                if not await more(wanted()):
+                    raise RecordError(f"Invalid JSON array element: {e.msg}")
+                continue
+            if (
+                isinstance(record, (int, float))
+                and not isinstance(record, bool)
+                and not buffer[end:].strip(_NUMBER_CHARS)
+            ):
+                # A number at the end of the buffer may still be incomplete
+                if await more(wanted()):
+                    continue
+            expected = "separator"
+            if max_record_bytes is not None and end - position > max_record_bytes:
+                position = end
+                yield _too_large(max_record_bytes)
+                continue
+            position = end
+            yield record
+    except RecordError as e:
+        yield e
+        return
+
+    if expected != "closed":
+        yield RecordError("Unterminated JSON array")
@@ -0,0 +1,121 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiler import SamplingProfiler, profile_filename
+from app.utils.prometheus import REQUEST_DURATION
+from app.utils.tracing import current_timings, record, start_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ServerTimingMiddleware:
+    """
+    Collects the spans of each request into a ``Server-Timing`` header and
+    the request latency histogram.
+
+    With the profiler enabled, requests sent with an ``X-Profile`` header
+    are sampled, and the collapsed stacks of those slower than
+    ``slow_request_seconds`` are written to ``profile_dir``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler_enabled: bool = False,
+        profiler_interval: float = 0.005,
+        slow_request_seconds: float = 1.0,
+        profile_dir: str = "profiles",
+    ) -> None:
+        self.app = app
+        self.profiler_enabled = profiler_enabled
+        self.profiler_interval = profiler_interval
+        self.slow_request_seconds = slow_request_seconds
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request()
+        profiler = None
+        if self.profiler_enabled and any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            profiler = SamplingProfiler(self.profiler_interval)
+            profiler.start()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                now = time.perf_counter()
+                if timings.endpoint_done is not None:
+                    record("serialize", now - timings.endpoint_done)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing(now - timings.started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - timings.started
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                duration, scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            )
+            if profiler is not None:
+                await asyncio.to_thread(profiler.stop)
+                if duration >= self.slow_request_seconds:
+                    await asyncio.to_thread(self._save_profile, profiler, scope, duration)
+
+    def _save_profile(self, profiler: SamplingProfiler, scope: Scope, duration: float) -> None:
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, profile_filename(scope["method"], scope["path"], duration))
+            profiler.write(path)
+        except OSError:
+            logger.exception("Could not write profile of %s %s", scope["method"], scope["path"])
+            return
+        logger.warning("Slow request %s %s took %.0f ms, profile written to %s",
+                       scope["method"], scope["path"], duration * 1000, path)
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # include_router re-creates routes from the already wrapped endpoint
+    if not asyncio.iscoroutinefunction(endpoint) or getattr(endpoint, "_timed", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        timings = current_timings()
+        started = time.perf_counter()
+        if timings is not None:
+            # Body parsing, validation and dependencies
+            record("parse", started - timings.started)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            done = time.perf_counter()
+            record("handler", done - started)
+            if timings is not None:
+                timings.endpoint_done = done
+
+    timed._timed = True
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """Route recording parse, handler and serialize stages around the endpoint"""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
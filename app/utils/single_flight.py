@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+from app.utils.cache_redis import CacheHandler as RedisCacheHandler
+
+logger = logging.getLogger(__name__)
+
+# Result of a leader that was cancelled before finishing
+_ABANDONED = object()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same key.
+
+    Within a process, duplicates await the future of the first caller. If
+    that caller is cancelled, one of them takes over the computation.
+    Across processes, the first caller takes a Redis lease, renewed while it
+    computes, and the others poll the shared cache for its result until the
+    lease is released or expires, after which one of them computes it.
+    """
+
+    def __init__(
+        self,
+        redis_cache: RedisCacheHandler,
+        lease_timeout: float = 60.0,
+        poll_interval: float = 0.1,
+    ) -> None:
+        """
+        Initialize single-flight coordination
+
+        Args:
+            redis_cache (RedisCacheHandler): Redis handler used for cross-process leases.
+            lease_timeout (float): Seconds before a lease held by a crashed worker expires.
+            poll_interval (float): Seconds between cache polls while another worker computes.
+        """
+        self.redis_cache = redis_cache
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+        self.lease_timeouts = 0
+
+    async def run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        fetch: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        """
+        Return the result for ``key``, computing it at most once at a time
+
+        Args:
+            key (str): Coalescing key
+            compute (Callable): Computes the result and stores it where ``fetch`` finds it
+            fetch (Callable): Reads a result stored by another worker, None if absent
+
+        Returns:
+            The computed or coalesced result
+        """
+        while (future := self._in_flight.get(key)) is not None:
+            result = await asyncio.shield(future)
+            if result is not _ABANDONED:
+                self.coalesced_local += 1
+                return result
+            # The leader was cancelled: take over, or follow whoever did first
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._run_leader(key, compute, fetch)
+        except asyncio.CancelledError:
+            # Only this caller was cancelled, not the ones waiting for it
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    async def _renew_lease(self, lease_key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            if await self.redis_cache.renew_lease(lease_key, token, self.lease_timeout) is False:
+                logger.warning("Lost the single-flight lease %s", lease_key)
+                return
+
+    async def _run_leader(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        fetch: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        lease_key = f"lease:{key}"
+        token = uuid.uuid4().hex
+        waited = False
+        while True:
+            acquired = await self.redis_cache.acquire_lease(lease_key, token, self.lease_timeout)
+            if acquired is not False:
+                # Lease taken, or Redis unavailable and we cannot coordinate
+                break
+
+            # Another worker is computing and renewing its lease: wait for its result
+            waited = True
+            await asyncio.sleep(self.poll_interval)
+            result = await fetch()
+            if result is not None:
+                self.coalesced_remote += 1
+                return result
+
+        renewal = None
+        try:
+            if acquired:
+                if waited:
+                    # The previous holder expired or was released without storing a result
+                    self.lease_timeouts += 1
+                # Stored by a holder that released the lease since the last poll
+                result = await fetch()
+                if result is not None:
+                    self.coalesced_remote += 1
+                    return result
+                renewal = asyncio.create_task(self._renew_lease(lease_key, token))
+            self.leaders += 1
+            return await compute()
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            if acquired:
+                await self.redis_cache.release_lease(lease_key, token)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced_local": self.coalesced_local,
+            "coalesced_remote": self.coalesced_remote,
+            "lease_timeouts": self.lease_timeouts,
+        }
@@ -0,0 +1,86 @@
+from difflib import SequenceMatcher
+from typing import Union
+
+# A delta is a list of operations building the new text from the old one's
+# lines: ``[start, end]`` copies old lines ``start:end``, a string is inserted
+DeltaOp = Union[list[int], str]
+
+
+def split_lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def make_delta(old: list[str], new: list[str]) -> list[DeltaOp]:
+    """
+    Line-based delta turning one text into another
+
+    The common prefix and suffix are matched first, so a local edit of a
+    large text only diffs the lines around it.
+
+    Args:
+        old (list[str]): Lines of the old text, from ``split_lines``
+        new (list[str]): Lines of the new text, from ``split_lines``
+
+    Returns:
+        list[DeltaOp]: Operations for ``apply_delta``
+    """
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-suffix - 1] == new[-suffix - 1]:
+        suffix += 1
+
+    ops: list[DeltaOp] = []
+
+    def copy(start: int, end: int) -> None:
+        if start == end:
+            return
+        if ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+            ops[-1][1] = end
+        else:
+            ops.append([start, end])
+
+    def insert(lines: list[str]) -> None:
+        if not lines:
+            return
+        if ops and isinstance(ops[-1], str):
+            ops[-1] += "".join(lines)
+        else:
+            ops.append("".join(lines))
+
+    copy(0, prefix)
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    if old_middle and new_middle:
+        matcher = SequenceMatcher(None, old_middle, new_middle)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                copy(prefix + i1, prefix + i2)
+            else:
+                insert(new_middle[j1:j2])
+    else:
+        insert(new_middle)
+    copy(len(old) - suffix, len(old))
+    return ops
+
+
+def apply_delta(old: list[str], delta: list[DeltaOp]) -> list[str]:
+    """
+    Apply a delta from ``make_delta``
+
+    Args:
+        old (list[str]): Lines of the text the delta was made from
+        delta (list[DeltaOp]): The delta
+
+    Returns:
+        list[str]: Lines of the new text
+    """
+    new: list[str] = []
+    for op in delta:
+        if isinstance(op, str):
+            new.extend(split_lines(op))
+        else:
+            new.extend(old[op[0]:op[1]])
+    return new
@@ -0,0 +1,63 @@
+from typing import Any, Optional
+
+from app.utils.cache_redis import CacheHandler as RedisCacheHandler
+from app.utils.caching_in_memory import CacheHandler as MemoryCacheHandler
+
+
+class TieredCache:
+    """
+    Bounded in-process LRU (L1) in front of Redis (L2).
+
+    Reads try L1 first and promote L2 hits into L1; writes go to both tiers.
+    L1 is synchronous and in-process, L2 is an asyncio Redis client.
+    When Redis is unreachable the L2 handler degrades to misses/no-ops, so
+    the cache keeps working from L1 alone.
+    """
+
+    def __init__(self, l1: MemoryCacheHandler, l2: RedisCacheHandler) -> None:
+        self.l1 = l1
+        self.l2 = l2
+
+    async def get(self, key: str, decode: bool = True) -> Optional[Any]:
+        return (await self.get_many([key], decode))[0]
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.set_many({key: value})
+
+    async def get_many(self, keys: list[str], decode: bool = True) -> list[Optional[Any]]:
+        """
+        Retrieve several values, asking Redis only for keys missing from L1
+
+        Args:
+            keys (list[str]): The cache keys
+            decode (bool): Decode JSON read from Redis. Use False for entries stored as bytes.
+
+        Returns:
+            list: Cached values in key order, None for missing keys
+        """
+        values = self.l1.get_many(keys)
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            fetched = await self.l2.get_many([keys[index] for index in missing], decode)
+            for index, value in zip(missing, fetched):
+                if value is not None:
+                    values[index] = value
+                    self.l1.set(keys[index], value)
+        return values
+
+    async def set_many(self, items: dict[str, Any]) -> None:
+        self.l1.set_many(items)
+        await self.l2.set_many(items)
+
+    async def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        await self.l2.delete(key)
+
+    async def clear(self, pattern: str = "*") -> int:
+        return max(self.l1.clear(pattern), await self.l2.clear(pattern))
+
+    async def close(self) -> None:
+        await self.l2.close()
+
+    def stats(self) -> dict:
+        return {"l1": self.l1.stats(), "l2": self.l2.stats()}
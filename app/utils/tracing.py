@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.utils.prometheus import STAGE_DURATION
+
+
+class RequestTimings:
+    """Stage durations of one request, in the order the stages first ran"""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        # When the endpoint returned; the rest until the response starts is serialization
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, duration: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def server_timing(self, total: float) -> str:
+        """
+        Format the stages as a ``Server-Timing`` header value
+
+        Args:
+            total (float): Request duration in seconds
+
+        Returns:
+            str: e.g. ``cache;dur=0.4, languagetool;dur=812.5, total;dur=815.2``
+        """
+        entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in self.stages.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """Start collecting spans for the current request"""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record(name: str, duration: float) -> None:
+    """Record a stage duration measured by the caller"""
+    STAGE_DURATION.observe(duration, name)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a processing stage
+
+    The duration is added to the latency histogram of the stage and, inside
+    a request, to its ``Server-Timing`` header. Spans with the same name in
+    one request are summed.
+
+    Args:
+        name (str): Stage name, a Server-Timing token (no spaces)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
@@ -0,0 +1,74 @@
+import asyncio
+import zipfile
+from datetime import datetime
+from typing import IO, AsyncIterator, Iterable, NamedTuple
+
+
+class ZipEntry(NamedTuple):
+    name: str
+    path: str
+    size: int
+    modified: datetime
+    compress: bool
+
+
+class _Sink:
+    # Write-only, unseekable target: zipfile then writes sizes and CRCs after each entry's data
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _copy_chunk(source: IO[bytes], target: IO[bytes], chunk_size: int) -> bool:
+    chunk = source.read(chunk_size)
+    target.write(chunk)
+    return bool(chunk)
+
+
+async def stream_zip(
+    entries: Iterable[ZipEntry],
+    chunk_size: int = 256 * 1024,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a zip archive of local files as it is written, holding at most one
+    compressed chunk in memory
+
+    Args:
+        entries (Iterable[ZipEntry]): Files to archive. Entries with ``compress``
+            unset are stored as is, for content that is already compressed.
+        chunk_size (int): Bytes read from a file at a time
+
+    Yields:
+        bytes: The next part of the archive
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w")
+    for entry in entries:
+        info = zipfile.ZipInfo(entry.name, date_time=entry.modified.timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if entry.compress else zipfile.ZIP_STORED
+        # Lets zipfile pick zip64 headers up front for large files
+        info.file_size = entry.size
+        # Opening, reading, deflating and closing run off the event loop
+        source = await asyncio.to_thread(open, entry.path, "rb")
+        try:
+            with archive.open(info, "w") as target:
+                while await asyncio.to_thread(_copy_chunk, source, target, chunk_size):
+                    if data := sink.take():
+                        yield data
+        finally:
+            await asyncio.to_thread(source.close)
+        if data := sink.take():
+            yield data
+    archive.close()
+    yield sink.take()
@@ -0,0 +1,109 @@
+"""
+Grammar check cache hit path: decoding the cached JSON and letting FastAPI
+validate and re-encode it, vs serving the cached response bytes as is.
+
+Usage: python -m benchmarks.bench_cached_grammar_response
+"""
+import asyncio
+import json
+import time
+import tracemalloc
+
+import httpx
+import orjson
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.grammar_schema import GrammarCheckResponse
+
+
+def make_result(issues: int) -> dict:
+    errors = [
+        {
+            "line": index + 1,
+            "column": 12,
+            "message": "Possible spelling mistake found.",
+            "suggestion": "the",
+            "context": "The quick brown fox jumps over teh lazy dog.\nIt rests for a while.",
+        }
+        for index in range(issues)
+    ]
+    return GrammarCheckResponse(has_errors=bool(errors), total_issues=issues, errors=errors).model_dump()
+
+
+def decode_and_reencode(stored: str) -> bytes:
+    # What a hit used to cost: Redis JSON -> dict -> response model -> JSON
+    result = json.loads(stored)
+    model = GrammarCheckResponse.model_validate(result)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def passthrough(stored: bytes) -> bytes:
+    return Response(stored, media_type="application/json").body
+
+
+def measure(fn, stored, rounds: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(stored)
+    elapsed = (time.perf_counter() - started) / rounds
+
+    tracemalloc.start()
+    fn(stored)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1_000_000, peak
+
+
+def build_app(stored_json: str, stored_bytes: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before", response_model=GrammarCheckResponse)
+    async def before():
+        return json.loads(stored_json)
+
+    @app.get("/after", response_model=GrammarCheckResponse)
+    async def after():
+        return Response(stored_bytes, media_type="application/json")
+
+    return app
+
+
+async def measure_requests(app: FastAPI, path: str, rounds: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await client.get(path)
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+async def main() -> None:
+    print("Serialization step")
+    print(f"{'issues':>7} {'body KiB':>9} {'before µs':>10} {'after µs':>9} {'before peak KiB':>16} {'after peak KiB':>15}")
+    for issues in (0, 10, 100, 1000):
+        result = make_result(issues)
+        stored_json = json.dumps(result)
+        stored_bytes = orjson.dumps(result)
+        rounds = max(20, 20_000 // (issues + 1))
+        before_time, before_peak = measure(decode_and_reencode, stored_json, rounds)
+        after_time, after_peak = measure(passthrough, stored_bytes, rounds)
+        print(f"{issues:>7} {len(stored_bytes) / 1024:>9.1f} {before_time:>10.1f} {after_time:>9.1f} "
+              f"{before_peak / 1024:>16.1f} {after_peak / 1024:>15.1f}")
+
+    print()
+    print("Full request through FastAPI")
+    print(f"{'issues':>7} {'before µs':>10} {'after µs':>9}")
+    for issues in (0, 10, 100, 1000):
+        result = make_result(issues)
+        app = build_app(json.dumps(result), orjson.dumps(result))
+        rounds = max(50, 5_000 // (issues + 1))
+        before_time = await measure_requests(app, "/before", rounds)
+        after_time = await measure_requests(app, "/after", rounds)
+        print(f"{issues:>7} {before_time:>10.1f} {after_time:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Bulk import throughput (notes/sec) for different transaction batch sizes,
+against one commit per note as /notes/save does.
+
+Usage: python -m benchmarks.bench_import_notes [notes]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.note_schema import NoteCreate
+from app.services.note_service import NoteService
+from app.utils.record_stream import iter_ndjson
+
+
+def build_body(notes: int) -> bytes:
+    lines = (json.dumps({"title": f"note {i}", "content": f"# Note {i}\n\n" + "Some text. " * 50}) for i in range(notes))
+    return "\n".join(lines).encode("utf-8")
+
+
+async def stream(body: bytes, chunk_size: int = 64 * 1024):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+async def run(notes: int, batch_size: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+        body = build_body(notes)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            service = NoteService(session)
+            started = time.perf_counter()
+            if batch_size:
+                results = await service.import_notes(iter_ndjson(stream(body)), batch_size=batch_size)
+                assert len(results) == notes
+            else:
+                async for record in iter_ndjson(stream(body)):
+                    await service.save_note(NoteCreate.model_validate(record))
+            elapsed = time.perf_counter() - started
+        await engine.dispose()
+    return notes / elapsed
+
+
+async def main() -> None:
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{'mode':>16} {'notes/sec':>10}")
+    single = await run(min(notes, 2000), 0)
+    print(f"{'commit per note':>16} {single:>10.0f}")
+    for batch_size in (100, 1000, 5000):
+        rate = await run(notes, batch_size)
+        print(f"{'batch ' + str(batch_size):>16} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Accuracy and latency of the local language detector used for ``auto``
+grammar checks.
+
+Accuracy is measured on a multilingual corpus truncated to increasing
+lengths: by default the sentences below, none of which are in the
+detector's sample prose, or a Tatoeba ``sentences.csv`` export
+(``id<TAB>lang<TAB>text``, ISO 639-3 codes) given as an argument.
+Latency is measured on documents of increasing size, which only have
+their first characters sampled.
+
+Usage: python -m benchmarks.bench_language_detection [sentences.csv] [sentences per language]
+"""
+import csv
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from app.utils.language_code import LanguageCode
+from app.utils.language_detector import LanguageDetector
+
+CORPUS = {
+    "en": [
+        "Please remember to water the plants while I am away on holiday.",
+        "The train was delayed for an hour, so we missed the beginning of the concert.",
+        "Could you send me the report as soon as you have finished reading it?",
+        "My grandmother used to bake bread every Sunday morning before church.",
+        "If the server stops responding, restart it and check the memory usage.",
+        "They said the new library would open next spring, but the work has barely started.",
+        "I don't think this is the right moment to change the whole design.",
+        "Children learn languages faster than adults because they are not afraid of mistakes.",
+        "The river flooded the fields after three days of heavy rain.",
+        "We need to decide which features belong in the first release.",
+        "She has been working at the hospital for almost twenty years.",
+        "How many people are coming to dinner tonight, and should I buy more wine?",
+    ],
+    "fr": [
+        "N'oublie pas d'arroser les plantes pendant que je suis en vacances.",
+        "Le train avait une heure de retard, donc nous avons manqué le début du concert.",
+        "Pourriez-vous m'envoyer le rapport dès que vous aurez fini de le lire ?",
+        "Ma grand-mère faisait du pain tous les dimanches matin avant la messe.",
+        "Si le serveur ne répond plus, redémarrez-le et vérifiez la mémoire utilisée.",
+        "Ils ont dit que la nouvelle bibliothèque ouvrirait au printemps, mais les travaux ont à peine commencé.",
+        "Je ne pense pas que ce soit le bon moment pour changer toute la conception.",
+        "Les enfants apprennent les langues plus vite que les adultes parce qu'ils n'ont pas peur des erreurs.",
+        "La rivière a inondé les champs après trois jours de pluie abondante.",
+        "Nous devons décider quelles fonctionnalités font partie de la première version.",
+        "Elle travaille à l'hôpital depuis presque vingt ans.",
+        "Combien de personnes viennent dîner ce soir, et faut-il acheter plus de vin ?",
+    ],
+    "es": [
+        "No olvides regar las plantas mientras estoy de vacaciones.",
+        "El tren llegó con una hora de retraso, así que nos perdimos el principio del concierto.",
+        "¿Podrías enviarme el informe en cuanto termines de leerlo?",
+        "Mi abuela hacía pan todos los domingos por la mañana antes de misa.",
+        "Si el servidor deja de responder, reinícialo y revisa el uso de memoria.",
+        "Dijeron que la nueva biblioteca abriría en primavera, pero las obras apenas han empezado.",
+        "No creo que sea el momento adecuado para cambiar todo el diseño.",
+        "Los niños aprenden idiomas más rápido que los adultos porque no tienen miedo a equivocarse.",
+        "El río inundó los campos después de tres días de lluvia intensa.",
+        "Tenemos que decidir qué funciones entran en la primera versión.",
+        "Ella lleva casi veinte años trabajando en el hospital.",
+        "¿Cuántas personas vienen a cenar esta noche y debería comprar más vino?",
+    ],
+    "de": [
+        "Vergiss bitte nicht, die Pflanzen zu gießen, während ich im Urlaub bin.",
+        "Der Zug hatte eine Stunde Verspätung, deshalb haben wir den Anfang des Konzerts verpasst.",
+        "Könnten Sie mir den Bericht schicken, sobald Sie ihn gelesen haben?",
+        "Meine Großmutter hat jeden Sonntagmorgen vor der Kirche Brot gebacken.",
+        "Wenn der Server nicht mehr antwortet, starten Sie ihn neu und prüfen Sie den Speicherverbrauch.",
+        "Sie sagten, die neue Bibliothek würde im Frühling öffnen, aber die Arbeiten haben kaum begonnen.",
+        "Ich glaube nicht, dass jetzt der richtige Moment ist, das ganze Design zu ändern.",
+        "Kinder lernen Sprachen schneller als Erwachsene, weil sie keine Angst vor Fehlern haben.",
+        "Der Fluss hat nach drei Tagen starkem Regen die Felder überschwemmt.",
+        "Wir müssen entscheiden, welche Funktionen in die erste Version gehören.",
+        "Sie arbeitet seit fast zwanzig Jahren im Krankenhaus.",
+        "Wie viele Leute kommen heute Abend zum Essen, und soll ich mehr Wein kaufen?",
+    ],
+}
+TATOEBA_LANGUAGES = {"eng": "en", "fra": "fr", "spa": "es", "deu": "de"}
+LENGTHS = (20, 40, 80, 160, None)
+
+
+def load_tatoeba(path: str, per_language: int) -> dict[str, list[str]]:
+    sentences = defaultdict(list)
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) == 3 and row[1] in TATOEBA_LANGUAGES:
+                sentences[TATOEBA_LANGUAGES[row[1]]].append(row[2])
+    rng = random.Random(0)
+    return {lang: rng.sample(texts, min(per_language, len(texts))) for lang, texts in sentences.items()}
+
+
+def documents(corpus: dict[str, list[str]]) -> dict[str, list[str]]:
+    # Paragraphs of consecutive sentences, so longer lengths have enough text
+    return {lang: [" ".join(texts[i:] + texts[:i]) for i in range(len(texts))] for lang, texts in corpus.items()}
+
+
+def timed_us(detector: LanguageDetector, text: str, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        detector.detect(text)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    per_language = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    corpus = load_tatoeba(sys.argv[1], per_language) if len(sys.argv) > 1 else documents(CORPUS)
+
+    started = time.perf_counter()
+    detector = LanguageDetector()
+    detector.model
+    print(f"profiles built in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"{sum(len(texts) for texts in corpus.values())} texts in {', '.join(sorted(corpus))}")
+    print()
+    print(f"{'chars':>6} {'accuracy':>9} {'wrong':>6} {'undetermined':>13} {'median us':>10}")
+    for length in LENGTHS:
+        correct = wrong = undetermined = 0
+        latencies = []
+        for lang, texts in corpus.items():
+            expected = detector.variants[lang]
+            for text in texts:
+                sample = text[:length] if length else text
+                latencies.append(timed_us(detector, sample, repeat=3))
+                detected = detector.detect(sample)
+                if detected == expected:
+                    correct += 1
+                elif detected == LanguageCode.AUTO:
+                    undetermined += 1
+                else:
+                    wrong += 1
+        total = correct + wrong + undetermined
+        print(
+            f"{length or 'full':>6} {correct / total:>9.1%} {wrong:>6} {undetermined:>13} "
+            f"{statistics.median(latencies):>10.1f}"
+        )
+
+    print()
+    print(f"{'document KiB':>12} {'median us':>10}")
+    paragraph = " ".join(CORPUS["en"]) + "\n\n"
+    for size in (1, 16, 256, 4096):
+        document = paragraph * (size * 1024 // len(paragraph) + 1)
+        print(f"{size:>12} {timed_us(detector, document):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
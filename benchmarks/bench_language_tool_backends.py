@@ -0,0 +1,137 @@
+"""
+Memory and throughput of N worker processes each running their own
+LanguageTool instance, vs N workers sharing one LanguageTool server.
+
+Memory is the total RSS of the workers and every Java process they or the
+shared server run, read from /proc. Needs Java, Linux, and the LanguageTool
+download that language_tool_python fetches on first use.
+
+Usage: python -m benchmarks.bench_language_tool_backends [workers] [checks per worker]
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from language_tool_python.config_file import LanguageToolConfig
+from language_tool_python.download_lt import download_lt
+from language_tool_python.utils import get_server_cmd
+
+from app.services.grammar_service import NoteGrammarService
+from app.services.language_tool_pool import LANGUAGE_TOOL_CONFIG, LanguageToolPool
+from app.services.language_tool_server import LanguageToolClient, LanguageToolServerChecker
+from app.utils.language_code import LanguageCode
+
+PORT = 8091
+DOCUMENT = """# Weekly notes
+
+Their is a problem with the deploy script. It dont restart the workers.
+
+- We should of tested it on staging first.
+- The logs was rotated to early.
+
+Next week we will fix the the alerting rules.
+"""
+
+
+def process_tree(root: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, the parent pid follows it
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def rss_bytes(pids: list[int]) -> int:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+def worker(backend: str, checks: int, ready, start, results) -> None:
+    if backend == "server":
+        checker = LanguageToolServerChecker(LanguageToolClient(f"http://127.0.0.1:{PORT}/v2"))
+    else:
+        pool = LanguageToolPool(min_size=1, max_size=1)
+        pool.warm_up([LanguageCode.EN_US])
+        checker = NoteGrammarService(pool)
+    # First check loads the language model
+    checker.check_grammar(DOCUMENT, LanguageCode.EN_US)
+    ready.release()
+    start.wait()
+    started = time.perf_counter()
+    for _ in range(checks):
+        checker.check_grammar(DOCUMENT, LanguageCode.EN_US)
+    results.put(time.perf_counter() - started)
+    # Keep the Java side alive until memory has been measured
+    start.wait()
+    if backend == "local":
+        pool.close()
+
+
+def run(backend: str, workers: int, checks: int) -> tuple[float, float]:
+    server = None
+    if backend == "server":
+        server = subprocess.Popen(
+            get_server_cmd(PORT, LanguageToolConfig(LANGUAGE_TOOL_CONFIG)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        client = LanguageToolClient(f"http://127.0.0.1:{PORT}/v2")
+        while not client.is_healthy():
+            time.sleep(0.5)
+        client.close()
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, start, results = ctx.Semaphore(0), ctx.Barrier(workers + 1), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(backend, checks, ready, start, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+
+    start.wait()
+    elapsed = max(results.get() for _ in processes)
+    pids = process_tree(os.getpid())
+    start.wait()
+    for process in processes:
+        process.join()
+    if server is not None:
+        server.terminate()
+        server.wait()
+    return rss_bytes(pids) / 2 ** 20, workers * checks / elapsed
+
+
+def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    checks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    download_lt()
+    print(f"{workers} workers, {checks} checks each")
+    print(f"{'backend':>8} {'total RSS MiB':>14} {'checks/s':>9}")
+    for backend in ("local", "server"):
+        rss, throughput = run(backend, workers, checks)
+        print(f"{backend:>8} {rss:>14.0f} {throughput:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Offset to line/column mapping: per-match scanning vs a shared LineIndex.
+
+Usage: python -m benchmarks.bench_line_index
+"""
+import random
+import time
+
+from app.utils.line_index import LineIndex
+
+
+LINE = "The quick brown fox jumps over teh lazy dog, and then it rests for a while.\n"
+
+
+def scan_positions(text: str, offsets: list[int]) -> list[tuple[int, int]]:
+    return [(text[:offset].count("\n") + 1, offset - text.rfind("\n", 0, offset)) for offset in offsets]
+
+
+def indexed_positions(text: str, offsets: list[int]) -> list[tuple[int, int]]:
+    line_index = LineIndex(text)
+    return [line_index.position(offset) for offset in offsets]
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main() -> None:
+    random.seed(0)
+    print(f"{'size MB':>8} {'matches':>8} {'scan ms':>10} {'index ms':>10} {'speedup':>8}")
+    for megabytes in (1, 2, 5):
+        text = LINE * (megabytes * 1024 * 1024 // len(LINE))
+        for matches in (100, 1000, 5000):
+            offsets = sorted(random.randrange(len(text)) for _ in range(matches))
+            scan_ms, expected = timed(scan_positions, text, offsets)
+            index_ms, actual = timed(indexed_positions, text, offsets)
+            assert expected == actual
+            print(f"{megabytes:>8} {matches:>8} {scan_ms:>10.1f} {index_ms:>10.1f} {scan_ms / index_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
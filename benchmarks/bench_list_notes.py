@@ -0,0 +1,87 @@
+"""
+Note list latency at increasing depth: OFFSET pagination vs keyset cursors.
+
+Usage: python -m benchmarks.bench_list_notes [rows]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Note
+from app.services.note_service import NoteService
+
+
+PAGE_SIZE = 20
+
+
+async def populate(session: AsyncSession, rows: int) -> None:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    connection = await session.connection()
+    batch = []
+    for i in range(rows):
+        batch.append({"title": f"note {i % 1000:04d}", "content": "body " * 200, "created_at": start + timedelta(seconds=i)})
+        if len(batch) == 10_000:
+            await connection.execute(insert(Note), batch)
+            batch = []
+    if batch:
+        await connection.execute(insert(Note), batch)
+    await session.commit()
+
+
+async def offset_page(session: AsyncSession, page: int) -> list:
+    statement = (
+        select(Note.id, Note.title, Note.created_at)
+        .order_by(Note.created_at.desc(), Note.id.desc())
+        .offset(page * PAGE_SIZE)
+        .limit(PAGE_SIZE)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def timed_ms(fn, *args, repeat: int = 5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await fn(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            await populate(session, rows)
+            service = NoteService(session)
+
+            # Walk the cursor chain once to find the cursor at each depth
+            depths = [page for page in (0, 10, 100, 1000, 5000) if page * PAGE_SIZE < rows]
+            cursors = {}
+            cursor = None
+            for page in range(max(depths) + 1):
+                if page in depths:
+                    cursors[page] = cursor
+                _, cursor = await service.list_notes(limit=PAGE_SIZE, cursor=cursor)
+
+            print(f"{'page':>6} {'row offset':>10} {'offset ms':>10} {'keyset ms':>10}")
+            for page in depths:
+                offset_ms, _ = await timed_ms(offset_page, session, page)
+                keyset_ms, _ = await timed_ms(service.list_notes, PAGE_SIZE, cursors[page])
+                print(f"{page:>6} {page * PAGE_SIZE:>10} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
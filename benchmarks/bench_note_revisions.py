@@ -0,0 +1,130 @@
+"""
+Note revision history: storage growth and latency of autosaves of a large
+note, stored as full copies vs snapshots and deltas at several snapshot
+intervals, then the latency of rebuilding revisions and the effect of
+compaction.
+
+Each autosave edits a few lines somewhere in the note, like a user typing.
+
+Usage: python -m benchmarks.bench_note_revisions [note MiB] [saves]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import NoteRevision
+from app.schemas.note_schema import NoteCreate
+from app.services.note_revision_service import NoteRevisionService
+from app.services.note_service import NoteService
+
+WORDS = "the quick brown fox jumps over a lazy dog while notes about grammar and markdown pile up".split()
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))).capitalize() + ".\n"
+
+
+def initial_content(size: int, rng: random.Random) -> list[str]:
+    lines, total, section = [], 0, 0
+    while total < size:
+        if section % 10 == 0:
+            lines.append(f"## Section {section // 10}\n")
+        lines.extend([paragraph(rng), "\n"])
+        total += sum(len(line) for line in lines[-2:])
+        section += 1
+    return lines
+
+
+def edit(lines: list[str], rng: random.Random) -> None:
+    # Edits cluster around a cursor position, as in a typing session
+    position = rng.randrange(len(lines))
+    for _ in range(rng.randint(1, 3)):
+        action = rng.random()
+        if action < 0.5:
+            lines[position] = lines[position].rstrip("\n") + " " + rng.choice(WORDS) + "\n"
+        elif action < 0.8:
+            lines.insert(position, paragraph(rng))
+        elif len(lines) > 1:
+            del lines[position]
+        position = min(max(position + rng.randint(-2, 2), 0), len(lines) - 1)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def run(directory: str, interval: int, size: int, saves: int) -> dict:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, f'bench-{interval}.db')}")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+    rng = random.Random(42)
+    lines = initial_content(size, rng)
+    full_copies = 0
+    save_ms = []
+    async with AsyncSession(engine) as session:
+        revisions = NoteRevisionService(session, snapshot_interval=interval)
+        notes = NoteService(session, revisions=revisions)
+        content = "".join(lines)
+        note_id = (await notes.save_note(NoteCreate(title="Large note", content=content))).id
+        full_copies += len(content.encode("utf-8"))
+        for _ in range(saves):
+            edit(lines, rng)
+            content = "".join(lines)
+            started = time.perf_counter()
+            await notes.update_note(note_id, NoteCreate(title="Large note", content=content))
+            save_ms.append((time.perf_counter() - started) * 1000)
+            full_copies += len(content.encode("utf-8"))
+
+        stored = (await session.exec(select(func.sum(NoteRevision.stored_size)))).one()
+        read_ms = []
+        for revision in range(1, saves + 2):
+            started = time.perf_counter()
+            await revisions.get_revision(note_id, revision)
+            read_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        compacted = await revisions.compact(note_id)
+        compact_s = time.perf_counter() - started
+    await engine.dispose()
+    return {
+        "full": full_copies,
+        "stored": stored,
+        "compacted": compacted["after"],
+        "compact_s": compact_s,
+        "save_ms": statistics.median(save_ms),
+        "read_ms": statistics.median(read_ms),
+        "read_p95_ms": percentile(read_ms, 0.95),
+    }
+
+
+async def main() -> None:
+    size = int(float(sys.argv[1]) * 2 ** 20) if len(sys.argv) > 1 else 2 * 2 ** 20
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"{size / 2 ** 20:.1f} MiB note, {saves} autosaves")
+    print(
+        f"{'interval':>8} {'full copies MiB':>16} {'stored MiB':>11} {'compacted MiB':>14} "
+        f"{'save ms':>8} {'read ms':>8} {'read p95 ms':>12} {'compact s':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for interval in (1, 5, 20, 50):
+            result = await run(directory, interval, size, saves)
+            print(
+                f"{interval:>8} {result['full'] / 2 ** 20:>16.1f} {result['stored'] / 2 ** 20:>11.2f} "
+                f"{result['compacted'] / 2 ** 20:>14.2f} {result['save_ms']:>8.1f} {result['read_ms']:>8.1f} "
+                f"{result['read_p95_ms']:>12.1f} {result['compact_s']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
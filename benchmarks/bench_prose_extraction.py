@@ -0,0 +1,59 @@
+"""
+Engine input size with and without markdown-aware prose extraction.
+
+Usage: python -m benchmarks.bench_prose_extraction
+"""
+import time
+
+from app.utils.markdown_blocks import split_markdown_blocks
+from app.utils.markdown_prose import extract_prose_blocks
+
+
+SECTION = """## Installing the client
+
+Run `pip install notes-client` and then call [the setup guide](https://example.com/docs/setup?ref=notes) before
+continuing. See https://example.com/changelog for details.
+
+```python
+from notes_client import Client
+
+client = Client(api_key="secret", timeout=30)
+for note in client.list_notes(limit=100):
+    print(note.title, note.created_at)
+```
+
+| option | default | description |
+|--------|---------|-------------|
+| timeout | 30 | request timeout |
+| retries | 3 | retry count |
+
+<div class="warning">Keep your <code>api_key</code> private.</div>
+
+- Use `client.close()` when done.
+- The client is thread safe.
+
+"""
+
+
+def build_note(sections: int) -> str:
+    front_matter = "---\ntitle: Client guide\ntags: [python, api]\n---\n"
+    return front_matter + SECTION * sections
+
+
+def main() -> None:
+    print(f"{'sections':>8} {'raw chars':>10} {'block chars':>12} {'prose chars':>12} {'reduction':>10} {'extract ms':>11}")
+    for sections in (10, 100, 1000):
+        note = build_note(sections)
+        block_chars = sum(len(block.text) for block in split_markdown_blocks(note))
+
+        started = time.perf_counter()
+        prose_blocks = extract_prose_blocks(note)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        prose_chars = sum(len(block.text) for block in prose_blocks)
+        reduction = 1 - prose_chars / len(note)
+        print(f"{sections:>8} {len(note):>10} {block_chars:>12} {prose_chars:>12} {reduction:>9.1%} {elapsed:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Cold start of the API: import time of app.main per module, from
+``python -X importtime``, and the time from launching a uvicorn worker to
+its first served request, with and without the startup pre-warm.
+
+Each measurement runs in a fresh process. The database and file storage
+go to a temporary directory.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+MARKDOWN = "# Warm-up\n\nThe first request after startup.\n"
+
+
+def import_times() -> tuple[float, dict[str, float], dict[str, float]]:
+    """Total, per-module self and per-package cumulative import time of app.main in ms"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    modules: dict[str, float] = {}
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        modules[module] = int(self_us) / 1000
+        packages[module.split(".")[0]] += int(self_us) / 1000
+        if module == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, modules, packages
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_requests(prewarm: bool, workdir: str) -> tuple[float, float, float]:
+    """Launch-to-first-response time and latency of the first and second markdown render, in ms"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        STARTUP_PREWARM="1" if prewarm else "0",
+        DATABASE_URL=f"sqlite+aiosqlite:///{workdir}/bench-{port}.db",
+        FILE_STORAGE_DIR=os.path.join(workdir, "storage"),
+        LOG_LEVEL="WARNING",
+    )
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            while True:
+                try:
+                    client.get("/")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None:
+                        raise RuntimeError("uvicorn exited during startup")
+                    time.sleep(0.005)
+            ready = time.perf_counter() - started
+
+            note_id = client.post("/notes/save", json={"title": "Warm-up", "content": MARKDOWN}).json()["note_id"]
+            latencies = []
+            for _ in range(2):
+                request_started = time.perf_counter()
+                client.get(f"/notes/{note_id}/render")
+                latencies.append(time.perf_counter() - request_started)
+    finally:
+        server.terminate()
+        server.wait()
+    return ready * 1000, latencies[0] * 1000, latencies[1] * 1000
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    samples = [import_times() for _ in range(runs)]
+    print(f"import app.main: {statistics.median(total for total, _, _ in samples):.0f} ms (median of {runs})")
+    _, modules, packages = samples[-1]
+    print()
+    print(f"{'package':<24} {'ms':>7}")
+    for name, elapsed in sorted(packages.items(), key=lambda item: -item[1])[:12]:
+        print(f"{name:<24} {elapsed:>7.1f}")
+    print()
+    print(f"{'module (self time)':<48} {'ms':>7}")
+    for name, elapsed in sorted(modules.items(), key=lambda item: -item[1])[:12]:
+        print(f"{name:<48} {elapsed:>7.1f}")
+
+    print()
+    print(f"{'pre-warm':>8} {'first response ms':>18} {'first render ms':>16} {'second render ms':>17}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for prewarm in (False, True):
+            results = [first_requests(prewarm, workdir) for _ in range(runs)]
+            ready, first, second = (statistics.median(values) for values in zip(*results))
+            print(f"{'on' if prewarm else 'off':>8} {ready:>18.0f} {first:>16.1f} {second:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
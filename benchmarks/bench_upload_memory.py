@@ -0,0 +1,51 @@
+"""
+Peak Python memory allocated while validating and reading markdown uploads.
+
+Usage: python -m benchmarks.bench_upload_memory
+"""
+import asyncio
+import tempfile
+import tracemalloc
+
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from app.utils.note_util import NoteUtilities
+
+
+LINE = b"Some *markdown* text with a [link](https://example.com) in it.\n"
+
+
+def make_upload(size: int, declare_size: bool) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    written = 0
+    while written < size:
+        written += spooled.write(LINE[: size - written])
+    spooled.seek(0)
+    return UploadFile(spooled, size=size if declare_size else None, filename="note.md")
+
+
+async def measure(size: int, declare_size: bool) -> tuple[str, int]:
+    upload = make_upload(size, declare_size)
+    tracemalloc.start()
+    try:
+        NoteUtilities.validate_markdown_file(upload)
+        await NoteUtilities.read_markdown_file(upload)
+        outcome = "accepted"
+    except HTTPException as e:
+        outcome = f"rejected {e.status_code}"
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return outcome, peak
+
+
+async def main() -> None:
+    print(f"{'upload':>10} {'size known':>10} {'outcome':>14} {'peak KiB':>10}")
+    for size in (64 * 1024, 1024 * 1024, 5 * 1024 * 1024, 6 * 1024 * 1024, 50 * 1024 * 1024):
+        for declare_size in (True, False):
+            outcome, peak = await measure(size, declare_size)
+            print(f"{size // 1024:>8}Ki {str(declare_size):>10} {outcome:>14} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
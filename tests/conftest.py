@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  registers the tables
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Async engine on a fresh SQLite file with every table created"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/notes.db")
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
@@ -0,0 +1,43 @@
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils.blob_response import BlobResponse
+
+CONTENT = bytes(range(256)) * 4
+DIGEST = "a" * 64
+
+
+def client(tmp_path) -> TestClient:
+    path = tmp_path / "blob"
+    path.write_bytes(CONTENT)
+
+    async def download(request):
+        return BlobResponse(str(path), DIGEST, filename="blob.bin", media_type="application/octet-stream")
+
+    return TestClient(Starlette(routes=[Route("/blob", download)]))
+
+
+def test_single_range_is_partial_content(tmp_path):
+    response = client(tmp_path).get("/blob", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.content == CONTENT[10:20]
+
+    response = client(tmp_path).get("/blob", headers={"Range": "bytes=-5", "If-Range": f'"{DIGEST}"'})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-5:]
+
+
+def test_unsatisfiable_range(tmp_path):
+    response = client(tmp_path).get("/blob", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_range_mismatch_sends_the_whole_blob(tmp_path):
+    response = client(tmp_path).get("/blob", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert "content-range" not in response.headers
+    assert response.headers["etag"] == f'"{DIGEST}"'
+    assert response.content == CONTENT
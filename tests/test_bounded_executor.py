@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+
+
+def test_cancelled_queued_job_releases_its_slot():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(executor.run(release.wait))
+        queued = asyncio.create_task(executor.run(lambda: None))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queued"] == 1
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+
+        stats = executor.stats()
+        assert (stats["running"], stats["queued"]) == (0, 0)
+        # Both slots are free again
+        await asyncio.gather(executor.run(lambda: None), executor.run(lambda: None))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_rejects_beyond_workers_and_queue():
+    executor = BoundedExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: None)
+        release.set()
+        await running
+        assert executor.stats()["rejected"] == 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
@@ -0,0 +1,34 @@
+import time
+
+from app.utils.caching_in_memory import CacheHandler
+
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_bound():
+    cache = CacheHandler(max_bytes=30)
+    for key in "abc":
+        cache.set(key, key * 10)
+    cache.get("a")
+
+    cache.set("d", "d" * 10)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a" * 10, "c" * 10, "d" * 10]
+    assert cache.stats()["bytes"] == 30
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_purged_before_live_ones_are_evicted(monkeypatch):
+    cache = CacheHandler(max_bytes=30)
+    cache.set("warm", "w" * 10)
+    cache.set("hot", "h" * 10)
+    cache.set("dead", "d" * 10, expiry_time=1)
+    now = time.time() + 2
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    cache.set("new", "n" * 10)
+
+    assert [cache.get(key) for key in ("warm", "hot", "new")] == ["w" * 10, "h" * 10, "n" * 10]
+    stats = cache.stats()
+    assert stats["bytes"] == 30
+    assert stats["evictions"] == 0
+    assert stats["expirations"] == 1
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.utils.callback_url import UnsafeCallbackURLError, check_callback_url
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.0.0.5/hook",
+    "https://192.168.1.1/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://0.0.0.0/hook",
+    "ftp://93.184.215.14/hook",
+    "http:///hook",
+])
+def test_internal_and_malformed_callbacks_are_refused(url):
+    with pytest.raises(UnsafeCallbackURLError):
+        asyncio.run(check_callback_url(url))
+
+
+def test_public_address_is_accepted():
+    asyncio.run(check_callback_url("https://93.184.215.14:8443/hook"))
+
+
+def test_allowlist_replaces_the_address_check():
+    asyncio.run(check_callback_url("http://127.0.0.1/hook", ["127.0.0.1"]))
+    with pytest.raises(UnsafeCallbackURLError):
+        asyncio.run(check_callback_url("https://93.184.215.14/hook", ["hooks.example.com"]))
@@ -0,0 +1,52 @@
+import asyncio
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import GrammarJob
+from app.schemas.grammar_schema import GrammarJobStatus
+from app.services import grammar_job_service
+from app.services.grammar_job_service import GrammarJobWorker
+from app.utils.bounded_executor import ExecutorSaturatedError
+from app.utils.language_code import LanguageCode
+
+
+class BusyChecker:
+    """Grammar service whose executor is saturated for the first ``busy`` checks"""
+
+    def __init__(self, busy: int) -> None:
+        self.busy = busy
+
+    async def check_grammar_encoded(self, content, lang, cache_key, progress=None):
+        if self.busy:
+            self.busy -= 1
+            raise ExecutorSaturatedError("Executor queue is full", retry_after=0)
+        return b'{"has_errors": false, "total_issues": 0}'
+
+
+class NoCache:
+    async def get(self, key, decode=True):
+        return None
+
+
+class NoCoalescing:
+    async def run(self, key, compute, fetch):
+        return await compute()
+
+
+def test_saturation_requeues_do_not_use_up_attempts(database, monkeypatch):
+    monkeypatch.setattr(grammar_job_service, "create_session", lambda: AsyncSession(database, expire_on_commit=False))
+    worker = GrammarJobWorker(BusyChecker(busy=5), NoCache(), NoCoalescing(), max_attempts=3)
+
+    async def scenario():
+        async with AsyncSession(database) as session:
+            session.add(GrammarJob(id="job", lang=LanguageCode.EN_US, cache_key="key", content="Some text."))
+            await session.commit()
+        while (job := await worker._claim()) is not None:
+            await worker._run(job)
+        async with AsyncSession(database) as session:
+            return await session.get(GrammarJob, "job")
+
+    job = asyncio.run(scenario())
+    assert job.status == GrammarJobStatus.SUCCEEDED
+    assert job.attempts == 1
+    assert worker.requeued == 5
@@ -0,0 +1,31 @@
+from app.services.language_tool_server import LanguageToolServerChecker
+from app.utils.language_code import LanguageCode
+from app.utils.language_detector import LanguageDetector
+
+ENGLISH = "Please remember to water the plants while I am away on holiday."
+FRENCH = "N'oublie pas d'arroser les plantes pendant que je suis en vacances."
+
+
+def test_detects_configured_variants():
+    detector = LanguageDetector([LanguageCode.EN_GB, LanguageCode.FR_FR])
+
+    assert detector.detect(ENGLISH) == LanguageCode.EN_GB
+    assert detector.detect(FRENCH) == LanguageCode.FR_FR
+
+
+def test_short_text_is_undetermined_even_with_a_single_language():
+    detector = LanguageDetector([LanguageCode.EN_US])
+
+    assert detector.detect("Hi") == LanguageCode.AUTO
+    assert detector.detect(ENGLISH) == LanguageCode.EN_US
+
+
+class FakeClient:
+    def check(self, text: str, lang: LanguageCode) -> list[dict]:
+        return []
+
+
+def test_server_checker_reports_the_language_checked():
+    response = LanguageToolServerChecker(FakeClient()).check_grammar(ENGLISH, LanguageCode.DE_DE)
+
+    assert response.language == LanguageCode.DE_DE
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services.language_tool_pool import LanguageToolPool, PoolExhaustedError, _PooledTool
+from app.utils.language_code import LanguageCode
+
+
+class FakeTool:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def check(self, text: str) -> list:
+        return []
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def fake_pool(**kwargs) -> LanguageToolPool:
+    pool = LanguageToolPool(**kwargs)
+    pool._create_tool = lambda lang: _PooledTool(FakeTool())
+    return pool
+
+
+@pytest.mark.parametrize("interruption", [KeyboardInterrupt, GeneratorExit, ValueError])
+def test_interrupted_checker_is_discarded_and_its_slot_freed(interruption):
+    pool = fake_pool(min_size=0, max_size=1, acquire_timeout=0.01)
+
+    with pytest.raises(interruption):
+        with pool.acquire(LanguageCode.EN_US) as tool:
+            raise interruption()
+
+    assert tool.closed
+    assert pool.stats()["en-US"]["size"] == 0
+    with pool.acquire(LanguageCode.EN_US) as replacement:
+        assert replacement is not tool
+
+
+def test_acquire_times_out_when_every_checker_is_busy():
+    pool = fake_pool(min_size=0, max_size=1, acquire_timeout=0.01)
+
+    with pool.acquire(LanguageCode.EN_US):
+        with pytest.raises(PoolExhaustedError):
+            with pool.acquire(LanguageCode.EN_US):
+                pass
+
+
+def test_warm_up_never_exceeds_max_size():
+    pool = fake_pool(min_size=4, max_size=2, sizes={LanguageCode.DE_DE: (3, 1)})
+
+    pool.warm_up([LanguageCode.EN_US, LanguageCode.DE_DE])
+
+    stats = pool.stats()
+    assert stats["en-US"]["size"] == 2
+    assert stats["de-DE"]["size"] == 1
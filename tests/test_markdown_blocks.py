@@ -0,0 +1,23 @@
+import pytest
+
+from app.utils.markdown_blocks import split_markdown_blocks
+from app.utils.markdown_prose import extract_prose_blocks
+
+
+@pytest.mark.parametrize("front_matter", [
+    "---\ntitle: Notes\ntags: [a, b]\n---\n",
+    "---\ntags:\n  - a\n---\n",
+    '+++\ntitle = "Notes"\n+++\n',
+])
+def test_front_matter_is_skipped(front_matter):
+    text = front_matter + "\nFirst paragraph.\n"
+    assert split_markdown_blocks(text) == [("First paragraph.", text.index("First"))]
+
+
+def test_leading_thematic_break_is_not_front_matter():
+    text = "---\n\nFirst paragraph.\n\n---\n\nSecond paragraph.\n"
+
+    prose = extract_prose_blocks(text)
+
+    assert [block.text for block in prose] == ["First paragraph.", "Second paragraph."]
+    assert prose[0].source_starts == [text.index("First")]
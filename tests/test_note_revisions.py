@@ -0,0 +1,107 @@
+import asyncio
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Note, NoteRevision
+from app.schemas.note_schema import NoteCreate
+from app.services.note_revision_service import NoteRevisionService
+from app.services.note_service import NoteService
+
+# Long enough for small edits to be stored as deltas rather than snapshots
+PARAGRAPHS = [f"Paragraph {i} of a note that is edited a line at a time." for i in range(200)]
+
+
+def edit(version: int) -> str:
+    lines = list(PARAGRAPHS)
+    lines[version * 7 % len(lines)] = f"Edited in version {version}."
+    return "\n".join(lines)
+
+
+def session(engine) -> AsyncSession:
+    return AsyncSession(engine, expire_on_commit=False)
+
+
+def notes(db: AsyncSession, snapshot_interval: int = 20) -> NoteService:
+    return NoteService(db, revisions=NoteRevisionService(db, snapshot_interval=snapshot_interval))
+
+
+async def stored_revisions(engine, note_id: int) -> list[NoteRevision]:
+    async with session(engine) as db:
+        result = await db.exec(
+            select(NoteRevision).where(NoteRevision.note_id == note_id).order_by(NoteRevision.revision)
+        )
+        return result.all()
+
+
+def test_concurrent_updates_each_get_a_revision(database):
+    async def scenario():
+        async with session(database) as db:
+            note_id = (await notes(db).save_note(NoteCreate(title="Note", content=edit(0)))).id
+
+        async def update(version: int):
+            async with session(database) as db:
+                return await notes(db).update_note(note_id, NoteCreate(title="Note", content=edit(version)))
+
+        updated = await asyncio.gather(update(1), update(2))
+        assert all(note is not None for note in updated)
+
+        revisions = await stored_revisions(database, note_id)
+        assert [row.revision for row in revisions] == [1, 2, 3]
+        async with session(database) as db:
+            service = NoteRevisionService(db)
+            contents = [(await service.get_revision(note_id, row.revision))["content"] for row in revisions]
+            final = (await db.get(Note, note_id)).content
+        # Each update is recorded against the content the other one left
+        assert contents[0] == edit(0)
+        assert sorted(contents[1:]) == sorted([edit(1), edit(2)])
+        assert contents[-1] == final
+
+    asyncio.run(scenario())
+
+
+def test_revisions_round_trip_through_deltas_and_snapshots(database):
+    async def scenario():
+        async with session(database) as db:
+            service = notes(db, snapshot_interval=3)
+            note_id = (await service.save_note(NoteCreate(title="Note", content=edit(0)))).id
+            for version in range(1, 7):
+                await service.update_note(note_id, NoteCreate(title=f"Note {version}", content=edit(version)))
+
+        revisions = await stored_revisions(database, note_id)
+        assert [row.is_snapshot for row in revisions] == [True, False, False, True, False, False, True]
+        assert all(row.chain_length < 3 for row in revisions)
+
+        async with session(database) as db:
+            history = NoteRevisionService(db, snapshot_interval=3)
+            for version in range(7):
+                revision = await history.get_revision(note_id, version + 1)
+                assert revision["content"] == edit(version)
+                assert revision["title"] == ("Note" if version == 0 else f"Note {version}")
+
+    asyncio.run(scenario())
+
+
+def test_compaction_keeps_the_newest_revisions_readable(database):
+    async def scenario():
+        async with session(database) as db:
+            service = notes(db, snapshot_interval=3)
+            note_id = (await service.save_note(NoteCreate(title="Note", content=edit(0)))).id
+            for version in range(1, 7):
+                await service.update_note(note_id, NoteCreate(title="Note", content=edit(version)))
+
+        async with session(database) as db:
+            stats = await NoteRevisionService(db, snapshot_interval=3).compact(note_id, keep=4)
+        assert stats["dropped"] == 3
+
+        revisions = await stored_revisions(database, note_id)
+        assert [row.revision for row in revisions] == [4, 5, 6, 7]
+        assert revisions[0].is_snapshot
+
+        async with session(database) as db:
+            history = NoteRevisionService(db, snapshot_interval=3)
+            assert await history.get_revision(note_id, 3) is None
+            for version in range(3, 7):
+                assert (await history.get_revision(note_id, version + 1))["content"] == edit(version)
+
+    asyncio.run(scenario())
@@ -0,0 +1,70 @@
+import asyncio
+import sqlite3
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.note_schema import NoteCreate
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_revision_service import NoteRevisionService
+from app.services.note_service import NoteService
+
+
+class LockProbe:
+    """Records whether the database write lock was free during CPU work"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.locked: list[bool] = []
+
+    def check(self) -> None:
+        connection = sqlite3.connect(self.path, timeout=0)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.rollback()
+            self.locked.append(False)
+        except sqlite3.OperationalError:
+            self.locked.append(True)
+        finally:
+            connection.close()
+
+
+class ProbingRenderer:
+    def __init__(self, probe: LockProbe) -> None:
+        self.probe = probe
+
+    def render(self, content: str) -> str:
+        self.probe.check()
+        return f"<p>{content}</p>"
+
+
+class ProbingRevisions(NoteRevisionService):
+    def __init__(self, session: AsyncSession, probe: LockProbe) -> None:
+        super().__init__(session)
+        self.probe = probe
+
+    def _encode_created(self, notes):
+        self.probe.check()
+        return super()._encode_created(notes)
+
+    def _encode_update(self, *args):
+        self.probe.check()
+        return super()._encode_update(*args)
+
+
+def test_notes_are_rendered_and_encoded_outside_the_write_transaction(database):
+    probe = LockProbe(database.url.database)
+
+    async def scenario():
+        async with AsyncSession(database, expire_on_commit=False) as db:
+            service = NoteService(
+                db,
+                NoteDerivativeService(db, renderer=ProbingRenderer(probe), queue_grammar_checks=False),
+                ProbingRevisions(db, probe),
+            )
+            note = await service.save_note(NoteCreate(title="Note", content="First"))
+            await service.update_note(note.id, NoteCreate(title="Note", content="Second"))
+            await service.save_notes([NoteCreate(title="Other", content="Third")])
+
+    asyncio.run(scenario())
+    # Render and revision of each of the three writes
+    assert probe.locked == [False] * 6
@@ -0,0 +1,60 @@
+import asyncio
+import tempfile
+import tracemalloc
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.utils.note_util import NoteUtilities
+
+MB = 1024 * 1024
+LINE = b"# Title\n\nSome *markdown* text, repeated to fill the upload.\n"
+
+
+def spooled_upload(size: int) -> UploadFile:
+    # Spooled like the uploads Starlette parses, without a declared size
+    file = tempfile.SpooledTemporaryFile(max_size=MB)
+    block = LINE * (NoteUtilities.CHUNK_SIZE // len(LINE))
+    for _ in range(size // len(block)):
+        file.write(block)
+    file.write(LINE * ((size % len(block)) // len(LINE)))
+    file.seek(0)
+    return UploadFile(file=file, filename="note.md")
+
+
+def read_traced(upload: UploadFile):
+    tracemalloc.start()
+    try:
+        content = asyncio.run(NoteUtilities.read_markdown_file(upload))
+        return content, tracemalloc.get_traced_memory()[1]
+    except HTTPException as e:
+        return e, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        upload.file.close()
+
+
+@pytest.fixture(autouse=True)
+def load_magic():
+    # Keep the one-off import out of the traced allocations
+    asyncio.run(NoteUtilities.read_markdown_file(spooled_upload(len(LINE) * 10)))
+
+
+@pytest.mark.parametrize("size", [6 * MB, 50 * MB])
+def test_oversized_upload_is_rejected_without_reading_it(size):
+    error, peak = read_traced(spooled_upload(size))
+
+    assert isinstance(error, HTTPException)
+    assert error.status_code == 413
+    assert peak < 2 * NoteUtilities.CHUNK_SIZE
+
+
+def test_upload_at_the_limit_is_decoded_into_a_single_copy():
+    upload = spooled_upload(5 * MB)
+    size = NoteUtilities._upload_size(upload)
+
+    content, peak = read_traced(upload)
+
+    assert isinstance(content, str)
+    assert len(content) == size
+    assert peak < size + 2 * NoteUtilities.CHUNK_SIZE
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.utils.record_stream import RecordError, iter_json_array, iter_ndjson
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(parse, data: bytes, size: int = 3) -> list:
+    async def run():
+        return [record async for record in parse(_chunks(data, size))]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1024])
+def test_json_array_elements_split_across_chunks(size):
+    records = [{"title": "é 😀", "tags": ["a", "b"]}, 12.5e3, -7, "text", True, None, [1, [2]]]
+    assert collect(iter_json_array, json.dumps(records).encode(), size) == records
+
+
+@pytest.mark.parametrize("body", [b"[1 2]", b"[,,1]", b"[1,]", b"[1,,2]", b'[1, tru]', b"[1, 2", b"{}"])
+def test_malformed_json_arrays_end_with_an_error(body):
+    records = collect(iter_json_array, body, size=1)
+    assert isinstance(records[-1], RecordError)
+    assert not any(isinstance(record, RecordError) for record in records[:-1])
+
+
+def test_empty_json_array():
+    assert collect(iter_json_array, b" [ ] ") == []
+
+
+def test_large_element_is_decoded_in_linear_time():
+    element = {"content": "x" * 2_000_000}
+    body = json.dumps([element, 1]).encode()
+
+    started = time.perf_counter()
+    assert collect(iter_json_array, body, size=1024) == [element, 1]
+    assert time.perf_counter() - started < 2
+
+
+def test_ndjson_lines_split_across_chunks():
+    body = b'{"a": 1}\n\n[2]\nnot json\n{"b": "' + b"y" * 100_000 + b'"}'
+    records = collect(iter_ndjson, body, size=5)
+    assert records[:2] == [{"a": 1}, [2]]
+    assert isinstance(records[2], RecordError)
+    assert records[3] == {"b": "y" * 100_000}
+
+
+@pytest.mark.parametrize("size", [1, 7, 1024])
+def test_oversized_json_array_element_is_skipped(size):
+    # Brackets, commas and escaped quotes inside strings don't end the skipped element
+    large = {"content": 'x[,]{"\\"' * 50, "tags": [[1, 2], {"a": "]"}]}
+    body = json.dumps([{"a": 1}, large, "y" * 500, 2]).encode()
+
+    async def run():
+        return [record async for record in iter_json_array(_chunks(body, size), max_record_bytes=100)]
+
+    records = asyncio.run(run())
+    assert records[0] == {"a": 1}
+    assert [str(record) for record in records[1:3]] == ["Record larger than 100 bytes"] * 2
+    assert records[3] == 2
+
+
+def test_oversized_json_array_element_is_not_buffered():
+    chunks_read = 0
+
+    async def endless():
+        nonlocal chunks_read
+        yield b'[1, "'
+        while chunks_read < 1000:
+            chunks_read += 1
+            yield b"x" * 1024
+
+    async def run():
+        return [record async for record in iter_json_array(endless(), max_record_bytes=10_000)]
+
+    records = asyncio.run(run())
+    assert records[0] == 1
+    assert str(records[1]) == "Record larger than 10000 bytes"
+    assert isinstance(records[-1], RecordError)
+    assert chunks_read == 1000
+
+
+@pytest.mark.parametrize("size", [1, 5, 1024])
+def test_oversized_ndjson_line_is_skipped(size):
+    body = b'{"a": 1}\n{"b": "' + b"y" * 300 + b'"}\n{"c": 3}\n' + b"z" * 300
+
+    async def run():
+        return [record async for record in iter_ndjson(_chunks(body, size), max_record_bytes=100)]
+
+    records = asyncio.run(run())
+    assert records[0] == {"a": 1}
+    assert str(records[1]) == "Record larger than 100 bytes"
+    assert records[2] == {"c": 3}
+    assert str(records[3]) == "Record larger than 100 bytes"
+    assert len(records) == 4
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.note_schema import NoteCreate
+from app.services.note_derivative_service import NoteDerivativeService
+from app.services.note_service import NoteService
+from app.services.render_etag_service import RenderETagService, render_etag
+from app.services.render_service import NoteRenderService
+
+
+class FakeVersionedCache:
+    """In-memory stand-in for the versioned Redis operations of the cache handler"""
+
+    def __init__(self) -> None:
+        self.entries: dict[str, tuple[int, bytes]] = {}
+
+    async def get_versioned(self, key: str):
+        return self.entries.get(key, (0, None))[1]
+
+    async def set_versioned(self, key: str, version: int, value: bytes):
+        if key in self.entries and self.entries[key][0] > version:
+            return False
+        self.entries[key] = (version, value)
+        return True
+
+
+class CountingDerivatives(NoteDerivativeService):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session, queue_grammar_checks=False)
+        self.lookups = 0
+
+    async def get_content_version(self, note_id: int):
+        self.lookups += 1
+        return await super().get_content_version(note_id)
+
+
+def etag_of(content: str) -> str:
+    return render_etag(hashlib.sha256(content.encode()).hexdigest())
+
+
+def test_updated_note_etag_is_served_without_the_database(database):
+    etags = RenderETagService(FakeVersionedCache())
+
+    async def scenario():
+        async with AsyncSession(database, expire_on_commit=False) as session:
+            derivatives = CountingDerivatives(session)
+            notes = NoteService(session, derivatives, etags=etags)
+            note = await notes.save_note(NoteCreate(title="Note", content="# First"))
+            await notes.update_note(note.id, NoteCreate(title="Note", content="# Second"))
+
+            render_service = NoteRenderService(notes, derivatives, etags)
+            assert await render_service.current_etag(note.id) == etag_of("# Second")
+            assert derivatives.lookups == 0
+
+    asyncio.run(scenario())
+
+
+def test_unknown_etag_is_read_from_the_database_once(database):
+    etags = RenderETagService(FakeVersionedCache())
+
+    async def scenario():
+        async with AsyncSession(database, expire_on_commit=False) as session:
+            derivatives = CountingDerivatives(session)
+            notes = NoteService(session, derivatives)
+            note = await notes.save_note(NoteCreate(title="Note", content="# First"))
+
+            render_service = NoteRenderService(notes, derivatives, etags)
+            assert await render_service.current_etag(note.id) == etag_of("# First")
+            assert await render_service.current_etag(note.id) == etag_of("# First")
+            assert derivatives.lookups == 1
+
+    asyncio.run(scenario())
+
+
+def test_pending_update_is_not_replaced_by_an_older_etag(database):
+    etags = RenderETagService(FakeVersionedCache())
+
+    async def scenario():
+        async with AsyncSession(database, expire_on_commit=False) as session:
+            derivatives = CountingDerivatives(session)
+            notes = NoteService(session, derivatives)
+            note = await notes.save_note(NoteCreate(title="Note", content="# First"))
+            # An update of version 2 that hasn't committed yet
+            await etags.invalidate(note.id, 2)
+
+            render_service = NoteRenderService(notes, derivatives, etags)
+            assert await render_service.current_etag(note.id) == etag_of("# First")
+            assert await render_service.current_etag(note.id) == etag_of("# First")
+            # Version 1 read from the database didn't replace the pending entry
+            assert derivatives.lookups == 2
+            assert await etags.get(note.id) is None
+
+    asyncio.run(scenario())
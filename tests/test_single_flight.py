@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class FakeLeases:
+    """In-memory stand-in for the Redis lease operations of the cache handler"""
+
+    def __init__(self) -> None:
+        self.leases: dict[str, tuple[str, float]] = {}
+        self.renewals = 0
+
+    def _held(self, key: str) -> bool:
+        return key in self.leases and self.leases[key][1] > time.monotonic()
+
+    async def acquire_lease(self, key: str, token: str, ttl: float):
+        if self._held(key):
+            return False
+        self.leases[key] = (token, time.monotonic() + ttl)
+        return True
+
+    async def renew_lease(self, key: str, token: str, ttl: float):
+        if self._held(key) and self.leases[key][0] == token:
+            self.leases[key] = (token, time.monotonic() + ttl)
+            self.renewals += 1
+            return True
+        return False
+
+    async def release_lease(self, key: str, token: str) -> None:
+        if self.leases.get(key, (None,))[0] == token:
+            del self.leases[key]
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    single_flight = SingleFlight(FakeLeases())
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def fetch():
+        return None
+
+    async def scenario():
+        leader = asyncio.create_task(single_flight.run("key", compute, fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(single_flight.run("key", compute, fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "result"
+        assert calls == 2
+        assert single_flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_leader_errors_reach_followers():
+    single_flight = SingleFlight(FakeLeases())
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        raise ValueError("boom")
+
+    async def fetch():
+        return None
+
+    async def scenario():
+        results = await asyncio.gather(
+            single_flight.run("key", compute, fetch),
+            single_flight.run("key", compute, fetch),
+            return_exceptions=True,
+        )
+        assert [type(result) for result in results] == [ValueError, ValueError]
+
+    asyncio.run(scenario())
+
+
+def test_lease_is_renewed_while_computing():
+    leases = FakeLeases()
+    single_flight = SingleFlight(leases, lease_timeout=0.06, poll_interval=0.01)
+    other_process = SingleFlight(leases, lease_timeout=0.06, poll_interval=0.01)
+    store = {}
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        # Outlives the lease timeout several times
+        await asyncio.sleep(0.2)
+        store["key"] = "result"
+        return "result"
+
+    async def fetch():
+        return store.get("key")
+
+    async def scenario():
+        first = asyncio.create_task(single_flight.run("key", compute, fetch))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(other_process.run("key", compute, fetch))
+        assert await asyncio.gather(first, second) == ["result", "result"]
+
+    asyncio.run(scenario())
+    assert calls == 1
+    assert leases.renewals > 0
+    assert other_process.stats()["coalesced_remote"] == 1
+
+
+def test_cache_is_read_again_once_the_lease_is_acquired():
+    single_flight = SingleFlight(FakeLeases())
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return "computed"
+
+    async def fetch():
+        # Stored by a worker that released its lease in the meantime
+        return "cached"
+
+    assert asyncio.run(single_flight.run("key", compute, fetch)) == "cached"
+    assert calls == 0